@@ -63,11 +63,15 @@ LOGGING = {
         'console': {'class': 'logging.StreamHandler'},
     },
     'root': {'handlers': ['console'], 'level': 'INFO'},
+    'loggers': {
+        'smartchama.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'common.middleware.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -187,5 +191,73 @@ MPESA_CONSUMER_KEY = config('MPESA_CONSUMER_KEY')
 MPESA_CONSUMER_SECRET = config('MPESA_CONSUMER_SECRET')
 MPESA_PASSKEY = config('MPESA_PASSKEY')
 MPESA_SHORTCODE = config('MPESA_BUSINESSSHORTCODE')
+MPESA_TOKEN_TIMEOUT = config('MPESA_TOKEN_TIMEOUT', default=10, cast=int)
+
+# Point these at `manage.py daraja_simulator` to run the payment flow offline.
+MPESA_BASE_URL = config('MPESA_BASE_URL', default='https://sandbox.safaricom.co.ke')
+MPESA_CALLBACK_URL = config(
+    'MPESA_CALLBACK_URL',
+    default='https://vacuous-elva-appauma.ngrok-free.dev/api/mpesa/stk/callback/'
+)
+
+# Pooled HTTP client used for every Daraja call (darajaapi/client.py)
+MPESA_HTTP_POOL_CONNECTIONS = config('MPESA_HTTP_POOL_CONNECTIONS', default=4, cast=int)
+MPESA_HTTP_POOL_MAXSIZE = config('MPESA_HTTP_POOL_MAXSIZE', default=20, cast=int)
+MPESA_HTTP_RETRIES = config('MPESA_HTTP_RETRIES', default=3, cast=int)
+MPESA_HTTP_BACKOFF = config('MPESA_HTTP_BACKOFF', default=0.5, cast=float)
+MPESA_HTTP_CONNECT_TIMEOUT = config('MPESA_HTTP_CONNECT_TIMEOUT', default=5, cast=int)
+MPESA_HTTP_TIMEOUTS = {
+    'oauth': MPESA_TOKEN_TIMEOUT,
+    'stk_push': config('MPESA_STK_PUSH_TIMEOUT', default=30, cast=int),
+    'stk_query': config('MPESA_STK_QUERY_TIMEOUT', default=15, cast=int),
+}
+
+# Shared cache (Daraja OAuth token, etc). Point CACHE_BACKEND at Redis or a
+# file-based cache in production so gunicorn workers share entries.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'smartchama'),
+    }
+}
+
+# Per-request SQL/latency profiling (common.middleware). Off unless enabled;
+# totals are shown to staff at /_perf/.
+QUERY_PROFILING_ENABLED = config('QUERY_PROFILING_ENABLED', default=False, cast=bool)
+QUERY_PROFILING_SAMPLE_RATE = config('QUERY_PROFILING_SAMPLE_RATE', default=0.05, cast=float)
+QUERY_PROFILING_SLOW_MS = config('QUERY_PROFILING_SLOW_MS', default=500, cast=int)
+QUERY_PROFILING_MAX_LOGS_PER_MINUTE = config('QUERY_PROFILING_MAX_LOGS_PER_MINUTE', default=60, cast=int)
+QUERY_PROFILING_FLUSH_INTERVAL = config('QUERY_PROFILING_FLUSH_INTERVAL', default=30, cast=int)
+
+# Payment status stream (finance.views.contribution_status_stream). It only
+# streams when served through ChamaSystem.asgi; under WSGI (gunicorn) browsers
+# poll it every PAYMENT_STATUS_POLL_INTERVAL seconds instead.
+PAYMENT_STATUS_STREAM_TIMEOUT = config('PAYMENT_STATUS_STREAM_TIMEOUT', default=300, cast=int)
+PAYMENT_STATUS_DB_CHECK_INTERVAL = config('PAYMENT_STATUS_DB_CHECK_INTERVAL', default=15, cast=int)
+PAYMENT_STATUS_POLL_INTERVAL = config('PAYMENT_STATUS_POLL_INTERVAL', default=3, cast=int)
+
+# Seconds a cached dashboard context lives (0 disables the dashboard cache)
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+
+# Rows fetched per database round trip when streaming CSV reports
+REPORT_CHUNK_SIZE = config('REPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Generated CSV reports (dashboard.reports); not web-served, downloaded through dashboard:download_report
+REPORT_STORAGE_ROOT = config('REPORT_STORAGE_ROOT', default=str(BASE_DIR / 'private_media'))
+
+# Notifications (and their delivery logs) inserted per query by send_chama_notification
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=500, cast=int)
+
+# Email and SMS delivery worker (notification.delivery); the email backend defaults to EMAIL_BACKEND
+NOTIFICATION_EMAIL_BACKEND = config('NOTIFICATION_EMAIL_BACKEND', default=None)
+NOTIFICATION_SMS_BACKEND = config('NOTIFICATION_SMS_BACKEND', default='notification.delivery.ConsoleSmsBackend')
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_RETRY_BACKOFF = config('NOTIFICATION_RETRY_BACKOFF', default=60, cast=int)
+
+# Read notifications older than this many days are moved to the archive table (notification.archive)
+NOTIFICATION_ARCHIVE_DAYS = config('NOTIFICATION_ARCHIVE_DAYS', default=180, cast=int)
+
+# Days an installment can stay unpaid before its loan is marked defaulted
+LOAN_DEFAULT_DAYS = config('LOAN_DEFAULT_DAYS', default=90, cast=int)
 
 AUTH_USER_MODEL = 'user.User'
\ No newline at end of file
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path,include
 from django.conf import settings
 from django.conf.urls.static import static
+from dashboard.perf_views import perf_summary
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +29,7 @@ urlpatterns = [
     path('notification/', include('notification.urls')),
     path("api/mpesa/", include("darajaapi.urls")),
     path('finance/', include(('finance.urls', 'finance'), namespace='finance')),
+    path('_perf/', perf_summary, name='perf_summary'),
 ]
 
 if settings.DEBUG:
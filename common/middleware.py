@@ -0,0 +1,220 @@
+"""
+Opt-in per-request query and latency profiling.
+
+QueryProfilingMiddleware records, for every view, the number of SQL
+queries, total database time, the slowest query, time spent outside the
+database (view logic and template rendering) and the response size.
+Sampled and slow requests are written to the "smartchama.perf" logger as
+one JSON object per line; per-endpoint totals are kept in memory and
+flushed to the cache for the staff `/_perf/` page. For streaming
+responses the timings cover the view up to the first byte.
+
+Enable with QUERY_PROFILING_ENABLED=True.
+"""
+import json
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger("smartchama.perf")
+
+STATS_CACHE_KEY = "perf:endpoint_stats"
+FLUSH_LOCK_KEY = "perf:endpoint_stats:flushing"
+STATS_TTL = 7 * 24 * 60 * 60
+SQL_PREVIEW_LENGTH = 300
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that times every query of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest:
+                self.slowest = elapsed
+                self.slowest_sql = sql
+
+
+def _empty_stats():
+    return {
+        "requests": 0, "total_ms": 0.0, "max_ms": 0.0,
+        "db_ms": 0.0, "queries": 0, "max_queries": 0, "bytes": 0,
+        "slowest_query_ms": 0.0, "slowest_query": "",
+    }
+
+
+def merge_stats(into, other):
+    """Add one endpoint's totals into another's."""
+    for key in ("requests", "total_ms", "db_ms", "queries", "bytes"):
+        into[key] += other[key]
+    into["max_ms"] = max(into["max_ms"], other["max_ms"])
+    into["max_queries"] = max(into["max_queries"], other["max_queries"])
+    if other["slowest_query_ms"] > into["slowest_query_ms"]:
+        into["slowest_query_ms"] = other["slowest_query_ms"]
+        into["slowest_query"] = other["slowest_query"]
+    return into
+
+
+class EndpointStats:
+    """Per-process endpoint totals, merged into the shared cache periodically."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def add(self, endpoint, record):
+        sample = {
+            "requests": 1,
+            "total_ms": record["total_ms"],
+            "max_ms": record["total_ms"],
+            "db_ms": record["db_ms"],
+            "queries": record["queries"],
+            "max_queries": record["queries"],
+            "bytes": record["response_bytes"] or 0,
+            "slowest_query_ms": record["slowest_query_ms"],
+            "slowest_query": record["slowest_query"],
+        }
+        with self.lock:
+            merge_stats(self.pending.setdefault(endpoint, _empty_stats()), sample)
+            due = time.monotonic() - self.last_flush >= settings.QUERY_PROFILING_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        # One process merges at a time; the others keep accumulating.
+        if not cache.add(FLUSH_LOCK_KEY, True, 10):
+            return
+        try:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self.last_flush = time.monotonic()
+            shared = cache.get(STATS_CACHE_KEY) or {}
+            for endpoint, stats in pending.items():
+                merge_stats(shared.setdefault(endpoint, _empty_stats()), stats)
+            cache.set(STATS_CACHE_KEY, shared, STATS_TTL)
+        finally:
+            cache.delete(FLUSH_LOCK_KEY)
+
+    def snapshot(self):
+        """Shared totals plus this process's unflushed ones."""
+        shared = cache.get(STATS_CACHE_KEY) or {}
+        with self.lock:
+            for endpoint, stats in self.pending.items():
+                merge_stats(shared.setdefault(endpoint, _empty_stats()), dict(stats))
+        return shared
+
+    def reset(self):
+        with self.lock:
+            self.pending = {}
+        cache.delete(STATS_CACHE_KEY)
+
+
+endpoint_stats = EndpointStats()
+
+
+class LogRateLimiter:
+    """Allow at most `per_minute` log lines per process per minute."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.lock = threading.Lock()
+        self.window = 0
+        self.count = 0
+
+    def allow(self):
+        window = int(time.time() // 60)
+        with self.lock:
+            if window != self.window:
+                self.window, self.count = window, 0
+            if self.count >= self.per_minute:
+                return False
+            self.count += 1
+            return True
+
+
+class QueryProfilingMiddleware:
+    """
+    Sync and async capable, so async views (the payment status stream) are
+    not adapted to sync and do not hold a worker thread while they run.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limiter = LogRateLimiter(settings.QUERY_PROFILING_MAX_LOGS_PER_MINUTE)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.record(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        # Connections are per thread: the ORM calls of this request run on
+        # its sync thread, so the recorder is installed there
+        await sync_to_async(lambda: connection.execute_wrappers.append(recorder))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(recorder))()
+        # Stats flushes touch the cache; keep them off the event loop
+        return await sync_to_async(self.record)(request, response, recorder, started)
+
+    def record(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        if not match:
+            return response
+        endpoint = f"{request.method} {match.view_name or match.route}"
+        db_ms = recorder.total * 1000
+        record = {
+            "endpoint": endpoint,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(db_ms, 2),
+            "render_ms": round(max(total_ms - db_ms, 0), 2),
+            "total_ms": round(total_ms, 2),
+            "slowest_query_ms": round(recorder.slowest * 1000, 2),
+            "slowest_query": recorder.slowest_sql[:SQL_PREVIEW_LENGTH],
+            "response_bytes": None if response.streaming else len(response.content),
+        }
+        endpoint_stats.add(endpoint, record)
+
+        slow = total_ms >= settings.QUERY_PROFILING_SLOW_MS
+        if (slow or random.random() < settings.QUERY_PROFILING_SAMPLE_RATE) and self.limiter.allow():
+            logger.info(json.dumps(record))
+
+        response["X-Query-Count"] = str(recorder.count)
+        return response
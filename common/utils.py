@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.core.paginator import Paginator
-from notification.models import Notification, NotificationDeliveryLog
+from django.db import DatabaseError, transaction
+from notification.counters import notifications_created
+from notification.models import Notification, NotificationDeliveryLog, NotificationMessage
 
 # -------------------------
 # Generic helpers
@@ -55,6 +58,14 @@ def send_chama_notification(
     """
     Create Notification records for a list of users and a delivery log entry.
     Works for finance (contributions, loans, penalties) and dashboard (meetings, reminders).
+
+    The title and message are stored once, in a NotificationMessage that
+    every recipient's row points at. Rows are written with bulk_create in
+    chunks of NOTIFICATION_BATCH_SIZE inside one transaction, so each chunk
+    costs two INSERTs. If a chunk fails, its rows are retried one at a time
+    so a single bad recipient does not stop the others. Returns the created
+    notifications; recipients that could not be notified are in the result's
+    `failed` list.
     
     Args:
         chama: Chama instance
@@ -66,39 +77,81 @@ def send_chama_notification(
         priority: 'normal' or 'high'
         related_*: optional related objects (Contribution, Loan, Penalty, Meeting)
     """
-    created_notifications = []
-    for user in recipients:
-        try:
-            notif = Notification.objects.create(
-                notification_user=user,
-                notification_chama=chama,
-                notification_title=title,
-                notification_message=message,
-                notification_type=n_type,
-                notification_priority=priority,
-                notification_sender=sender
-            )
-            # Attach related objects if provided
-            if related_contribution:
-                notif.notification_related_contribution = related_contribution
-            if related_loan:
-                notif.notification_related_loan = related_loan
-            if related_penalty:
-                notif.notification_related_penalty = related_penalty
-            if related_meeting:
-                notif.notification_related_meeting = related_meeting
-            notif.save()
-
-            # Create a delivery log (in-app by default)
-            NotificationDeliveryLog.objects.create(
-                notification=notif,
-                member=user,
-                notification_status="sent",
-                delivery_method="inapp"
-            )
-            created_notifications.append(notif)
-        except Exception:
-            # Fail silently for individual users (you might want to log errors)
-            continue
-    return created_notifications
+    related = {
+        "notification_related_contribution": related_contribution,
+        "notification_related_loan": related_loan,
+        "notification_related_penalty": related_penalty,
+        "notification_related_meeting": related_meeting,
+    }
+    sent = SentNotifications()
+
+    def build(user):
+        return Notification(
+            notification_user=user,
+            notification_chama=chama,
+            notification_shared_message=shared,
+            notification_type=n_type,
+            notification_priority=priority,
+            notification_sender=sender,
+            **related
+        )
+
+    with transaction.atomic():
+        shared = NotificationMessage.objects.create(notification_message_title=title, notification_message_body=message)
+        for chunk in _chunks(recipients, settings.NOTIFICATION_BATCH_SIZE):
+            users = []
+            for user in chunk:
+                if getattr(user, "pk", None) is None:
+                    sent.failed.append((user, "Recipient is not a saved user"))
+                else:
+                    users.append(user)
+            try:
+                with transaction.atomic():
+                    sent.extend(_create_with_logs([build(user) for user in users]))
+            except DatabaseError:
+                # Isolate the rows that fail; the rest of the chunk is still sent
+                for user in users:
+                    try:
+                        with transaction.atomic():
+                            sent.extend(_create_with_logs([build(user)]))
+                    except DatabaseError as exc:
+                        sent.failed.append((user, str(exc)))
+
+    for user, error in sent.failed:
+        print(f"❌ Notification '{title}' not sent to {user}: {error}")
+    return sent
+
+
+class SentNotifications(list):
+    """The created notifications; `failed` holds (recipient, error) for each one that was not."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.failed = []
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
+def _create_with_logs(notifications):
+    """bulk_create the notifications and their in-app delivery logs; two inserts per chunk."""
+    created = Notification.objects.bulk_create(notifications)
+    NotificationDeliveryLog.objects.bulk_create([
+        NotificationDeliveryLog(
+            notification=notif,
+            member_id=notif.notification_user_id,
+            notification_status="sent",
+            delivery_method="inapp",
+        )
+        for notif in created
+    ])
+    notifications_created(created)
+    return created
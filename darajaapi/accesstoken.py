@@ -1,16 +1,111 @@
-import requests
+import threading
+import time
+
 from requests.auth import HTTPBasicAuth
 from django.conf import settings
+from django.core.cache import cache
+from darajaapi.client import daraja_request
 
-def access_token():
-    consumerKey = settings.MPESA_CONSUMER_KEY
-    consumerSecret = settings.MPESA_CONSUMER_SECRET
-    url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+TOKEN_CACHE_KEY = "darajaapi:access_token"
+REFRESH_LOCK_KEY = "darajaapi:access_token:refreshing"
+
+# Safaricom tokens live for 3599 seconds. We stop handing a token out
+# TOKEN_EXPIRY_MARGIN seconds before that, and start a background refresh
+# TOKEN_REFRESH_AHEAD seconds before that.
+TOKEN_EXPIRY_MARGIN = 60
+TOKEN_REFRESH_AHEAD = 300
+
+_lock = threading.Lock()
+_local = {"token": None, "expires_at": 0}
+_background_refresh = None
+
+
+def _fetch_token():
+    """Request a fresh OAuth token from Daraja. Returns (token, expires_at)."""
     headers = {"Content-Type": "application/json; charset=utf8"}
-    response = requests.get(
-        url,
+    response = daraja_request(
+        "GET",
+        "oauth",
         headers=headers,
-        auth=HTTPBasicAuth(consumerKey, consumerSecret)
+        auth=HTTPBasicAuth(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
     )
+    response.raise_for_status()
+    data = response.json()
+    expires_in = int(data.get("expires_in", 3599))
+    return data["access_token"], time.time() + expires_in
+
+
+def _store(token, expires_at):
+    """Keep the token in process memory and share it with other workers."""
+    _local["token"] = token
+    _local["expires_at"] = expires_at
+    ttl = int(expires_at - time.time() - TOKEN_EXPIRY_MARGIN)
+    if ttl > 0:
+        cache.set(TOKEN_CACHE_KEY, {"token": token, "expires_at": expires_at}, ttl)
+
+
+def _cached_entry():
+    """Return the freshest known (token, expires_at), checking memory first."""
+    if _local["token"] and _local["expires_at"] - TOKEN_EXPIRY_MARGIN > time.time():
+        return _local["token"], _local["expires_at"]
+
+    shared = cache.get(TOKEN_CACHE_KEY)
+    if shared and shared["expires_at"] - TOKEN_EXPIRY_MARGIN > time.time():
+        _local["token"] = shared["token"]
+        _local["expires_at"] = shared["expires_at"]
+        return shared["token"], shared["expires_at"]
+
+    return None, 0
+
+
+def refresh_access_token(force=False):
+    """
+    Fetch a new token, collapsing concurrent callers into a single request.
+
+    Threads that were waiting on the lock re-check the cache first, so only
+    the first one actually talks to Safaricom.
+    """
+    with _lock:
+        if not force:
+            token, expires_at = _cached_entry()
+            if token and expires_at - TOKEN_REFRESH_AHEAD > time.time():
+                return token
+        token, expires_at = _fetch_token()
+        _store(token, expires_at)
+        return token
+
+
+def _refresh_in_background():
+    global _background_refresh
+
+    # Only one worker process needs to refresh the shared token.
+    if not cache.add(REFRESH_LOCK_KEY, True, 30):
+        return
+    if _background_refresh and _background_refresh.is_alive():
+        return
+
+    def run():
+        try:
+            refresh_access_token()
+        except Exception as e:
+            print(f"Background token refresh failed: {str(e)}")
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+    _background_refresh = threading.Thread(target=run, name="daraja-token-refresh", daemon=True)
+    _background_refresh.start()
+
+
+def access_token():
+    """
+    Return a valid Daraja OAuth token.
 
-    return response.json()["access_token"]
+    Served from cache while valid; refreshed in the background once it gets
+    close to expiry, and synchronously only when no usable token is left.
+    """
+    token, expires_at = _cached_entry()
+    if token:
+        if expires_at - TOKEN_REFRESH_AHEAD <= time.time():
+            _refresh_in_background()
+        return token
+    return refresh_access_token()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from darajaapi.models import Transaction
+from darajaapi.models import Transaction, StkPushJob, CallbackInbox
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -56,3 +56,38 @@ class TransactionAdmin(admin.ModelAdmin):
             "fields": ("transaction_created_at", "transaction_updated_at")
         }),
     )
+
+
+@admin.register(StkPushJob)
+class StkPushJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "job_user",
+        "job_chama",
+        "job_amount",
+        "job_type",
+        "job_status",
+        "job_attempts",
+        "job_checkout_request_id",
+        "job_created_at",
+    )
+    list_filter = ("job_status", "job_type")
+    search_fields = ("job_checkout_request_id", "job_phone_number")
+    readonly_fields = ("job_created_at", "job_updated_at")
+    ordering = ("-job_created_at",)
+
+
+@admin.register(CallbackInbox)
+class CallbackInboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "inbox_checkout_request_id",
+        "inbox_status",
+        "inbox_attempts",
+        "inbox_received_at",
+        "inbox_processed_at",
+    )
+    list_filter = ("inbox_status",)
+    search_fields = ("inbox_checkout_request_id",)
+    readonly_fields = ("inbox_payload", "inbox_received_at", "inbox_processed_at")
+    ordering = ("-inbox_received_at",)
@@ -0,0 +1,196 @@
+"""
+Applying STK results to our ledger.
+
+`stk_callback` only stores the raw payload in CallbackInbox. The functions
+here drain that inbox in batches and apply each result once: a Transaction
+that is no longer pending is never updated again, so duplicate or replayed
+callbacks are harmless.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from darajaapi.events import publish_contribution_status
+from darajaapi.models import CallbackInbox, Transaction
+
+# Unknown CheckoutRequestIDs are retried this many times (the Transaction
+# row may not be committed yet) before the inbox row is marked failed,
+# waiting INBOX_RETRY_BACKOFF seconds after the first miss and doubling
+# after each one (5s, 10s, 20s, 40s).
+MAX_INBOX_ATTEMPTS = 5
+INBOX_RETRY_BACKOFF = 5
+
+
+def apply_stk_result(tx, result_code, metadata_items=None):
+    """
+    Set a pending Transaction's status (and receipt details) from a Daraja
+    ResultCode. Returns False when the transaction was already final.
+    """
+    if tx.transaction_status != "pending":
+        return False
+
+    if str(result_code) == "0":
+        tx.transaction_status = "success"
+        for item in metadata_items or []:
+            if item.get("Name") == "Amount":
+                tx.transaction_amount = item.get("Value")
+            elif item.get("Name") == "MpesaReceiptNumber":
+                tx.transaction_mpesa_receipt = item.get("Value")
+            elif item.get("Name") == "PhoneNumber":
+                tx.transaction_phone_number = item.get("Value")
+    elif str(result_code) == "1032":
+        tx.transaction_status = "cancelled"
+    else:
+        tx.transaction_status = "failed"
+    return True
+
+
+def _legacy_contribution(transaction):
+    """Contribution for transactions recorded before the explicit links existed."""
+    from finance.models import Contribution
+
+    if not transaction.transaction_checkout_request_id:
+        return None
+    return Contribution.objects.filter(
+        contribution_reference=transaction.transaction_checkout_request_id
+    ).first()
+
+
+def update_related_record(transaction):
+    """
+    Update the Contribution, Penalty or Loan this transaction settles.
+
+    The target is the record linked when the STK push was initiated, so each
+    lookup is a primary-key fetch. Safe to call more than once: receipts and
+    repayment references are unique, and a repayment is only credited once.
+    """
+    from finance import loans, rollups
+    from finance.models import Contribution, Penalty, LoanRepayment, Loan
+
+    new_status = transaction.transaction_status
+    amount = Decimal(str(transaction.transaction_amount or 0))
+
+    contrib_id = transaction.transaction_related_contribution_id
+    if contrib_id is None and transaction.transaction_type == "contribution":
+        legacy = _legacy_contribution(transaction)
+        contrib_id = legacy.id if legacy else None
+
+    if contrib_id:
+        # Contributions have no "cancelled" status; a cancelled push failed
+        contribution_status = "failed" if new_status == "cancelled" else new_status
+        fields = {"contribution_status": contribution_status, "contribution_updated_at": timezone.now()}
+        if new_status == "success":
+            fields["contribution_mpesa_receipt"] = transaction.transaction_mpesa_receipt
+            fields["contribution_reference"] = transaction.transaction_checkout_request_id
+        if Contribution.objects.filter(id=contrib_id).exclude(contribution_status="success").update(**fields):
+            publish_contribution_status(contrib_id, contribution_status)
+            if new_status == "success":
+                rollups.contribution_succeeded(contrib_id)
+            print(f"✅ Updated contribution {contrib_id} to {contribution_status}")
+
+    if new_status != "success":
+        return
+
+    if transaction.transaction_related_penalty_id:
+        updated = Penalty.objects.filter(
+            id=transaction.transaction_related_penalty_id,
+            penalty_paid=False
+        ).update(penalty_paid=True)
+        if updated:
+            rollups.penalty_paid(transaction.transaction_related_penalty_id)
+            print(f"✅ Marked penalty {transaction.transaction_related_penalty_id} as paid")
+
+    if transaction.transaction_related_loan_id:
+        reference = transaction.transaction_checkout_request_id
+        loan = Loan.objects.select_for_update().get(id=transaction.transaction_related_loan_id)
+        if LoanRepayment.objects.filter(loan_repayment_reference=reference).exists():
+            return
+        repayment = LoanRepayment.objects.create(
+            loan_repayment_loan=loan,
+            loan_repayment_user=transaction.transaction_user,
+            loan_repayment_amount=amount,
+            loan_repayment_mpesa_receipt=transaction.transaction_mpesa_receipt,
+            loan_repayment_reference=reference
+        )
+        loan.loan_outstanding_balance -= amount
+        if loan.loan_outstanding_balance <= 0:
+            loan.loan_status = "completed"
+        loan.save()
+        loans.allocate_repayment(loan, amount)
+        loans.refresh_loans(Loan.objects.filter(id=loan.id))
+        print(f"✅ Created loan repayment {repayment.id}, updated loan {loan.id}")
+
+    if transaction.transaction_type == "registration_fee":
+        print(f"✅ Registration fee payment recorded: {transaction.transaction_mpesa_receipt}")
+
+
+def process_inbox_entry(entry):
+    """
+    Apply one stored callback. Must be called inside transaction.atomic().
+    Returns False when the entry was left pending for another attempt.
+    """
+    stk_data = entry.inbox_payload.get("Body", {}).get("stkCallback", {})
+    checkout_request_id = stk_data.get("CheckoutRequestID")
+
+    tx = (
+        Transaction.objects.select_for_update()
+        .filter(transaction_checkout_request_id=checkout_request_id)
+        .first()
+    )
+    if not tx:
+        entry.inbox_attempts += 1
+        entry.inbox_error = f"No transaction for CheckoutRequestID {checkout_request_id}"
+        if entry.inbox_attempts >= MAX_INBOX_ATTEMPTS:
+            entry.inbox_status = "failed"
+            entry.inbox_next_attempt_at = None
+        else:
+            backoff = INBOX_RETRY_BACKOFF * 2 ** (entry.inbox_attempts - 1)
+            entry.inbox_next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+        entry.save(update_fields=["inbox_attempts", "inbox_error", "inbox_status", "inbox_next_attempt_at"])
+        return entry.inbox_status == "failed"
+
+    metadata = stk_data.get("CallbackMetadata", {}).get("Item", [])
+    if apply_stk_result(tx, stk_data.get("ResultCode"), metadata):
+        tx.save()
+        update_related_record(tx)
+
+    entry.inbox_status = "processed"
+    entry.inbox_attempts += 1
+    entry.inbox_error = ""
+    entry.inbox_processed_at = timezone.now()
+    entry.save(update_fields=["inbox_status", "inbox_attempts", "inbox_error", "inbox_processed_at"])
+    return True
+
+
+def process_callback_inbox(batch_size=100):
+    """
+    Drain up to batch_size due pending callbacks, oldest first. Entries
+    waiting out a retry backoff are skipped. Each entry is applied in its
+    own savepoint so one bad payload cannot block the rest. Returns the
+    number of entries that left the pending state.
+    """
+    due = Q(inbox_next_attempt_at__isnull=True) | Q(inbox_next_attempt_at__lte=timezone.now())
+    with transaction.atomic():
+        entries = list(
+            CallbackInbox.objects.select_for_update(skip_locked=True)
+            .filter(due, inbox_status="pending")
+            .order_by("inbox_received_at")[:batch_size]
+        )
+        handled = 0
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    if process_inbox_entry(entry):
+                        handled += 1
+            except Exception as e:
+                print(f"❌ Error processing callback {entry.id}: {str(e)}")
+                CallbackInbox.objects.filter(id=entry.id).update(
+                    inbox_status="failed",
+                    inbox_attempts=entry.inbox_attempts + 1,
+                    inbox_error=str(e),
+                )
+                handled += 1
+    return handled
@@ -0,0 +1,103 @@
+"""
+Shared HTTP client for all Daraja (M-Pesa) traffic.
+
+Every call goes through one pooled requests.Session so TCP/TLS connections
+to Safaricom are kept alive and reused between payments. Connection errors
+are retried with exponential backoff; read timeouts are not, since an STK
+push that reached Safaricom must never be sent twice.
+"""
+import base64
+import threading
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+ENDPOINTS = {
+    "oauth": "/oauth/v1/generate?grant_type=client_credentials",
+    "stk_push": "/mpesa/stkpush/v1/processrequest",
+    "stk_query": "/mpesa/stkpushquery/v1/query",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=settings.MPESA_HTTP_RETRIES,
+        connect=settings.MPESA_HTTP_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=settings.MPESA_HTTP_BACKOFF,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.MPESA_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.MPESA_HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide Daraja session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def endpoint_url(endpoint):
+    return f"{settings.MPESA_BASE_URL.rstrip('/')}{ENDPOINTS[endpoint]}"
+
+
+def endpoint_timeout(endpoint):
+    """(connect, read) timeout for an endpoint, from MPESA_HTTP_TIMEOUTS."""
+    read_timeout = settings.MPESA_HTTP_TIMEOUTS.get(endpoint, 30)
+    return (settings.MPESA_HTTP_CONNECT_TIMEOUT, read_timeout)
+
+
+def daraja_request(method, endpoint, **kwargs):
+    kwargs.setdefault("timeout", endpoint_timeout(endpoint))
+    return get_session().request(method, endpoint_url(endpoint), **kwargs)
+
+
+def authorized_post(endpoint, payload):
+    """POST a JSON payload with a bearer token and return the decoded body."""
+    from darajaapi.accesstoken import access_token
+
+    headers = {
+        "Authorization": f"Bearer {access_token()}",
+        "Content-Type": "application/json",
+    }
+    response = daraja_request("POST", endpoint, json=payload, headers=headers)
+    return response.json()
+
+
+def stk_password(timestamp=None):
+    """Return (password, timestamp) for STK push and STK query payloads."""
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d%H%M%S")
+    password = base64.b64encode(
+        f"{settings.MPESA_SHORTCODE}{settings.MPESA_PASSKEY}{timestamp}".encode()
+    ).decode()
+    return password, timestamp
+
+
+def stk_query(checkout_request_id):
+    """Ask Daraja for the current state of an STK push."""
+    password, timestamp = stk_password()
+    payload = {
+        "BusinessShortCode": settings.MPESA_SHORTCODE,
+        "Password": password,
+        "Timestamp": timestamp,
+        "CheckoutRequestID": checkout_request_id,
+    }
+    return authorized_post("stk_query", payload)
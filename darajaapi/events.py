@@ -0,0 +1,29 @@
+"""
+Payment status notifications for open status streams.
+
+When a Contribution leaves 'pending', the callback processor (or the
+reconciliation sweeper) publishes the new status to the shared cache once
+the change is committed. Status streams wait on that key instead of
+polling the database or Daraja.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+STATUS_KEY = "darajaapi:contribution_status:{}"
+STATUS_TTL = 15 * 60
+
+
+def contribution_status_key(contribution_id):
+    return STATUS_KEY.format(contribution_id)
+
+
+def publish_contribution_status(contribution_id, status):
+    """Announce a final contribution status after the current transaction commits."""
+    transaction.on_commit(
+        lambda: cache.set(contribution_status_key(contribution_id), status, STATUS_TTL)
+    )
+
+
+async def apublished_contribution_status(contribution_id):
+    """The last published status for a contribution, or None."""
+    return await cache.aget(contribution_status_key(contribution_id))
@@ -0,0 +1,125 @@
+"""
+Database-backed queue for STK push initiation.
+
+Views call enqueue_stk_push() and return straight away; the
+`run_stk_worker` management command claims queued jobs and performs the
+slow Daraja round trip outside the request cycle.
+
+Claimed jobs are leased. A job still 'running' when its lease runs out
+belonged to a worker that died, and is claimed again, up to
+MAX_JOB_ATTEMPTS times; after that it is failed. A retried job may send
+the customer a second prompt if the first push reached Daraja just
+before the crash.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from darajaapi.events import publish_contribution_status
+from darajaapi.models import StkPushJob
+from darajaapi.stk_push import initiate_stk_push
+
+LEASE = timedelta(minutes=5)
+MAX_JOB_ATTEMPTS = 3
+
+
+def enqueue_stk_push(user, chama, phone, amount, tx_type, contribution=None, loan=None, penalty=None):
+    """Queue an STK push and return the job. contribution/loan/penalty is the record it settles."""
+    return StkPushJob.objects.create(
+        job_user=user,
+        job_chama=chama,
+        job_contribution=contribution,
+        job_loan=loan,
+        job_penalty=penalty,
+        job_phone_number=phone,
+        job_amount=amount,
+        job_type=tx_type,
+    )
+
+
+def claim_jobs(batch_size=10):
+    """
+    Atomically lease up to batch_size jobs: queued ones, and running ones
+    whose lease expired. SKIP LOCKED lets several workers drain the queue
+    side by side.
+    """
+    now = timezone.now()
+    expired = Q(job_status="running", job_lease_expires_at__lt=now)
+    with transaction.atomic():
+        _fail_abandoned(expired)
+        ids = list(
+            StkPushJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(job_status="queued") | expired)
+            .order_by("job_created_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        StkPushJob.objects.filter(id__in=ids).update(
+            job_status="running",
+            job_attempts=F("job_attempts") + 1,
+            job_lease_expires_at=now + LEASE,
+        )
+    return list(
+        StkPushJob.objects.filter(id__in=ids)
+        .select_related("job_user", "job_chama", "job_contribution", "job_loan", "job_penalty")
+        .order_by("job_created_at")
+    )
+
+
+def _fail_abandoned(expired):
+    """Fail expired jobs that already used all their attempts."""
+    abandoned = list(
+        StkPushJob.objects.select_for_update(skip_locked=True)
+        .filter(expired, job_attempts__gte=MAX_JOB_ATTEMPTS)
+        .select_related("job_contribution")
+    )
+    for job in abandoned:
+        job.job_status = "failed"
+        job.job_message = "The worker stopped before the STK push finished."
+        job.job_lease_expires_at = None
+        job.save(update_fields=["job_status", "job_message", "job_lease_expires_at", "job_updated_at"])
+        contrib = job.job_contribution
+        if contrib and contrib.contribution_status == "pending":
+            contrib.contribution_status = "failed"
+            contrib.save(update_fields=["contribution_status", "contribution_updated_at"])
+            publish_contribution_status(contrib.id, "failed")
+        print(f"❌ STK job {job.id} abandoned after {job.job_attempts} attempt(s)")
+
+
+def run_job(job):
+    """Send the STK push for a claimed job and record the outcome."""
+    result = initiate_stk_push(
+        job.job_user,
+        job.job_chama,
+        job.job_phone_number,
+        job.job_amount,
+        job.job_type,
+        related_contribution=job.job_contribution,
+        related_loan=job.job_loan,
+        related_penalty=job.job_penalty,
+    )
+    contrib = job.job_contribution
+
+    if result.get("success"):
+        job.job_status = "sent"
+        job.job_checkout_request_id = result.get("CheckoutRequestID")
+        job.job_message = str(result.get("CustomerMessage", ""))[:255]
+        if contrib:
+            contrib.contribution_reference = job.job_checkout_request_id
+            contrib.save(update_fields=["contribution_reference", "contribution_updated_at"])
+    else:
+        job.job_status = "failed"
+        job.job_message = str(result.get("errorMessage", "Payment initiation failed."))[:255]
+        if contrib:
+            contrib.contribution_status = "failed"
+            contrib.save(update_fields=["contribution_status", "contribution_updated_at"])
+            publish_contribution_status(contrib.id, "failed")
+
+    job.job_lease_expires_at = None
+    job.save(update_fields=[
+        "job_status", "job_checkout_request_id", "job_message", "job_lease_expires_at", "job_updated_at"
+    ])
+    return job
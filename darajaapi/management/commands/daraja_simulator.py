@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from darajaapi.simulator import SimulatorConfig, build_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local Daraja stand-in (OAuth, STK push, STK query) with simulated "
+        "latency, errors and callbacks. Set MPESA_BASE_URL to its address."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every response.")
+        parser.add_argument("--jitter", type=float, default=0.1, help="Random +/- seconds on top of --latency.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+        parser.add_argument("--cancel-rate", type=float, default=0.1, help="Share of pushes the customer cancels (1032).")
+        parser.add_argument("--fail-rate", type=float, default=0.05, help="Share of pushes failing for insufficient funds.")
+        parser.add_argument("--callback-delay", type=float, default=2.0, help="Seconds before the callback is sent.")
+        parser.add_argument(
+            "--drop-callback-rate", type=float, default=0.0,
+            help="Share of callbacks never sent, to exercise reconciliation."
+        )
+        parser.add_argument("--callback-url", help="Send every callback here instead of the request's CallBackURL.")
+        parser.add_argument("--delivery-workers", type=int, default=8, help="Threads delivering callbacks.")
+        parser.add_argument("--seed", type=int, help="Seed for reproducible outcomes.")
+        parser.add_argument("--quiet", action="store_true", help="Do not log each request.")
+
+    def handle(self, *args, **options):
+        config = SimulatorConfig(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            cancel_rate=options["cancel_rate"],
+            fail_rate=options["fail_rate"],
+            callback_delay=options["callback_delay"],
+            drop_callback_rate=options["drop_callback_rate"],
+            callback_url=options["callback_url"],
+            delivery_workers=options["delivery_workers"],
+            seed=options["seed"],
+        )
+        server = build_server(options["host"], options["port"], config, quiet=options["quiet"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Daraja simulator listening on http://{options['host']}:{options['port']}")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            stats = {**server.simulator.stats, **server.simulator.dispatcher.stats}
+            self.stdout.write(", ".join(f"{k}={v}" for k, v in stats.items()))
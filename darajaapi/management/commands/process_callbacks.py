@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from darajaapi.callbacks import process_callback_inbox
+from darajaapi.models import CallbackInbox
+
+
+class Command(BaseCommand):
+    help = "Apply stored STK callbacks from CallbackInbox to transactions and ledger records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Callbacks applied per transaction.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the inbox is empty.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when drained.")
+        parser.add_argument(
+            "--replay-failed", action="store_true",
+            help="Move failed inbox rows back to pending before processing."
+        )
+
+    def handle(self, *args, **options):
+        if options["replay_failed"]:
+            replayed = CallbackInbox.objects.filter(inbox_status="failed").update(
+                inbox_status="pending", inbox_attempts=0, inbox_next_attempt_at=None
+            )
+            self.stdout.write(f"Re-queued {replayed} failed callback(s).")
+
+        total = 0
+        while True:
+            handled = process_callback_inbox(options["batch_size"])
+            total += handled
+            if handled:
+                continue
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Handled {total} callback(s)."))
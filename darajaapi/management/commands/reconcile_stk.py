@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from darajaapi.reconcile import reconcile_checkout_ids, stale_checkout_ids
+
+
+class Command(BaseCommand):
+    help = "Resolve stale pending STK payments by querying Daraja in one bounded sweep."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=2, help="Only rows pending for at least this many minutes.")
+        parser.add_argument("--limit", type=int, default=500, help="Maximum payments queried per sweep.")
+        parser.add_argument("--concurrency", type=int, default=5, help="Daraja queries in flight at once.")
+        parser.add_argument("--rate", type=float, default=5, help="Maximum Daraja queries per second.")
+        parser.add_argument("--every", type=int, default=0, help="Repeat the sweep every N seconds (0 = run once).")
+
+    def handle(self, *args, **options):
+        while True:
+            checkout_ids = stale_checkout_ids(options["older_than"], options["limit"])
+            queried, changed = reconcile_checkout_ids(
+                checkout_ids,
+                concurrency=options["concurrency"],
+                rate=options["rate"],
+            )
+            self.stdout.write(
+                f"{len(checkout_ids)} stale payment(s), {queried} answered by Daraja, {changed} updated."
+            )
+
+            if not options["every"]:
+                break
+            close_old_connections()
+            time.sleep(options["every"])
@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from darajaapi.jobs import claim_jobs, run_job
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Process queued STK push jobs (no external broker needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument("--concurrency", type=int, default=4, help="STK pushes sent in parallel.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        processed = 0
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            while True:
+                jobs = claim_jobs(batch_size)
+                if jobs:
+                    for job in pool.map(_run_in_thread, jobs):
+                        processed += 1
+                        self.stdout.write(f"Job {job.id}: {job.job_status} {job.job_message}")
+                    continue
+
+                if options["once"]:
+                    break
+                close_old_connections()
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} STK job(s)."))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('darajaapi', '0001_initial'),
+        ('finance', '0002_penalty_penalty_paid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StkPushJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_phone_number', models.CharField(max_length=15)),
+                ('job_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('job_type', models.CharField(choices=[('contribution', 'Contribution'), ('penalty', 'Penalty'), ('loan_repayment', 'Loan Repayment'), ('registration_fee', 'Registration Fee')], max_length=20)),
+                ('job_status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('job_attempts', models.PositiveSmallIntegerField(default=0)),
+                ('job_checkout_request_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('job_message', models.CharField(blank=True, default='', max_length=255)),
+                ('job_created_at', models.DateTimeField(auto_now_add=True)),
+                ('job_updated_at', models.DateTimeField(auto_now=True)),
+                ('job_chama', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stk_push_jobs', to='chama.chama')),
+                ('job_contribution', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stk_push_jobs', to='finance.contribution')),
+                ('job_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stk_push_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_status', 'job_created_at'], name='darajaapi_s_job_sta_20c434_idx')],
+            },
+        ),
+    ]
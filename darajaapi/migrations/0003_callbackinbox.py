@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('darajaapi', '0002_stkpushjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallbackInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inbox_checkout_request_id', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('inbox_payload', models.JSONField()),
+                ('inbox_status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('inbox_attempts', models.PositiveSmallIntegerField(default=0)),
+                ('inbox_error', models.TextField(blank=True, default='')),
+                ('inbox_received_at', models.DateTimeField(auto_now_add=True)),
+                ('inbox_processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['inbox_status', 'inbox_received_at'], name='darajaapi_c_inbox_s_6a1025_idx')],
+            },
+        ),
+    ]
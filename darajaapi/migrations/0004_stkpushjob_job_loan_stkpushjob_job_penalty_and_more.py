@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('darajaapi', '0003_callbackinbox'),
+        ('finance', '0002_penalty_penalty_paid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stkpushjob',
+            name='job_loan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stk_push_jobs', to='finance.loan'),
+        ),
+        migrations.AddField(
+            model_name='stkpushjob',
+            name='job_penalty',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stk_push_jobs', to='finance.penalty'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='transaction_related_contribution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='finance.contribution'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='transaction_related_loan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='finance.loan'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='transaction_related_penalty',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='finance.penalty'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_checkout_request_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
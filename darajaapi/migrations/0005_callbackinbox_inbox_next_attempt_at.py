@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('darajaapi', '0004_stkpushjob_job_loan_stkpushjob_job_penalty_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callbackinbox',
+            name='inbox_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('darajaapi', '0005_callbackinbox_inbox_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stkpushjob',
+            name='job_lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
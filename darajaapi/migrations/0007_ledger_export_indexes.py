@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('darajaapi', '0006_stkpushjob_job_lease_expires_at'),
+        ('finance', '0006_loan_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_updated_at', 'id'], name='darajaapi_t_transac_099ee2_idx'),
+        ),
+    ]
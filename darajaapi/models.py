@@ -1,7 +1,7 @@
 from django.db import models
 from django.conf import settings
 from chama.models import Chama
-from finance.models import CONTRIBUTION_TYPE_CHOICES
+from finance.models import Contribution, Loan, Penalty, CONTRIBUTION_TYPE_CHOICES
 
 TRANSACTION_STATUS_CHOICES = (
     ("pending", "Pending"),
@@ -26,7 +26,7 @@ class Transaction(models.Model):
     )
     transaction_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     transaction_phone_number = models.CharField(max_length=15, null=True, blank=True)
-    transaction_checkout_request_id = models.CharField(max_length=100, null=True, blank=True)
+    transaction_checkout_request_id = models.CharField(max_length=100, null=True, blank=True, unique=True)
     transaction_merchant_request_id = models.CharField(max_length=100, null=True, blank=True)
     transaction_mpesa_receipt = models.CharField(max_length=20, null=True, blank=True)
     transaction_internal_reference = models.CharField(max_length=50, null=True, blank=True)
@@ -43,13 +43,141 @@ class Transaction(models.Model):
     )
     transaction_created_at = models.DateTimeField(auto_now_add=True)
     transaction_updated_at = models.DateTimeField(auto_now=True)
+    # The record this payment settles, set when the STK push is initiated
+    transaction_related_contribution = models.ForeignKey(
+        Contribution,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions"
+    )
+    transaction_related_loan = models.ForeignKey(
+        Loan,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions"
+    )
+    transaction_related_penalty = models.ForeignKey(
+        Penalty,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions"
+    )
 
     class Meta:
         indexes = [
             models.Index(fields=["transaction_user", "transaction_status"]),
             models.Index(fields=["transaction_chama", "transaction_type"]),
             models.Index(fields=["transaction_internal_reference"]),  
+            # Keyset order of incremental ledger exports (finance.exports)
+            models.Index(fields=["transaction_updated_at", "id"]),
         ]
 
     def __str__(self):
         return f"{self.transaction_user} — {self.transaction_type} — {self.transaction_status}"
+
+
+STK_JOB_STATUS_CHOICES = (
+    ("queued", "Queued"),
+    ("running", "Running"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+)
+
+class StkPushJob(models.Model):
+    """
+    A queued STK push. Web requests enqueue these and return immediately;
+    `manage.py run_stk_worker` picks them up and talks to Daraja.
+    """
+    job_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="stk_push_jobs"
+    )
+    job_chama = models.ForeignKey(
+        Chama,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="stk_push_jobs"
+    )
+    job_contribution = models.ForeignKey(
+        Contribution,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stk_push_jobs"
+    )
+    job_loan = models.ForeignKey(
+        Loan,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stk_push_jobs"
+    )
+    job_penalty = models.ForeignKey(
+        Penalty,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stk_push_jobs"
+    )
+    job_phone_number = models.CharField(max_length=15)
+    job_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    job_type = models.CharField(max_length=20, choices=CONTRIBUTION_TYPE_CHOICES)
+    job_status = models.CharField(
+        max_length=20,
+        choices=STK_JOB_STATUS_CHOICES,
+        default="queued",
+        db_index=True
+    )
+    job_attempts = models.PositiveSmallIntegerField(default=0)
+    job_lease_expires_at = models.DateTimeField(null=True, blank=True)
+    job_checkout_request_id = models.CharField(max_length=100, null=True, blank=True)
+    job_message = models.CharField(max_length=255, blank=True, default="")
+    job_created_at = models.DateTimeField(auto_now_add=True)
+    job_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job_status", "job_created_at"]),
+        ]
+
+    def __str__(self):
+        return f"STK job {self.id} — {self.job_type} — {self.job_status}"
+
+
+CALLBACK_INBOX_STATUS_CHOICES = (
+    ("pending", "Pending"),
+    ("processed", "Processed"),
+    ("failed", "Failed"),
+)
+
+class CallbackInbox(models.Model):
+    """
+    Raw STK callbacks exactly as Daraja sent them. Rows are appended by
+    `stk_callback` and drained by `manage.py process_callbacks`; they are
+    never deleted, so a callback can be replayed after a fix.
+    """
+    inbox_checkout_request_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    inbox_payload = models.JSONField()
+    inbox_status = models.CharField(
+        max_length=20,
+        choices=CALLBACK_INBOX_STATUS_CHOICES,
+        default="pending"
+    )
+    inbox_attempts = models.PositiveSmallIntegerField(default=0)
+    inbox_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    inbox_error = models.TextField(blank=True, default="")
+    inbox_received_at = models.DateTimeField(auto_now_add=True)
+    inbox_processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["inbox_status", "inbox_received_at"]),
+        ]
+
+    def __str__(self):
+        return f"Callback {self.inbox_checkout_request_id} — {self.inbox_status}"
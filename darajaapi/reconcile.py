@@ -0,0 +1,150 @@
+"""
+Resolving pending STK pushes by asking Daraja directly.
+
+Used by the `reconcile_stk` sweeper (bounded, concurrent, rate limited) and
+by the on-demand query views. Results are written back through the same
+apply_stk_result / update_related_record path as callbacks.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from darajaapi.callbacks import apply_stk_result, update_related_record
+from darajaapi.client import stk_query
+from darajaapi.models import Transaction
+from dashboard.cache import bump_chama_cache_version
+from finance.models import Contribution
+
+
+class RateLimiter:
+    """Allow at most `rate` calls per second across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def stale_checkout_ids(older_than_minutes=2, limit=500):
+    """CheckoutRequestIDs of Transactions and Contributions still pending after the cutoff."""
+    cutoff = timezone.now() - timedelta(minutes=older_than_minutes)
+
+    tx_ids = Transaction.objects.filter(
+        transaction_status="pending",
+        transaction_created_at__lt=cutoff,
+        transaction_checkout_request_id__isnull=False,
+    ).order_by("transaction_created_at").values_list("transaction_checkout_request_id", flat=True)[:limit]
+
+    contrib_ids = Contribution.objects.filter(
+        contribution_status="pending",
+        contribution_created_at__lt=cutoff,
+        contribution_reference__isnull=False,
+    ).order_by("contribution_created_at").values_list("contribution_reference", flat=True)[:limit]
+
+    ids = list(dict.fromkeys(list(tx_ids) + list(contrib_ids)))
+    return [i for i in ids if i][:limit]
+
+
+def query_checkout_ids(checkout_ids, concurrency=5, rate=5):
+    """
+    Query Daraja for each CheckoutRequestID, at most `concurrency` at a time
+    and `rate` per second. Returns {checkout_id: response_dict}; ids whose
+    query failed are left out and picked up by the next sweep.
+    """
+    limiter = RateLimiter(rate)
+
+    def query(checkout_id):
+        limiter.wait()
+        try:
+            return checkout_id, stk_query(checkout_id)
+        except Exception as e:
+            print(f"Error querying Daraja for {checkout_id}: {str(e)}")
+            return checkout_id, None
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return {cid: data for cid, data in pool.map(query, checkout_ids) if data is not None}
+
+
+def apply_query_results(results):
+    """
+    Write STK query results back to the ledger in one database transaction.
+    Responses without a ResultCode (Daraja still processing) are skipped.
+    Returns the number of records that changed.
+    """
+    results = {cid: data for cid, data in results.items() if data.get("ResultCode") is not None}
+    if not results:
+        return 0
+
+    changed = 0
+    with transaction.atomic():
+        txs = list(
+            Transaction.objects.select_for_update()
+            .filter(transaction_checkout_request_id__in=results.keys())
+        )
+        updated = [
+            tx for tx in txs
+            if apply_stk_result(
+                tx,
+                results[tx.transaction_checkout_request_id]["ResultCode"],
+                results[tx.transaction_checkout_request_id].get("CallbackMetadata", {}).get("Item", []),
+            )
+        ]
+        if updated:
+            for tx in updated:
+                tx.transaction_updated_at = timezone.now()
+            Transaction.objects.bulk_update(
+                updated,
+                ["transaction_status", "transaction_amount", "transaction_mpesa_receipt",
+                 "transaction_phone_number", "transaction_updated_at"],
+            )
+            for tx in updated:
+                update_related_record(tx)
+                bump_chama_cache_version(tx.transaction_chama_id)
+        changed += len(updated)
+
+        # Contributions with no Transaction row of their own
+        known = {tx.transaction_checkout_request_id for tx in txs}
+        orphans = list(
+            Contribution.objects.select_for_update().filter(
+                contribution_reference__in=[cid for cid in results if cid not in known],
+                contribution_status="pending",
+            )
+        )
+        for contrib in orphans:
+            # Applied like a callback for an unsaved stand-in Transaction
+            data = results[contrib.contribution_reference]
+            stand_in = Transaction(
+                transaction_status="pending",
+                transaction_type="contribution",
+                transaction_amount=contrib.contribution_amount,
+                transaction_checkout_request_id=contrib.contribution_reference,
+                transaction_related_contribution=contrib,
+            )
+            apply_stk_result(stand_in, data["ResultCode"], data.get("CallbackMetadata", {}).get("Item", []))
+            update_related_record(stand_in)
+            bump_chama_cache_version(contrib.contribution_chama_id)
+        changed += len(orphans)
+
+    return changed
+
+
+def reconcile_checkout_ids(checkout_ids, concurrency=5, rate=5):
+    """Query and apply in one go. Returns (queried, changed)."""
+    results = query_checkout_ids(checkout_ids, concurrency=concurrency, rate=rate)
+    return len(results), apply_query_results(results)
@@ -0,0 +1,257 @@
+"""
+A local stand-in for the Daraja API, for load tests and benchmarks.
+
+Implements the OAuth, STK push (processrequest) and STK query endpoints
+with configurable latency and failure rates, and delivers the STK callback
+to the request's CallBackURL from a background thread, the way Safaricom
+does. Run it with `python manage.py daraja_simulator` and point
+MPESA_BASE_URL (and MPESA_CALLBACK_URL) at it.
+"""
+import heapq
+import json
+import random
+import secrets
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+RESULT_DESCRIPTIONS = {
+    0: "The service request is processed successfully.",
+    1: "The balance is insufficient for the transaction.",
+    1032: "Request cancelled by user.",
+}
+
+
+class SimulatorConfig:
+    def __init__(self, latency=0.2, jitter=0.1, error_rate=0.0, cancel_rate=0.1,
+                 fail_rate=0.05, callback_delay=2.0, drop_callback_rate=0.0,
+                 callback_url=None, delivery_workers=8, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.cancel_rate = cancel_rate
+        self.fail_rate = fail_rate
+        self.callback_delay = callback_delay
+        self.drop_callback_rate = drop_callback_rate
+        self.callback_url = callback_url
+        self.delivery_workers = delivery_workers
+        self.random = random.Random(seed)
+
+
+class CallbackDispatcher:
+    """Deliver callbacks once they are due, from a small pool of threads."""
+
+    def __init__(self, workers):
+        self.queue = []
+        self.cond = threading.Condition()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="daraja-sim-callback")
+        self.session = requests.Session()
+        self.stats = {"delivered": 0, "failed": 0}
+        self.stats_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="daraja-sim-dispatch", daemon=True)
+        self.thread.start()
+
+    def schedule(self, due, url, payload):
+        with self.cond:
+            heapq.heappush(self.queue, (due, secrets.token_hex(4), url, payload))
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue or self.queue[0][0] > time.monotonic():
+                    timeout = self.queue[0][0] - time.monotonic() if self.queue else None
+                    self.cond.wait(timeout)
+                _, _, url, payload = heapq.heappop(self.queue)
+            self.pool.submit(self._deliver, url, payload)
+
+    def _deliver(self, url, payload):
+        try:
+            self.session.post(url, json=payload, timeout=10).raise_for_status()
+            outcome = "delivered"
+        except requests.exceptions.RequestException as e:
+            outcome = "failed"
+            print(f"❌ Callback to {url} failed: {str(e)}")
+        with self.stats_lock:
+            self.stats[outcome] += 1
+
+
+class DarajaSimulator:
+    """In-memory state shared by all request handler threads."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.tokens = set()
+        self.pushes = {}
+        self.stats = {"oauth": 0, "stk_push": 0, "stk_query": 0, "errors": 0}
+        self.dispatcher = CallbackDispatcher(config.delivery_workers)
+
+    def delay(self):
+        """Sleep for the configured latency, plus or minus jitter."""
+        cfg = self.config
+        time.sleep(max(0.0, cfg.latency + cfg.random.uniform(-cfg.jitter, cfg.jitter)))
+
+    def should_error(self):
+        return self.config.random.random() < self.config.error_rate
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.tokens.add(token)
+            self.stats["oauth"] += 1
+        return {"access_token": token, "expires_in": "3599"}
+
+    def is_authorized(self, header):
+        token = (header or "").removeprefix("Bearer ").strip()
+        with self.lock:
+            return token in self.tokens
+
+    def pick_result_code(self):
+        roll = self.config.random.random()
+        if roll < self.config.cancel_rate:
+            return 1032
+        if roll < self.config.cancel_rate + self.config.fail_rate:
+            return 1
+        return 0
+
+    def stk_push(self, payload):
+        rng = self.config.random
+        merchant_id = f"{rng.randint(10000, 99999)}-{rng.randint(1000000, 9999999)}-1"
+        checkout_id = f"ws_CO_{datetime.now().strftime('%d%m%Y%H%M%S')}{secrets.token_hex(6)}"
+        result_code = self.pick_result_code()
+        due = time.monotonic() + self.config.callback_delay
+
+        with self.lock:
+            self.pushes[checkout_id] = {
+                "merchant_id": merchant_id,
+                "result_code": result_code,
+                "amount": payload.get("Amount"),
+                "phone": payload.get("PhoneNumber"),
+                "due": due,
+            }
+            self.stats["stk_push"] += 1
+
+        url = self.config.callback_url or payload.get("CallBackURL")
+        if url and self.config.random.random() >= self.config.drop_callback_rate:
+            self.dispatcher.schedule(due, url, self.callback_payload(checkout_id))
+
+        return {
+            "MerchantRequestID": merchant_id,
+            "CheckoutRequestID": checkout_id,
+            "ResponseCode": "0",
+            "ResponseDescription": "Success. Request accepted for processing",
+            "CustomerMessage": "Success. Request accepted for processing",
+        }
+
+    def callback_payload(self, checkout_id):
+        push = self.pushes[checkout_id]
+        result = {
+            "MerchantRequestID": push["merchant_id"],
+            "CheckoutRequestID": checkout_id,
+            "ResultCode": push["result_code"],
+            "ResultDesc": RESULT_DESCRIPTIONS[push["result_code"]],
+        }
+        if push["result_code"] == 0:
+            receipt = "".join(self.config.random.choices(string.ascii_uppercase + string.digits, k=10))
+            result["CallbackMetadata"] = {"Item": [
+                {"Name": "Amount", "Value": push["amount"]},
+                {"Name": "MpesaReceiptNumber", "Value": receipt},
+                {"Name": "TransactionDate", "Value": int(datetime.now().strftime("%Y%m%d%H%M%S"))},
+                {"Name": "PhoneNumber", "Value": int(push["phone"]) if str(push["phone"]).isdigit() else push["phone"]},
+            ]}
+        return {"Body": {"stkCallback": result}}
+
+    def stk_query(self, payload):
+        """Returns (http_status, body), mirroring Daraja's 'still processing' error."""
+        checkout_id = payload.get("CheckoutRequestID")
+        with self.lock:
+            self.stats["stk_query"] += 1
+            push = self.pushes.get(checkout_id)
+        if not push:
+            return 400, {"errorCode": "400.002.02", "errorMessage": "Bad Request - Invalid CheckoutRequestID"}
+        if push["due"] > time.monotonic():
+            return 500, {"errorCode": "500.001.1001", "errorMessage": "The transaction is being processed"}
+        return 200, {
+            "ResponseCode": "0",
+            "ResponseDescription": "The service request has been accepted successsfully",
+            "MerchantRequestID": push["merchant_id"],
+            "CheckoutRequestID": checkout_id,
+            "ResultCode": str(push["result_code"]),
+            "ResultDesc": RESULT_DESCRIPTIONS[push["result_code"]],
+        }
+
+
+class DarajaRequestHandler(BaseHTTPRequestHandler):
+    simulator = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return None
+
+    def simulated_error(self):
+        with self.simulator.lock:
+            self.simulator.stats["errors"] += 1
+        self.send_json(503, {"errorCode": "503.001.01", "errorMessage": "Service is currently unavailable"})
+
+    def do_GET(self):
+        if not self.path.startswith("/oauth/v1/generate"):
+            return self.send_json(404, {"errorMessage": "Not found"})
+        self.simulator.delay()
+        if self.simulator.should_error():
+            return self.simulated_error()
+        self.send_json(200, self.simulator.issue_token())
+
+    def do_POST(self):
+        routes = {
+            "/mpesa/stkpush/v1/processrequest": self.simulator.stk_push,
+            "/mpesa/stkpushquery/v1/query": self.simulator.stk_query,
+        }
+        handler = routes.get(self.path)
+        if not handler:
+            return self.send_json(404, {"errorMessage": "Not found"})
+
+        payload = self.read_json()
+        if payload is None:
+            return self.send_json(400, {"errorCode": "400.002.02", "errorMessage": "Bad Request - Invalid JSON"})
+        if not self.simulator.is_authorized(self.headers.get("Authorization")):
+            return self.send_json(401, {"errorCode": "404.001.04", "errorMessage": "Invalid Access Token"})
+
+        self.simulator.delay()
+        if self.simulator.should_error():
+            return self.simulated_error()
+
+        result = handler(payload)
+        status, body = result if isinstance(result, tuple) else (200, result)
+        self.send_json(status, body)
+
+
+def build_server(host, port, config, quiet=False):
+    """Return a ThreadingHTTPServer serving a fresh DarajaSimulator."""
+    simulator = DarajaSimulator(config)
+    handler = type("Handler", (DarajaRequestHandler,), {"simulator": simulator, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.simulator = simulator
+    return server
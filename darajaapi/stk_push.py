@@ -1,13 +1,20 @@
-import base64
 import uuid
-from datetime import datetime
 from decimal import Decimal
 import requests
 from django.conf import settings
 from darajaapi.models import Transaction
-from darajaapi.accesstoken import access_token
+from darajaapi.client import authorized_post, stk_password
 
-def initiate_stk_push(user, chama, phone: str, amount, tx_type: str):
+def initiate_stk_push(
+    user,
+    chama,
+    phone: str,
+    amount,
+    tx_type: str,
+    related_contribution=None,
+    related_loan=None,
+    related_penalty=None
+):
     """
     Initiate M-Pesa STK Push
     Args:
@@ -16,6 +23,7 @@ def initiate_stk_push(user, chama, phone: str, amount, tx_type: str):
         phone: Phone number (string)
         amount: Amount (Decimal or int)
         tx_type: Transaction type (string)
+        related_*: optional record this payment settles (Contribution, Loan, Penalty)
     """
     try:
         # Convert Decimal/float to int (M-Pesa only accepts integers)
@@ -32,13 +40,9 @@ def initiate_stk_push(user, chama, phone: str, amount, tx_type: str):
         elif not phone.startswith('254'):
             phone = '254' + phone
         
-        processrequest_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        callback_url = "https://vacuous-elva-appauma.ngrok-free.dev/api/mpesa/stk/callback/"
+        callback_url = settings.MPESA_CALLBACK_URL
         
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        password = base64.b64encode(
-            f"{settings.MPESA_SHORTCODE}{settings.MPESA_PASSKEY}{timestamp}".encode()
-        ).decode()
+        password, timestamp = stk_password()
         
         # Generate internal reference
         internal_ref = str(uuid.uuid4())[:12]  # M-Pesa AccountReference max 12 chars
@@ -57,13 +61,7 @@ def initiate_stk_push(user, chama, phone: str, amount, tx_type: str):
             "TransactionDesc": f"{tx_type[:17]} pmt"  # Max 20 chars for M-Pesa
         }
         
-        headers = {
-            "Authorization": f"Bearer {access_token()}",
-            "Content-Type": "application/json",
-        }
-        
-        response = requests.post(processrequest_url, json=payload, headers=headers, timeout=30)
-        response_data = response.json()
+        response_data = authorized_post("stk_push", payload)
         
         # Check if request was successful
         if response_data.get("ResponseCode") == "0":
@@ -78,6 +76,9 @@ def initiate_stk_push(user, chama, phone: str, amount, tx_type: str):
                 transaction_merchant_request_id=response_data.get("MerchantRequestID"),
                 transaction_checkout_request_id=response_data.get("CheckoutRequestID"),
                 transaction_internal_reference=internal_ref,
+                transaction_related_contribution=related_contribution,
+                transaction_related_loan=related_loan,
+                transaction_related_penalty=related_penalty,
             )
             
             return {
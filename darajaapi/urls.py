@@ -5,6 +5,7 @@ app_name = 'darajaapi'
 
 urlpatterns = [
     path('initiate/<int:chama_id>/', views.initiate_payment, name='initiate_payment'),
+    path('jobs/<int:job_id>/', views.stk_job_status, name='stk_job_status'),
     path('stk/callback/', views.stk_callback, name='stk_callback'),
     path('my-transactions/', views.my_transactions, name='my_transaction'),
 ]
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Chama activity feed: contributions, loans, penalties and accepted join
+requests merged by a single UNION ALL query, newest first.
+
+Pages are keyset-paginated on (timestamp, kind, id), so fetching an older
+page costs the same as the first one however far back an admin scrolls.
+The cursor returned with each page is passed back as `before`.
+"""
+import base64
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import DecimalField, F, IntegerField, Q, Value
+from django.db.models.functions import Cast, Coalesce
+
+from chama.models import JoinRequest
+from finance.models import Contribution, Loan, Penalty
+
+CONTRIBUTION, LOAN, PENALTY, JOIN = 1, 2, 3, 4
+
+KINDS = {
+    CONTRIBUTION: {"type": "contribution", "icon": "fa-coins", "color": "success"},
+    LOAN: {"type": "loan", "icon": "fa-hand-holding-usd", "color": "warning"},
+    PENALTY: {"type": "penalty", "icon": "fa-exclamation-triangle", "color": "danger"},
+    JOIN: {"type": "join", "icon": "fa-user-plus", "color": "info"},
+}
+
+AMOUNT = DecimalField(max_digits=14, decimal_places=2)
+COLUMNS = ("kind", "ts", "row_id", "first_name", "last_name", "amount")
+
+
+def _rows(queryset, kind, ts, first_name, last_name, amount):
+    """One branch of the UNION, with the same columns in the same order."""
+    return queryset.annotate(
+        kind=Value(kind, output_field=IntegerField()),
+        ts=F(ts) if isinstance(ts, str) else ts,
+        row_id=F("id"),
+        first_name=F(first_name),
+        last_name=F(last_name),
+        amount=Cast(amount, AMOUNT) if amount else Value(None, output_field=AMOUNT),
+    ).values(*COLUMNS)
+
+
+def _before(kind, cursor):
+    """Rows of `kind` that sort after the cursor in (ts, kind, id) descending order."""
+    if cursor is None:
+        return Q()
+    ts, cursor_kind, cursor_id = cursor
+    if kind < cursor_kind:
+        return Q(ts__lte=ts)
+    if kind == cursor_kind:
+        return Q(ts__lt=ts) | Q(ts=ts, id__lt=cursor_id)
+    return Q(ts__lt=ts)
+
+
+def encode_cursor(activity):
+    raw = f"{activity['timestamp'].isoformat()}|{activity['kind']}|{activity['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    """(timestamp, kind, id) from encode_cursor's output; ValueError if malformed."""
+    try:
+        ts, kind, row_id = base64.urlsafe_b64decode(value.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(kind), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {value}") from exc
+
+
+def _describe(row):
+    name = f"{row['first_name']} {row['last_name']}".strip()
+    amount = row["amount"]
+    if row["kind"] == CONTRIBUTION:
+        return f"{name} contributed Ksh {amount}"
+    if row["kind"] == LOAN:
+        return f"{name} took a loan of Ksh {amount}"
+    if row["kind"] == PENALTY:
+        return f"{name} received a penalty of Ksh {amount}"
+    return f"{name} joined the chama"
+
+
+def activity_feed(chama, limit=20, before=None):
+    """
+    Return (activities, next_cursor) for one page of the chama's feed.
+    `before` is a cursor from a previous page; next_cursor is None on the
+    last page.
+    """
+    cursor = decode_cursor(before) if before else None
+
+    branches = [
+        _rows(
+            Contribution.objects.filter(contribution_chama=chama, contribution_status="success"),
+            CONTRIBUTION, "contribution_created_at",
+            "contribution_user__user_first_name", "contribution_user__user_last_name", "contribution_amount",
+        ),
+        _rows(
+            Loan.objects.filter(loan_chama=chama),
+            LOAN, "loan_created_at",
+            "loan_user__user_first_name", "loan_user__user_last_name", "loan_amount",
+        ),
+        _rows(
+            Penalty.objects.filter(penalty_chama=chama),
+            PENALTY, "penalty_created_at",
+            "penalty_user__user_first_name", "penalty_user__user_last_name", "penalty_amount",
+        ),
+        _rows(
+            JoinRequest.objects.filter(join_request_chama=chama, join_request_status="accepted"),
+            JOIN, Coalesce("join_request_reviewed_at", "join_request_requested_at"),
+            "join_request_user__user_first_name", "join_request_user__user_last_name", None,
+        ),
+    ]
+    branches = [qs.filter(_before(kind, cursor)) for kind, qs in zip(KINDS, branches)]
+
+    if connection.features.supports_slicing_ordering_in_compound:
+        # Each branch only needs its own newest `limit + 1` rows
+        branches = [qs.order_by("-ts", "-row_id")[:limit + 1] for qs in branches]
+    rows = list(
+        branches[0].union(*branches[1:], all=True)
+        .order_by("-ts", "-kind", "-row_id")[:limit + 1]
+    )
+
+    activities = [
+        {
+            **KINDS[row["kind"]],
+            "kind": row["kind"],
+            "id": row["row_id"],
+            "description": _describe(row),
+            "timestamp": row["ts"],
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(activities[-1]) if len(rows) > limit else None
+    return activities, next_cursor
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Register your models here.
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("report_job_chama", "report_job_type", "report_job_version", "report_job_status", "report_job_rows", "report_job_attempts", "report_job_created_at", "report_job_finished_at")
+    search_fields = ("report_job_chama__chama_name",)
+    list_filter = ("report_job_type", "report_job_status")
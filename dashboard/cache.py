@@ -0,0 +1,113 @@
+"""
+Versioned cache for dashboard contexts.
+
+Each chama has a version number, stored in the ChamaCacheVersion table so
+that every process (web, STK worker, callback and reconcile commands) reads
+and bumps the same value whatever cache backend is configured. Writes to
+anything a dashboard shows (payments, loans, penalties, cycles,
+memberships, join requests, meetings) bump it once the transaction
+commits, and every cached context is keyed by that version, so stale
+entries are simply never read again and expire on their own.
+
+DASHBOARD_CACHE_TIMEOUT bounds how long an entry lives; it also covers
+figures that change with the clock (today's STK summary, overdue cycles).
+Set it to 0 to turn the cache off.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dashboard.models import ChamaCacheVersion
+
+CONTEXT_KEY = "dashboard:{role}:{chama_id}:{user_id}:{variant}:v{version}:{day}"
+CHAMA_DATA_KEY = "chama:{name}:{chama_id}:{variant}:v{version}"
+
+
+def _start_version(chama_id):
+    """
+    Create the chama's version row. A clock-based start can never collide
+    with a version already used by cache entries written earlier.
+    """
+    try:
+        with transaction.atomic():
+            ChamaCacheVersion.objects.create(
+                cache_version_chama_id=chama_id, cache_version_number=int(time.time() * 1000)
+            )
+    except IntegrityError:
+        pass  # Created concurrently, or the chama was just deleted
+
+
+def chama_cache_version(chama_id):
+    """Current version for a chama (one primary-key lookup)."""
+    versions = ChamaCacheVersion.objects.filter(cache_version_chama_id=chama_id)
+    version = versions.values_list("cache_version_number", flat=True).first()
+    if version is None:
+        _start_version(chama_id)
+        version = versions.values_list("cache_version_number", flat=True).first()
+    return version
+
+
+def bump_chama_cache_version(chama_id):
+    """Invalidate every cached dashboard of a chama once the current transaction commits."""
+    if not chama_id:
+        return
+
+    def bump():
+        updated = ChamaCacheVersion.objects.filter(cache_version_chama_id=chama_id).update(
+            cache_version_number=F("cache_version_number") + 1, cache_version_updated_at=timezone.now()
+        )
+        if not updated:
+            _start_version(chama_id)
+
+    transaction.on_commit(bump)
+
+
+def cached_dashboard_context(role, chama, user, build, variant=""):
+    """
+    Return build()'s context for this role, chama and user, from the cache
+    when the chama has not changed since it was stored. `variant` separates
+    filtered views (e.g. the treasurer's month filter).
+    """
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+
+    key = CONTEXT_KEY.format(
+        role=role,
+        chama_id=chama.id,
+        user_id=user.id,
+        variant=variant or "",
+        version=chama_cache_version(chama.id),
+        day=timezone.localdate().isoformat(),
+    )
+    context = cache.get(key)
+    if context is None:
+        context = build()
+        cache.set(key, context, timeout)
+    return context
+
+
+def cached_chama_data(name, chama_id, build, variant=""):
+    """
+    Like cached_dashboard_context() for data that is the same for every
+    member of the chama and does not change with the date.
+    """
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+
+    key = CHAMA_DATA_KEY.format(
+        name=name,
+        chama_id=chama_id,
+        variant=variant or "",
+        version=chama_cache_version(chama_id),
+    )
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
@@ -1,4 +1,3 @@
-import csv
 import json
 from datetime import timedelta
 from django.utils import timezone
@@ -6,31 +5,44 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.http import HttpResponse, HttpResponseForbidden
-from django.db.models import Sum, Count, Q
+from django.http import FileResponse, HttpResponseForbidden, JsonResponse
+from django.db.models import Sum, Q
 from django.db.models.functions import TruncMonth
 from user.models import User
 from chama.models import Membership, Chama, JoinRequest
+from notification.counters import unread_count
 from notification.models import NotificationReply, Notification, Meeting, MeetingAttendance
-from finance.models import Contribution, LoanRepayment, Loan, ContributionCycle, Penalty
-from darajaapi.models import Transaction
+from finance.cycles import apply_member_balance
+from finance.loans import repayment_progress
+from finance.models import Contribution, Loan, Penalty
 from chama.utils import get_user_dashboard_redirect
+from common.utils import send_chama_notification
+from dashboard.activity import activity_feed
+from dashboard.cache import cached_dashboard_context
+from dashboard.metrics import ChamaMetrics
+from dashboard.report_views import members_report_rows, stream_csv, transactions_report_rows
+from dashboard.models import ReportJob
+from dashboard.reports import can_request, report_filename, request_report as queue_report
 
-# --- NEW HELPER FUNCTION for Notifications ---
+# --- HELPER FUNCTION for Notifications ---
 def get_notification_context(user, active_chama):
-    """Fetches unread count and latest 5 unread notifications for the active chama."""
+    """Unread count (from the user's counter) and latest 5 unread notifications for the active chama."""
     if not active_chama:
         return {"unread_count": 0, "latest_notifications": []}
 
-    qs = Notification.objects.filter(
-        notification_user=user,
-        notification_chama=active_chama,
-        notification_is_read=False
-    ).order_by('-notification_created_at')
-    
+    count = unread_count(user, active_chama)
+    latest = []
+    if count:
+        latest = list(
+            Notification.objects.filter(
+                notification_user=user,
+                notification_chama=active_chama,
+                notification_is_read=False
+            ).select_related('notification_shared_message').order_by('-notification_created_at')[:5]
+        )
     return {
-        "unread_count": qs.count(),
-        "latest_notifications": qs[:5],
+        "unread_count": count,
+        "latest_notifications": latest,
     }
 # ---------------------------------------------
 
@@ -187,21 +199,36 @@ def member_dashboard(request, chama_id=None):
         membership_status="active"
     ).select_related("membership_chama")
 
+    context = {
+        "active_chama": active_chama,
+        "active_role": active_role,
+        "chama_with_roles": memberships, # Added for Switch Roles
+    }
+    context.update(cached_dashboard_context(
+        "member", active_chama, request.user,
+        lambda: member_dashboard_data(active_chama, request.user),
+    ))
+    context.update(get_notification_context(request.user, active_chama))
+    return render(request, "dashboard/member_dashboard.html", context)
+
+
+def member_dashboard_data(active_chama, user):
+    """Cards, widgets and chart data of the member dashboard (cached per version)."""
     # 3. --- CARDS DATA ---
+    metrics = ChamaMetrics(active_chama, user=user)
 
     # A. Contribution Status (Current Cycle)
-    current_cycle = ContributionCycle.objects.filter(cycle_chama=active_chama, cycle_status='open').first()
+    current_cycle = metrics.open_cycle
     contrib_status = "No Active Cycle"
     contrib_color = "secondary"
     
     if current_cycle:
-        has_paid = Contribution.objects.filter(
-            contribution_user=request.user,
-            contribution_cycle=current_cycle,
-            contribution_chama=active_chama
-        ).exists()
-        
-        if has_paid:
+        # Same share/balance rule as the cycle list (finance.cycles)
+        apply_member_balance(
+            current_cycle, metrics.contributions["user_cycle_paid"], metrics.members["active"]
+        )
+
+        if current_cycle.is_fully_paid:
             contrib_status = "Paid"
             contrib_color = "success"
         elif timezone.now().date() > current_cycle.cycle_deadline:
@@ -213,35 +240,20 @@ def member_dashboard(request, chama_id=None):
 
     # B. My Loans (Active Loan & Progress)
     active_loan = Loan.objects.filter(
-        loan_user=request.user, 
+        loan_user=user, 
         loan_chama=active_chama, 
         loan_status='active'
     ).first()
     
-    loan_progress = 0
-    if active_loan and active_loan.loan_amount > 0:
-        # Calculate percentage paid
-        amount_paid = active_loan.loan_amount - active_loan.loan_outstanding_balance
-        loan_progress = (amount_paid / active_loan.loan_amount) * 100
+    loan_progress = repayment_progress(active_loan)
 
     # C. My Penalties (Aggregated)
-    penalties_data = Penalty.objects.filter(
-        penalty_user=request.user,
-        penalty_chama=active_chama,
-        penalty_paid=False
-    ).aggregate(
-        count=Count('id'), 
-        total=Sum('penalty_amount')
-    )
-    total_penalty_amount = penalties_data['total'] or 0
-    total_penalty_count = penalties_data['count'] or 0
+    total_penalty_amount = metrics.penalty_breakdown["user_unpaid_amount"]
+    total_penalty_count = metrics.penalty_breakdown["user_unpaid_count"]
 
     # D. Chama Goal Progress (Read Only for Member)
-    chama_target = active_chama.chama_target_amount
-    total_collected = Contribution.objects.filter(
-        contribution_chama=active_chama, 
-        contribution_status='success'
-    ).aggregate(sum=Sum('contribution_amount'))['sum'] or 0
+    chama_target = metrics.target
+    total_collected = metrics.collected
     
     chama_progress = 0
     if chama_target > 0:
@@ -257,7 +269,7 @@ def member_dashboard(request, chama_id=None):
 
     attendance_status = "N/A"
     if next_meeting:
-        att = MeetingAttendance.objects.filter(attendance_meeting=next_meeting, attendance_user=request.user).first()
+        att = MeetingAttendance.objects.filter(attendance_meeting=next_meeting, attendance_user=user).first()
         if att:
             attendance_status = att.attendance_status
 
@@ -266,7 +278,7 @@ def member_dashboard(request, chama_id=None):
     # 5. --- GRAPHS DATA (My Monthly Contributions) ---
     six_months_ago = timezone.now() - timedelta(days=180)
     monthly_stats = Contribution.objects.filter(
-        contribution_user=request.user,
+        contribution_user=user,
         contribution_chama=active_chama,
         contribution_created_at__gte=six_months_ago,
         contribution_status='success'
@@ -283,11 +295,7 @@ def member_dashboard(request, chama_id=None):
         chart_labels.append(entry['month'].strftime('%b %Y'))
         chart_data.append(float(entry['total']))
 
-    context = {
-        "active_chama": active_chama,
-        "active_role": active_role,
-        "chama_with_roles": memberships, # Added for Switch Roles
-        
+    return {
         # Cards Data
         "contrib_status": contrib_status,
         "contrib_color": contrib_color,
@@ -306,99 +314,54 @@ def member_dashboard(request, chama_id=None):
         "chart_labels": json.dumps(chart_labels),
         "chart_data": json.dumps(chart_data),
     }
-    context.update(get_notification_context(request.user, active_chama))
-    return render(request, "dashboard/member_dashboard.html", context)
 # ==========================================
 #              ADMIN DASHBOARD
 # ==========================================
 
 
-# --- HELPER FUNCTION for Notifications ---
-def get_notification_context(user, active_chama):
-    """Fetches unread count and latest 5 unread notifications for the active chama."""
-    if not active_chama:
-        return {"unread_count": 0, "latest_notifications": []}
-
-    qs = Notification.objects.filter(
-        notification_user=user,
-        notification_chama=active_chama,
-        notification_is_read=False
-    ).order_by('-notification_created_at')
-    
-    return {
-        "unread_count": qs.count(),
-        "latest_notifications": qs[:5],
-    }
-
 # --- HELPER FUNCTION for Recent Activity ---
 def get_recent_activity(chama, limit=4):
     """
-    Fetches the 4 most recent activities across the chama.
-    Returns a list of activity dictionaries with type, description, and timestamp.
+    Fetches the 4 most recent activities across the chama in one query.
+    Returns a list of activity dictionaries with type, description, and timestamp,
+    and the cursor for loading older ones (None if there are none).
     """
-    activities = []
-    
-    # Recent Contributions
-    recent_contributions = Contribution.objects.filter(
-        contribution_chama=chama,
-        contribution_status='success'
-    ).order_by('-contribution_created_at')[:limit]
-    
-    for contrib in recent_contributions:
-        activities.append({
-            'type': 'contribution',
-            'icon': 'fa-coins',
-            'color': 'success',
-            'description': f"{contrib.contribution_user.get_full_name()} contributed Ksh {contrib.contribution_amount}",
-            'timestamp': contrib.contribution_created_at
-        })
-    
-    # Recent Loans
-    recent_loans = Loan.objects.filter(
-        loan_chama=chama
-    ).order_by('-loan_created_at')[:limit]
-    
-    for loan in recent_loans:
-        activities.append({
-            'type': 'loan',
-            'icon': 'fa-hand-holding-usd',
-            'color': 'warning',
-            'description': f"{loan.loan_user.get_full_name()} took a loan of Ksh {loan.loan_amount}",
-            'timestamp': loan.loan_created_at
-        })
-    
-    # Recent Penalties
-    recent_penalties = Penalty.objects.filter(
-        penalty_chama=chama
-    ).order_by('-penalty_created_at')[:limit]
-    
-    for penalty in recent_penalties:
-        activities.append({
-            'type': 'penalty',
-            'icon': 'fa-exclamation-triangle',
-            'color': 'danger',
-            'description': f"{penalty.penalty_user.get_full_name()} received a penalty of Ksh {penalty.penalty_amount}",
-            'timestamp': penalty.penalty_created_at
-        })
-    
-    # Recent Join Requests
-    recent_joins = JoinRequest.objects.filter(
-        join_request_chama=chama,
-        join_request_status='accepted'
-    ).order_by('-join_request_reviewed_at')[:limit]
-    
-    for join in recent_joins:
-        activities.append({
-            'type': 'join',
-            'icon': 'fa-user-plus',
-            'color': 'info',
-            'description': f"{join.join_request_user.get_full_name()} joined the chama",
-            'timestamp': join.join_request_reviewed_at or join.join_request_created_at
-        })
-    
-    # Sort all activities by timestamp (most recent first) and return top 4
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    return activities[:limit]
+    return activity_feed(chama, limit=limit)
+
+
+@login_required
+def chama_activity(request, chama_id):
+    """One page of the chama's activity feed as JSON; pass `before` to page back."""
+    membership = get_object_or_404(
+        Membership,
+        membership_user=request.user,
+        membership_chama_id=chama_id,
+        membership_status="active",
+    )
+    if membership.membership_role not in ["admin", "treasurer", "secretary"]:
+        return JsonResponse({"error": "Not allowed."}, status=403)
+
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+        activities, next_cursor = activity_feed(
+            membership.membership_chama_id, limit=limit, before=request.GET.get("before")
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit or cursor."}, status=400)
+
+    return JsonResponse({
+        "activities": [
+            {
+                "type": activity["type"],
+                "icon": activity["icon"],
+                "color": activity["color"],
+                "description": activity["description"],
+                "timestamp": activity["timestamp"].isoformat(),
+            }
+            for activity in activities
+        ],
+        "next": next_cursor,
+    })
 
 @login_required
 def admin_dashboard(request, chama_id=None):
@@ -408,30 +371,21 @@ def admin_dashboard(request, chama_id=None):
         membership_status="active"
     ).select_related("membership_chama")
 
-    user_chamas = [m.membership_chama.id for m in memberships]
+    user_memberships = {m.membership_chama_id: m for m in memberships}
 
     active_chama = None
     active_role = None
 
     # Logic to determine the Active Chama
-    if chama_id:
-        chama_id = int(chama_id)
-        if chama_id in user_chamas:
-            active_chama = Chama.objects.get(id=chama_id)
-            membership = Membership.objects.filter(
-                membership_chama=active_chama,
-                membership_user=request.user
-            ).first()
-            active_role = membership.membership_role if membership else None
-    
+    membership = user_memberships.get(int(chama_id)) if chama_id else None
+
     # Fallback: If no specific ID, default to the first available chama
-    if active_chama is None and len(user_chamas) >= 1:
-        active_chama = Chama.objects.get(id=user_chamas[0])
-        membership = Membership.objects.filter(
-            membership_chama=active_chama,
-            membership_user=request.user
-        ).first()
-        active_role = membership.membership_role if membership else None
+    if membership is None and user_memberships:
+        membership = next(iter(user_memberships.values()))
+
+    if membership:
+        active_chama = membership.membership_chama
+        active_role = membership.membership_role
     
     # Error handling if context is still missing
     if active_chama is None:
@@ -440,89 +394,60 @@ def admin_dashboard(request, chama_id=None):
         return render(request, "dashboard/admin_dashboard.html", context)
         
     # --- Calculate Metrics for Cards ---
+    metrics = ChamaMetrics(active_chama)
 
     # 1. Total Members
-    total_members = Membership.objects.filter(
-        membership_chama=active_chama,
-        membership_status="active"
-    ).count()
+    total_members = metrics.members["active"]
 
     # 2. Total Contributions (Success only)
-    contributions_qs = Contribution.objects.filter(
-        contribution_chama=active_chama,
-        contribution_status="success"
-    )
-    total_contributions = contributions_qs.aggregate(total=Sum("contribution_amount"))["total"] or 0
+    total_contributions = metrics.collected
 
     # 3. Pending Contributions (Attention Card)
-    pending_contributions_regular = Contribution.objects.filter(
-        contribution_chama=active_chama,
-        contribution_status="pending",
-        contribution_type='contribution'
-    )
-    pending_regular_count = pending_contributions_regular.count()
-    pending_regular_amount = pending_contributions_regular.aggregate(total=Sum("contribution_amount"))["total"] or 0
+    pending_regular_count = metrics.contributions["pending_regular_count"]
+    pending_regular_amount = metrics.contributions["pending_regular_amount"]
 
     # 4. Pending Loan Requests (Attention Card)
     pending_loan_requests = Loan.objects.filter(
         loan_chama=active_chama,
         loan_status="pending"
     )
-    pending_loans_count = pending_loan_requests.count()
+    pending_loans_count = metrics.loans["pending_count"]
 
     # 5. Today's STK Summary
-    today = timezone.now().date()
-    today_tx = Transaction.objects.filter(
-        transaction_chama=active_chama,
-        transaction_created_at__date=today
-    )
-    stk_success = today_tx.filter(transaction_status="success").count()
-    stk_failed = today_tx.filter(transaction_status__in=['failed', 'cancelled']).count()
-    stk_pending = today_tx.filter(transaction_status="pending").count()
+    stk_success = metrics.stk_today["success"]
+    stk_failed = metrics.stk_today["failed"] + metrics.stk_today["cancelled"]
+    stk_pending = metrics.stk_today["pending"]
 
     # 6. Penalties Overview (Pink Card)
-    all_penalties_qs = Penalty.objects.filter(penalty_chama=active_chama)
-    unpaid_penalties = all_penalties_qs.filter(penalty_paid=False)
-    total_penalty_amount = all_penalties_qs.aggregate(total=Sum("penalty_amount"))["total"] or 0
-    unpaid_penalty_amount = unpaid_penalties.aggregate(total=Sum("penalty_amount"))["total"] or 0
-    unpaid_penalty_count = unpaid_penalties.count()
+    total_penalty_amount = metrics.penalties["total_amount"]
+    unpaid_penalty_amount = metrics.penalties["unpaid_amount"]
+    unpaid_penalty_count = metrics.penalties["unpaid_count"]
 
     # 7. Contribution History (Last 6 Months - FIXED FOR CHART)
     six_months_ago = timezone.now() - timedelta(days=180)
     
-    # We query the database for monthly totals
-    history_queryset = (
-        contributions_qs.filter(contribution_created_at__gte=six_months_ago)
-        .annotate(month=TruncMonth('contribution_created_at'))
-        .values("month")
-        .annotate(total=Sum("contribution_amount"))
-        .order_by("month")
-    )
+    # Monthly totals come from the chama's rollup rows
+    history_rows = metrics.contribution_history(six_months_ago)
     
     # SERIALIZATION FIX: Convert QuerySet to a clean list of dictionaries
     # This prevents "Decimal not serializable" errors in JavaScript
     contributions_history_list = []
-    for entry in history_queryset:
-        if entry['month']:
-            contributions_history_list.append({
-                "month": entry['month'].strftime("%Y-%m-%d"), # Convert Date to String
-                "total": float(entry['total'])                # Convert Decimal to Float
-            })
+    for entry in history_rows:
+        contributions_history_list.append({
+            "month": entry['rollup_month'].strftime("%Y-%m-%d"),     # Convert Date to String
+            "total": float(entry['rollup_contributions_amount'])     # Convert Decimal to Float
+        })
 
     # 8. Progress Toward Chama Target (Green Card)
-    target = active_chama.chama_target_amount
+    target = metrics.target
     collected = total_contributions
     progress_percent = (collected / target * 100) if target > 0 else 0
 
     # 9. Pending Join Requests (Side Nav Badge)
-    pending_join_requests = JoinRequest.objects.filter(
-        join_request_chama=active_chama,
-        join_request_status="pending"
-    )
-    pending_join_count = pending_join_requests.count()
+    pending_join_count = metrics.join_requests["pending"]
 
     # 10. Recent Activity (List Widget)
-    recent_activities = get_recent_activity(active_chama, limit=4)
+    recent_activities, activity_next = get_recent_activity(active_chama, limit=4)
 
     context = {
         "active_chama": active_chama,
@@ -564,6 +489,7 @@ def admin_dashboard(request, chama_id=None):
         
         # Recent Activity
         "recent_activities": recent_activities,
+        "activity_next": activity_next,
     }
     
     context.update(get_notification_context(request.user, active_chama))
@@ -709,55 +635,57 @@ def download_report(request, chama_id, report_type):
     if report_type == 'finance' and membership.membership_role not in ['admin', 'chairman', 'treasurer']:
         return HttpResponseForbidden("Unauthorized: Only Treasurers/Admins/Chairmen can download finance reports.")
 
-    # Create Response
-    response = HttpResponse(
-        content_type='text/csv',
-        headers={'Content-Disposition': f'attachment; filename="{chama.chama_name}_{report_type}_report.csv"'},
+    rows = members_report_rows(chama) if report_type == 'full' else transactions_report_rows(chama)
+    return stream_csv(rows, f"{chama.chama_name}_{report_type}_report.csv")
+
+
+@login_required
+@require_POST
+def request_report(request, chama_id, report_type):
+    """
+    Queue a report for background generation. If the file for the chama's
+    current data is already built, redirect straight to it.
+    """
+    chama = get_object_or_404(Chama, id=chama_id)
+    membership = get_object_or_404(
+        Membership, membership_user=request.user, membership_chama=chama, membership_status="active"
     )
+    if not can_request(membership, report_type):
+        return HttpResponseForbidden("You do not have permission to download this report.")
+
+    job = queue_report(chama, report_type, request.user)
+    if job.report_job_status == "ready":
+        return redirect("dashboard:download_report", job_id=job.id)
+
+    messages.success(request, f"Your {job.get_report_job_type_display().lower()} is being prepared. You will be notified when it is ready.")
+    return redirect(request.META.get("HTTP_REFERER") or get_user_dashboard_redirect(request.user))
 
-    writer = csv.writer(response)
-    
-    if report_type == 'full':
-        # Admin Full Report
-        writer.writerow(['Member Name', 'Email', 'Phone', 'Role', 'Join Date', 'Total Contributed', 'Loan Status'])
-        members = Membership.objects.filter(membership_chama=chama)
-        
-        for m in members:
-            total_contributed = Contribution.objects.filter(
-                contribution_user=m.membership_user, 
-                contribution_chama=chama
-            ).aggregate(Sum('contribution_amount'))['contribution_amount__sum'] or 0
-            
-            # Check for active loan
-            has_loan = Loan.objects.filter(loan_user=m.membership_user, loan_chama=chama, loan_status='active').exists()
-            loan_status = "Has Active Loan" if has_loan else "No Active Loan"
-
-            writer.writerow([
-                m.membership_user.get_full_name(),
-                m.membership_user.user_email,
-                m.membership_user.user_phone_number,
-                m.membership_role.title(),
-                m.membership_join_date.strftime("%Y-%m-%d"),
-                total_contributed,
-                loan_status
-            ])
-            
-    elif report_type == 'finance':
-        # Treasurer Finance Report
-        writer.writerow(['Transaction ID', 'User', 'Type', 'Amount', 'Date', 'Status'])
-        txs = Transaction.objects.filter(transaction_chama=chama).order_by('-transaction_created_at')
-        
-        for tx in txs:
-            writer.writerow([
-                tx.transaction_id, 
-                tx.transaction_user.get_full_name(), 
-                tx.transaction_type, 
-                tx.transaction_amount, 
-                tx.transaction_created_at.strftime("%Y-%m-%d %H:%M"), 
-                tx.transaction_status
-            ])
 
-    return response
+@login_required
+def download_report(request, job_id):
+    """Serve a generated report to active members whose role may request it."""
+    job = get_object_or_404(ReportJob.objects.select_related("report_job_chama"), id=job_id)
+    membership = get_object_or_404(
+        Membership, membership_user=request.user, membership_chama=job.report_job_chama, membership_status="active"
+    )
+    if not can_request(membership, job.report_job_type):
+        return HttpResponseForbidden("You do not have permission to download this report.")
+
+    if job.report_job_status == "expired":
+        # A newer version replaced this file; send the latest one instead
+        latest = ReportJob.objects.filter(
+            report_job_chama=job.report_job_chama, report_job_type=job.report_job_type, report_job_status="ready"
+        ).order_by("-report_job_created_at").first()
+        if latest:
+            return redirect("dashboard:download_report", job_id=latest.id)
+    if job.report_job_status in ("queued", "running"):
+        messages.info(request, "This report is still being prepared. You will be notified when it is ready.")
+        return redirect(get_user_dashboard_redirect(request.user))
+    if job.report_job_status != "ready":
+        messages.error(request, "This report is no longer available. Please request it again.")
+        return redirect(get_user_dashboard_redirect(request.user))
+
+    return FileResponse(job.report_job_file.open("rb"), as_attachment=True, filename=report_filename(job))
 
 
 # ==========================================
@@ -775,8 +703,26 @@ def treasurer_dashboard(request, chama_id):
         membership_status="active"
     ).select_related("membership_chama")
 
-    # 1) Total funds (with optional month filter)
     month = request.GET.get("month")
+    context = {
+        "chama": chama,
+        "active_chama": chama,
+        "active_role": "treasurer",
+        "chama_with_roles": memberships,
+    }
+    context.update(cached_dashboard_context(
+        "treasurer", chama, request.user,
+        lambda: treasurer_dashboard_data(chama, month),
+        variant=month,
+    ))
+    context.update(get_notification_context(request.user, active_chama))
+    return render(request, "dashboard/treasurer_dashboard.html", context)
+
+
+def treasurer_dashboard_data(chama, month=None):
+    """Cards and chart data of the treasurer dashboard (cached per version)."""
+    # 1) Total funds (with optional month filter)
+    metrics = ChamaMetrics(chama, month=month)
     contributions_qs = Contribution.objects.filter(
         contribution_chama=chama,
         contribution_status="success"
@@ -784,7 +730,7 @@ def treasurer_dashboard(request, chama_id):
     if month:
         contributions_qs = contributions_qs.filter(contribution_time__month=month)
 
-    total_funds = contributions_qs.aggregate(total=Sum("contribution_amount"))["total"] or 0
+    total_funds = metrics.scoped_collected
 
     member_contributions = contributions_qs.values(
         "contribution_user__user_first_name"
@@ -792,22 +738,14 @@ def treasurer_dashboard(request, chama_id):
 
     # 2) Goal progress
     collected = total_funds
-    target = chama.chama_target_amount
+    target = metrics.target
     progress_percent = (collected / target * 100) if target > 0 else 0
 
     # 3) Current cycle + pending
-    cycle = ContributionCycle.objects.filter(
-        cycle_chama=chama, cycle_status="open"
-    ).last()
+    cycle = metrics.open_cycle
 
     # Members who have NOT contributed (pending in current filter scope)
-    pending_members = Membership.objects.filter(
-        membership_chama=chama,
-        membership_status="active"
-    ).exclude(
-        membership_user__in=contributions_qs.values("contribution_user")
-    )
-    pending_count = pending_members.count()
+    pending_count = metrics.members["unpaid"]
 
     # Expected pending amount (prefer cycle amount if available)
     per_member_amount = (
@@ -822,56 +760,37 @@ def treasurer_dashboard(request, chama_id):
     # 4) Loans (pending + active and repayment progress)
     pending_loans = Loan.objects.filter(loan_chama=chama, loan_status="pending")
 
-    active_loans = Loan.objects.filter(loan_chama=chama, loan_status="active")
-    active_loans_count = active_loans.count()
-    total_loaned = active_loans.aggregate(total=Sum("loan_amount"))["total"] or 0
-    total_outstanding = active_loans.aggregate(total=Sum("loan_outstanding_balance"))["total"] or 0
+    active_loans_count = metrics.loans["active_count"]
+    total_loaned = metrics.loans["active_amount"]
+    total_outstanding = metrics.loans["active_outstanding"]
     repayment_progress = (
         (total_loaned - total_outstanding) / total_loaned * 100
         if total_loaned > 0 else 0
     )
 
     # 5) Penalties (global counts)
-    penalties = Penalty.objects.filter(penalty_chama=chama)
-    missed_payments = penalties.filter(penalty_reason__icontains="missed").count()
-    loan_defaults = penalties.filter(penalty_reason__icontains="default").count()
-    total_penalties = penalties.aggregate(total=Sum("penalty_amount"))["total"] or 0
+    missed_payments = metrics.penalty_breakdown["missed_count"]
+    loan_defaults = metrics.loans["defaulted_count"]
+    total_penalties = metrics.penalties["total_amount"]
 
     # 6) STK monitor (today)
-    today = timezone.now().date()
-    today_tx = Transaction.objects.filter(
-        transaction_chama=chama,
-        transaction_created_at__date=today
-    )
-    stk_success = today_tx.filter(transaction_status="success").count()
-    stk_failed = today_tx.filter(transaction_status="failed").count()
+    stk_success = metrics.stk_today["success"]
+    stk_failed = metrics.stk_today["failed"]
 
     # 7) Contribution history (last 6 months)
     six_months_ago = timezone.now() - timedelta(days=180)
-    contributions_history = (
-        contributions_qs.filter(contribution_time__gte=six_months_ago)
-        .values("contribution_time__month")
-        .annotate(total=Sum("contribution_amount"))
-        .order_by("contribution_time__month")
-    )
+    contributions_history = [
+        {"contribution_time__month": row["rollup_month"].month, "total": row["rollup_contributions_amount"]}
+        for row in metrics.contribution_history(six_months_ago, month=month)
+    ]
 
     # 8) Cycle status (Paid / Pending / Overdue)
     # Paid: contributions in the current open cycle (if Contribution has contribution_cycle)
     if cycle:
-        cycle_contributions = Contribution.objects.filter(
-            contribution_chama=chama,
-            contribution_status="success",
-            contribution_cycle=cycle  # ensure this field exists on Contribution
-        )
-        paid = cycle_contributions.count()
+        paid = metrics.contributions["cycle_paid"]
 
         # Pending: active members who haven't contributed in current cycle
-        pending = Membership.objects.filter(
-            membership_chama=chama,
-            membership_status="active"
-        ).exclude(
-            membership_user__in=cycle_contributions.values("contribution_user")
-        ).count()
+        pending = metrics.members["cycle_unpaid"]
 
         # Overdue: missed penalties during/after this cycle window (safe, field-agnostic)
         # If your cycle model has a due date (e.g., cycle_due_date), use it to bound overdue:
@@ -892,10 +811,7 @@ def treasurer_dashboard(request, chama_id):
 
     cycle_status = {"paid": paid, "pending": pending, "overdue": overdue}
 
-    context = {
-        "chama": chama,
-        "active_chama": chama,
-        "active_role": "treasurer",
+    return {
         "total_funds": total_funds,
         "member_contributions": member_contributions,
         "collected": collected,
@@ -913,12 +829,9 @@ def treasurer_dashboard(request, chama_id):
         "total_penalties": total_penalties,
         "stk_success": stk_success,
         "stk_failed": stk_failed,
-        "contributions_history": list(contributions_history),
+        "contributions_history": contributions_history,
         "cycle_status": cycle_status,
-        "chama_with_roles": memberships,
     }
-    context.update(get_notification_context(request.user, active_chama))
-    return render(request, "dashboard/treasurer_dashboard.html", context)
 
 # ==========================================
 #           SECRETARY DASHBOARD
@@ -946,10 +859,28 @@ def secretary_dashboard(request, chama_id):
         membership_status="active"
     ).select_related("membership_chama")
 
+    context = {
+        "chama": chama,
+        "active_chama": chama,
+        "active_role": "secretary",
+        "now": timezone.now(),
+        "chama_with_roles": memberships,
+    }
+    context.update(cached_dashboard_context(
+        "secretary", chama, request.user,
+        lambda: secretary_dashboard_data(chama),
+    ))
+    context.update(get_notification_context(request.user, active_chama))
+    return render(request, "dashboard/secretary_dashboard.html", context)
+
+
+def secretary_dashboard_data(chama):
+    """Member, meeting and join request figures of the secretary dashboard (cached per version)."""
     # Total members
-    total_members = Membership.objects.filter(membership_chama=chama).count()
-    active_members = Membership.objects.filter(membership_chama=chama, membership_status="active").count()
-    inactive_members = total_members - active_members
+    metrics = ChamaMetrics(chama)
+    total_members = metrics.members["total"]
+    active_members = metrics.members["active"]
+    inactive_members = metrics.members["inactive"]
 
     # FIXED CALCULATION: Active Member Percentage
     active_percentage = 0
@@ -958,11 +889,7 @@ def secretary_dashboard(request, chama_id):
 
     # New members this month
     now = timezone.now()
-    new_members_this_month = Membership.objects.filter(
-        membership_chama=chama,
-        membership_join_date__month=now.month,
-        membership_join_date__year=now.year
-    ).count()
+    new_members_this_month = metrics.members["new_this_month"]
 
     # Upcoming meetings (this week only)
     start_week = now - timedelta(days=now.weekday())
@@ -982,10 +909,7 @@ def secretary_dashboard(request, chama_id):
     avg_attendance = last_meeting.attendance_rate if last_meeting and hasattr(last_meeting, 'attendance_rate') else 0 
 
 
-    context = {
-        "chama": chama,
-        "active_chama": chama,
-        "active_role": "secretary",
+    return {
         "total_members": total_members,
         "active_members": active_members,
         "inactive_members": inactive_members,
@@ -994,11 +918,7 @@ def secretary_dashboard(request, chama_id):
         "avg_attendance": avg_attendance,
         "active_percentage": active_percentage, 
         "join_requests": join_requests, 
-        "now": now, 
-        "chama_with_roles": memberships, 
     }
-    context.update(get_notification_context(request.user, active_chama))
-    return render(request, "dashboard/secretary_dashboard.html", context)
 
 @login_required
 def secretary_join_requests(request, chama_id):
@@ -1145,17 +1065,12 @@ def send_reminder(request, chama_id):
 
     if request.method == "POST":
         message = request.POST.get("message")
-        count = 0
-        for member in Membership.objects.filter(membership_chama=chama, membership_status="active"):
-            Notification.objects.create(
-                notification_user=member.membership_user,
-                notification_chama=chama,
-                notification_title="Reminder",
-                notification_message=message,
-                notification_type="reminder",
-                notification_sender=request.user
-            )
-            count += 1
-        messages.success(request, f"Reminder sent to {count} active members.")
+        members = User.objects.filter(
+            memberships__membership_chama=chama, memberships__membership_status="active"
+        )
+        sent = send_chama_notification(
+            chama, members, title="Reminder", message=message, sender=request.user, n_type="reminder"
+        )
+        messages.success(request, f"Reminder sent to {len(sent)} active members.")
 
     return redirect("dashboard:secretary_dashboard", chama_id=chama.id)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from dashboard.reports import claim_report_jobs, run_report_job
+
+
+class Command(BaseCommand):
+    help = "Generate queued CSV reports into REPORT_STORAGE_ROOT (no external broker needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5, help="Jobs claimed per poll.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        processed = 0
+
+        while True:
+            jobs = claim_report_jobs(options["batch_size"])
+            if jobs:
+                for job in jobs:
+                    run_report_job(job)
+                    processed += 1
+                    self.stdout.write(f"Report job {job.id}: {job.report_job_status} {job.report_job_error}")
+                continue
+
+            if options["once"]:
+                break
+            close_old_connections()
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} report job(s)."))
@@ -0,0 +1,215 @@
+"""
+Dashboard card metrics computed in a few queries.
+
+ChamaMetrics issues at most one conditional-aggregation query per table
+(memberships, contributions, loans, penalties, today's STK transactions,
+join requests, plus the open-cycle lookup). Ledger-wide totals come from
+the chama's ChamaFinancialSnapshot and ChamaMonthlyRollup rows rather
+than from the raw ledger. Sections are evaluated on first access and
+cached, so each dashboard only pays for the cards it shows.
+`query_count` reports how many queries have been issued so far.
+"""
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from chama.models import JoinRequest, Membership
+from darajaapi.models import Transaction
+from finance.models import (
+    ChamaFinancialSnapshot, ChamaMonthlyRollup, Contribution, ContributionCycle, Loan, Penalty
+)
+from finance.rollups import month_start, rebuild_chama
+
+
+class ChamaMetrics:
+    def __init__(self, chama, user=None, month=None):
+        """
+        `user` adds that member's own figures (cycle contribution, unpaid
+        penalties); `month` scopes the treasurer's funds and unpaid members.
+        """
+        self.chama = chama
+        self.user = user
+        self.month = month
+        self.query_count = 0
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    def _aggregate(self, queryset, **aggregates):
+        with connection.execute_wrapper(self._count_query):
+            result = queryset.aggregate(**aggregates)
+        return {key: value or 0 for key, value in result.items()}
+
+    def _fetch(self, fn):
+        with connection.execute_wrapper(self._count_query):
+            return fn()
+
+    def _scoped_success(self):
+        success = Q(contribution_status="success")
+        if self.month:
+            success &= Q(contribution_time__month=self.month)
+        return success
+
+    @cached_property
+    def open_cycle(self):
+        """The newest open contribution cycle, or None."""
+        with connection.execute_wrapper(self._count_query):
+            return ContributionCycle.objects.filter(
+                cycle_chama=self.chama, cycle_status="open"
+            ).order_by("-id").first()
+
+    @cached_property
+    def snapshot(self):
+        """The chama's running totals, built from the ledger on first use."""
+        def fetch():
+            return ChamaFinancialSnapshot.objects.filter(snapshot_chama=self.chama).first()
+
+        snapshot = self._fetch(fetch)
+        if snapshot is None:
+            self._fetch(lambda: rebuild_chama(self.chama.id))
+            snapshot = self._fetch(fetch)
+        return snapshot
+
+    def contribution_history(self, since, month=None):
+        """Monthly rollup rows from `since` on, optionally one calendar month only."""
+        rows = ChamaMonthlyRollup.objects.filter(
+            rollup_chama=self.chama,
+            rollup_month__gte=month_start(since),
+            rollup_contributions_count__gt=0,
+        )
+        if month:
+            rows = rows.filter(rollup_month__month=month)
+        return self._fetch(lambda: list(rows.values("rollup_month", "rollup_contributions_amount")))
+
+    @property
+    def collected(self):
+        return self.snapshot.snapshot_total_collected
+
+    @cached_property
+    def scoped_collected(self):
+        """Collected in the selected calendar month (any year), or overall."""
+        if not self.month:
+            return self.collected
+        return self._aggregate(
+            ChamaMonthlyRollup.objects.filter(rollup_chama=self.chama, rollup_month__month=self.month),
+            total=Sum("rollup_contributions_amount"),
+        )["total"]
+
+    @cached_property
+    def members(self):
+        now = timezone.now()
+        active = Q(membership_status="active")
+        contributors = Contribution.objects.filter(
+            Q(contribution_chama=self.chama) & self._scoped_success()
+        ).values("contribution_user")
+        aggregates = {
+            "total": Count("id"),
+            "active": Count("id", filter=active),
+            "new_this_month": Count("id", filter=Q(
+                membership_join_date__month=now.month,
+                membership_join_date__year=now.year,
+            )),
+            "unpaid": Count("id", filter=active & ~Q(membership_user__in=contributors)),
+        }
+        if self.open_cycle:
+            cycle_contributors = Contribution.objects.filter(
+                contribution_chama=self.chama,
+                contribution_status="success",
+                contribution_cycle=self.open_cycle,
+            ).values("contribution_user")
+            aggregates["cycle_unpaid"] = Count(
+                "id", filter=active & ~Q(membership_user__in=cycle_contributors)
+            )
+        result = self._aggregate(Membership.objects.filter(membership_chama=self.chama), **aggregates)
+        result["inactive"] = result["total"] - result["active"]
+        result.setdefault("cycle_unpaid", 0)
+        return result
+
+    @cached_property
+    def contributions(self):
+        """Pending and open-cycle figures; only those rows are scanned."""
+        success = Q(contribution_status="success")
+        pending = Q(contribution_status="pending")
+        pending_regular = pending & Q(contribution_type="contribution")
+        aggregates = {
+            "pending_regular_count": Count("id", filter=pending_regular),
+            "pending_regular_amount": Sum("contribution_amount", filter=pending_regular),
+        }
+        rows = pending
+        if self.open_cycle:
+            in_cycle = Q(contribution_cycle=self.open_cycle)
+            rows |= in_cycle
+            aggregates["cycle_paid"] = Count("id", filter=success & in_cycle)
+            if self.user:
+                aggregates["user_cycle_paid"] = Sum(
+                    "contribution_amount", filter=success & in_cycle & Q(contribution_user=self.user)
+                )
+        result = self._aggregate(
+            Contribution.objects.filter(Q(contribution_chama=self.chama) & rows), **aggregates
+        )
+        result.setdefault("cycle_paid", 0)
+        result.setdefault("user_cycle_paid", 0)
+        return result
+
+    @cached_property
+    def loans(self):
+        counts = self._aggregate(
+            Loan.objects.filter(loan_chama=self.chama, loan_status__in=["pending", "defaulted"]),
+            pending_count=Count("id", filter=Q(loan_status="pending")),
+            defaulted_count=Count("id", filter=Q(loan_status="defaulted")),
+        )
+        return {
+            "pending_count": counts["pending_count"],
+            "defaulted_count": counts["defaulted_count"],
+            "active_count": self.snapshot.snapshot_active_loan_count,
+            "active_amount": self.snapshot.snapshot_active_loan_amount,
+            "active_outstanding": self.snapshot.snapshot_outstanding_loan_balance,
+        }
+
+    @property
+    def penalties(self):
+        return {
+            "total_amount": self.snapshot.snapshot_penalty_total,
+            "unpaid_amount": self.snapshot.snapshot_unpaid_penalty_amount,
+            "unpaid_count": self.snapshot.snapshot_unpaid_penalty_count,
+        }
+
+    @cached_property
+    def penalty_breakdown(self):
+        """Counts by reason, and the member's own unpaid penalties."""
+        unpaid = Q(penalty_paid=False)
+        aggregates = {
+            "missed_count": Count("id", filter=Q(penalty_reason__icontains="missed")),
+        }
+        if self.user:
+            mine = unpaid & Q(penalty_user=self.user)
+            aggregates["user_unpaid_count"] = Count("id", filter=mine)
+            aggregates["user_unpaid_amount"] = Sum("penalty_amount", filter=mine)
+        return self._aggregate(Penalty.objects.filter(penalty_chama=self.chama), **aggregates)
+
+    @cached_property
+    def stk_today(self):
+        return self._aggregate(
+            Transaction.objects.filter(
+                transaction_chama=self.chama,
+                transaction_created_at__date=timezone.now().date(),
+            ),
+            success=Count("id", filter=Q(transaction_status="success")),
+            failed=Count("id", filter=Q(transaction_status="failed")),
+            cancelled=Count("id", filter=Q(transaction_status="cancelled")),
+            pending=Count("id", filter=Q(transaction_status="pending")),
+        )
+
+    @cached_property
+    def join_requests(self):
+        return self._aggregate(
+            JoinRequest.objects.filter(join_request_chama=self.chama),
+            pending=Count("id", filter=Q(join_request_status="pending")),
+        )
+
+    @property
+    def target(self):
+        """Same as Chama.chama_target_amount, from the members query."""
+        return self.members["active"] * self.chama.chama_contribution_amount
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_job_type', models.CharField(choices=[('financial', 'Financial Report'), ('full', 'Full Data Export'), ('members', 'Member Summary'), ('transactions', 'STK Transactions')], max_length=20)),
+                ('report_job_version', models.BigIntegerField()),
+                ('report_job_status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('report_job_attempts', models.PositiveSmallIntegerField(default=0)),
+                ('report_job_file', models.FileField(blank=True, upload_to='reports/')),
+                ('report_job_rows', models.PositiveIntegerField(default=0)),
+                ('report_job_error', models.CharField(blank=True, default='', max_length=255)),
+                ('report_job_created_at', models.DateTimeField(auto_now_add=True)),
+                ('report_job_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('report_job_chama', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to='chama.chama')),
+                ('report_job_requested_by', models.ManyToManyField(blank=True, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['report_job_status', 'report_job_created_at'], name='dashboard_r_report__da92cd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('report_job_chama', 'report_job_type', 'report_job_version'), name='unique_report_per_chama_version')],
+            },
+        ),
+    ]
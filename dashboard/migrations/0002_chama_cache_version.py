@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChamaCacheVersion',
+            fields=[
+                ('cache_version_chama', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cache_version', serialize=False, to='chama.chama')),
+                ('cache_version_number', models.BigIntegerField()),
+                ('cache_version_updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
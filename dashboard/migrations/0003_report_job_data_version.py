@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_chama_cache_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='report_job_version',
+            field=models.CharField(max_length=64),
+        ),
+    ]
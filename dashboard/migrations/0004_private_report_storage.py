@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:05
+
+import dashboard.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_report_job_data_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='report_job_file',
+            field=models.FileField(blank=True, storage=dashboard.models.report_storage, upload_to='reports/'),
+        ),
+        migrations.AlterField(
+            model_name='reportjob',
+            name='report_job_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('ready', 'Ready'), ('failed', 'Failed'), ('expired', 'Expired')], db_index=True, default='queued', max_length=20),
+        ),
+    ]
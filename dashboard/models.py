@@ -1,3 +1,83 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 
-# Create your models here.
+from chama.models import Chama
+
+
+REPORT_TYPE_CHOICES = (
+    ("financial", "Financial Report"),
+    ("full", "Full Data Export"),
+    ("members", "Member Summary"),
+    ("transactions", "STK Transactions"),
+)
+
+REPORT_JOB_STATUS_CHOICES = (
+    ("queued", "Queued"),
+    ("running", "Running"),
+    ("ready", "Ready"),
+    ("failed", "Failed"),
+    ("expired", "Expired"),
+)
+
+
+def report_storage():
+    """Reports hold members' personal data, so they are kept outside MEDIA_ROOT and served by a view."""
+    return FileSystemStorage(location=settings.REPORT_STORAGE_ROOT)
+
+
+class ChamaCacheVersion(models.Model):
+    """
+    Version of a chama's dashboard data (dashboard.cache). Kept in the
+    database so web, worker and callback processes all see the same value.
+    """
+    cache_version_chama = models.OneToOneField(
+        Chama, on_delete=models.CASCADE, primary_key=True, related_name="cache_version"
+    )
+    cache_version_number = models.BigIntegerField()
+    cache_version_updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.cache_version_chama} — v{self.cache_version_number}"
+
+
+class ReportJob(models.Model):
+    """
+    A CSV report generated in the background by `manage.py run_report_worker`.
+    One job exists per chama, report type and data version, so officials
+    asking for the same report share one file.
+    """
+    report_job_chama = models.ForeignKey(Chama, on_delete=models.CASCADE, related_name="report_jobs")
+    report_job_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
+    report_job_version = models.CharField(max_length=64)
+    report_job_requested_by = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        related_name="report_jobs",
+        blank=True
+    )
+    report_job_status = models.CharField(
+        max_length=20,
+        choices=REPORT_JOB_STATUS_CHOICES,
+        default="queued",
+        db_index=True
+    )
+    report_job_attempts = models.PositiveSmallIntegerField(default=0)
+    report_job_file = models.FileField(upload_to="reports/", storage=report_storage, blank=True)
+    report_job_rows = models.PositiveIntegerField(default=0)
+    report_job_error = models.CharField(max_length=255, blank=True, default="")
+    report_job_created_at = models.DateTimeField(auto_now_add=True)
+    report_job_finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["report_job_chama", "report_job_type", "report_job_version"],
+                name="unique_report_per_chama_version",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["report_job_status", "report_job_created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_job_type_display()} — {self.report_job_chama} — {self.report_job_status}"
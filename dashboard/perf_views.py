@@ -0,0 +1,45 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+
+from common.middleware import endpoint_stats
+
+SORT_KEYS = {
+    "time": "avg_ms",
+    "queries": "avg_queries",
+    "db": "avg_db_ms",
+    "max": "max_ms",
+    "requests": "requests",
+}
+
+
+@staff_member_required
+def perf_summary(request):
+    """Worst endpoints recorded by QueryProfilingMiddleware."""
+    if request.method == "POST" and request.POST.get("action") == "reset":
+        endpoint_stats.reset()
+        return redirect("perf_summary")
+
+    rows = []
+    for endpoint, stats in endpoint_stats.snapshot().items():
+        n = stats["requests"] or 1
+        rows.append({
+            "endpoint": endpoint,
+            "requests": stats["requests"],
+            "avg_ms": round(stats["total_ms"] / n, 1),
+            "max_ms": round(stats["max_ms"], 1),
+            "avg_db_ms": round(stats["db_ms"] / n, 1),
+            "avg_queries": round(stats["queries"] / n, 1),
+            "max_queries": stats["max_queries"],
+            "avg_kb": round(stats["bytes"] / n / 1024, 1),
+            "slowest_query_ms": round(stats["slowest_query_ms"], 1),
+            "slowest_query": stats["slowest_query"],
+        })
+
+    sort = request.GET.get("sort", "time")
+    rows.sort(key=lambda r: r[SORT_KEYS.get(sort, "avg_ms")], reverse=True)
+    rows = rows[:100]
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({"endpoints": rows})
+    return render(request, "dashboard/perf_summary.html", {"rows": rows, "sort": sort})
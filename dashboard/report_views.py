@@ -1,9 +1,12 @@
 import csv
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Sum
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from chama.models import Chama, Membership
+from darajaapi.models import Transaction
 from finance.models import Contribution, Loan, Penalty, ContributionCycle, LoanRepayment
-from notification.models import Notification, Meeting, MeetingAttendance
+from notification.models import ArchivedNotification, Notification, Meeting, MeetingAttendance
 
 # Helper to safely get user name
 def get_member_name(user):
@@ -11,115 +14,120 @@ def get_member_name(user):
         return user.get_full_name()
     return user.user_first_name or "Unknown"
 
-# ---------------------- Financial Report (Treasurer & Admin) ----------------------
-@login_required
-def download_financial_report(request, chama_id):
-    user = request.user
-    chama = Chama.objects.get(id=chama_id)
 
-    membership = Membership.objects.filter(
-        membership_user=user,
-        membership_chama=chama,
-        membership_status='active',
-        membership_role__in=['treasurer', 'admin']
-    ).first()
-    
-    if not membership:
-        return HttpResponse("You do not have permission to download this report.", status=403)
+class Echo:
+    """File-like object whose write() hands the CSV line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    """
+    Stream an iterable of CSV rows. Rows are produced and sent one at a
+    time, so memory stays flat however large the chama is.
+    """
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{chama.chama_name}_financial_report.csv"'
+def _chunked(queryset):
+    # Server-side cursor on PostgreSQL; prefetches run once per chunk
+    return queryset.order_by('id').iterator(chunk_size=settings.REPORT_CHUNK_SIZE)
 
-    writer = csv.writer(response)
-    writer.writerow(["Category", "User/Item", "Amount", "Date", "Status", "Details"])
+
+# ---------------------- Financial Report (Treasurer & Admin) ----------------------
+def financial_report_rows(chama):
+    yield ["Category", "User/Item", "Amount", "Date", "Status", "Details"]
 
     # 1. Contributions
-    for c in Contribution.objects.filter(contribution_chama=chama):
-        writer.writerow([
+    for c in _chunked(Contribution.objects.filter(contribution_chama=chama).select_related('contribution_user')):
+        yield [
             "Contribution",
             get_member_name(c.contribution_user),
             c.contribution_amount,
             c.contribution_created_at.strftime("%Y-%m-%d"),
             c.contribution_status,
             c.contribution_type
-        ])
+        ]
 
     # 2. Loans Issued
-    for l in Loan.objects.filter(loan_chama=chama):
-        writer.writerow([
+    for l in _chunked(Loan.objects.filter(loan_chama=chama).select_related('loan_user')):
+        yield [
             "Loan Issued",
             get_member_name(l.loan_user),
             l.loan_amount,
             l.loan_created_at.strftime("%Y-%m-%d"),
             l.loan_status,
             f"Outstanding: {l.loan_outstanding_balance}"
-        ])
+        ]
 
     # 3. Loan Repayments
-    for lr in LoanRepayment.objects.filter(loan_repayment_loan__loan_chama=chama):
-        # FIX: Changed loan_repayment_date to loan_repayment_time
-        writer.writerow([
+    repayments = LoanRepayment.objects.filter(
+        loan_repayment_loan__loan_chama=chama
+    ).select_related('loan_repayment_loan__loan_user')
+    for lr in _chunked(repayments):
+        yield [
             "Loan Repayment",
             get_member_name(lr.loan_repayment_loan.loan_user),
             lr.loan_repayment_amount,
-            lr.loan_repayment_time.strftime("%Y-%m-%d"), 
+            lr.loan_repayment_time.strftime("%Y-%m-%d"),
             "Paid",
-            f"Repayment for Loan ID {lr.loan_repayment_loan.id}"
-        ])
+            f"Repayment for Loan ID {lr.loan_repayment_loan_id}"
+        ]
 
     # 4. Penalties
-    for p in Penalty.objects.filter(penalty_chama=chama):
-        writer.writerow([
+    for p in _chunked(Penalty.objects.filter(penalty_chama=chama).select_related('penalty_user')):
+        yield [
             "Penalty",
             get_member_name(p.penalty_user),
             p.penalty_amount,
             p.penalty_created_at.strftime("%Y-%m-%d"),
             "Paid" if p.penalty_paid else "Unpaid",
             p.penalty_reason
-        ])
+        ]
 
-    return response
 
-
-# ---------------------- Full Report (Admin Only) ----------------------
 @login_required
-def download_full_report(request, chama_id):
+def download_financial_report(request, chama_id):
     user = request.user
     chama = Chama.objects.get(id=chama_id)
 
-    # Permission check
     membership = Membership.objects.filter(
         membership_user=user,
         membership_chama=chama,
         membership_status='active',
-        membership_role='admin'
+        membership_role__in=['treasurer', 'admin']
     ).first()
-    
+
     if not membership:
         return HttpResponse("You do not have permission to download this report.", status=403)
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{chama.chama_name}_full_data_export.csv"'
+    return stream_csv(financial_report_rows(chama), f"{chama.chama_name}_financial_report.csv")
 
-    writer = csv.writer(response)
-    writer.writerow(["Section", "Item Type", "Related User", "Value/Amount", "Date", "Status", "Description/Details"])
+
+# ---------------------- Full Report (Admin Only) ----------------------
+def full_report_rows(chama):
+    yield ["Section", "Item Type", "Related User", "Value/Amount", "Date", "Status", "Description/Details"]
 
     # --- 1. MEMBERSHIP DATA ---
-    for m in Membership.objects.filter(membership_chama=chama):
+    for m in _chunked(Membership.objects.filter(membership_chama=chama).select_related('membership_user')):
         join_date = m.membership_join_date.strftime("%Y-%m-%d") if m.membership_join_date else "N/A"
-        writer.writerow([
-            "Membership", 
-            "Member Profile", 
+        yield [
+            "Membership",
+            "Member Profile",
             get_member_name(m.membership_user),
-            "", 
+            "",
             join_date,
-            m.membership_status, 
+            m.membership_status,
             f"Role: {m.membership_role} | Phone: {m.membership_user.user_phone_number}"
-        ])
+        ]
 
     # --- 2. CONTRIBUTION CYCLES ---
-    for cycle in ContributionCycle.objects.filter(cycle_chama=chama):
-        writer.writerow([
+    for cycle in _chunked(ContributionCycle.objects.filter(cycle_chama=chama)):
+        yield [
             "Operations",
             "Contribution Cycle",
             "Everyone",
@@ -127,35 +135,36 @@ def download_full_report(request, chama_id):
             f"{cycle.cycle_created_at.strftime('%Y-%m-%d')} to {cycle.cycle_deadline}",
             cycle.cycle_status,
             f"Name: {cycle.cycle_name}"
-        ])
+        ]
 
     # --- 3. CONTRIBUTIONS ---
-    for c in Contribution.objects.filter(contribution_chama=chama):
-        writer.writerow([
-            "Financial", 
-            "Contribution", 
+    for c in _chunked(Contribution.objects.filter(contribution_chama=chama).select_related('contribution_user')):
+        yield [
+            "Financial",
+            "Contribution",
             get_member_name(c.contribution_user),
-            c.contribution_amount, 
+            c.contribution_amount,
             c.contribution_created_at.strftime("%Y-%m-%d"),
-            c.contribution_status, 
+            c.contribution_status,
             f"Type: {c.contribution_type}"
-        ])
+        ]
 
     # --- 4. LOANS & REPAYMENTS ---
-    for l in Loan.objects.filter(loan_chama=chama):
-
-        writer.writerow([
-            "Financial", 
-            "Loan Issued", 
+    loans = Loan.objects.filter(loan_chama=chama).select_related('loan_user').prefetch_related(
+        Prefetch('repayments', queryset=LoanRepayment.objects.order_by('id'))
+    )
+    for l in _chunked(loans):
+        yield [
+            "Financial",
+            "Loan Issued",
             get_member_name(l.loan_user),
-            l.loan_amount, 
+            l.loan_amount,
             l.loan_created_at.strftime("%Y-%m-%d"),
-            l.loan_status, 
+            l.loan_status,
             f"Due: {l.loan_deadline} | Outstanding: {l.loan_outstanding_balance}"
-        ])
-        for lr in LoanRepayment.objects.filter(loan_repayment_loan=l):
-            
-            writer.writerow([
+        ]
+        for lr in l.repayments.all():
+            yield [
                 "Financial",
                 "Loan Repayment",
                 get_member_name(l.loan_user),
@@ -163,23 +172,26 @@ def download_full_report(request, chama_id):
                 lr.loan_repayment_time.strftime("%Y-%m-%d"),
                 "Success",
                 f"Ref: {lr.loan_repayment_reference or 'N/A'}"
-            ])
+            ]
 
     # --- 5. PENALTIES ---
-    for p in Penalty.objects.filter(penalty_chama=chama):
-        writer.writerow([
-            "Financial", 
-            "Penalty", 
+    for p in _chunked(Penalty.objects.filter(penalty_chama=chama).select_related('penalty_user')):
+        yield [
+            "Financial",
+            "Penalty",
             get_member_name(p.penalty_user),
-            p.penalty_amount, 
+            p.penalty_amount,
             p.penalty_created_at.strftime("%Y-%m-%d"),
-            "Paid" if p.penalty_paid else "Unpaid", 
+            "Paid" if p.penalty_paid else "Unpaid",
             p.penalty_reason
-        ])
+        ]
 
     # --- 6. MEETINGS & ATTENDANCE ---
-    for meeting in Meeting.objects.filter(meeting_chama=chama):
-        writer.writerow([
+    meetings = Meeting.objects.filter(meeting_chama=chama).prefetch_related(
+        Prefetch('attendances', queryset=MeetingAttendance.objects.select_related('attendance_user').order_by('id'))
+    )
+    for meeting in _chunked(meetings):
+        yield [
             "Operations",
             "Meeting Event",
             "All Members",
@@ -187,9 +199,9 @@ def download_full_report(request, chama_id):
             meeting.meeting_date.strftime("%Y-%m-%d"),
             meeting.meeting_status,
             f"Title: {meeting.meeting_title} | Location: {meeting.meeting_venue}"
-        ])
-        for att in MeetingAttendance.objects.filter(attendance_meeting=meeting):
-            writer.writerow([
+        ]
+        for att in meeting.attendances.all():
+            yield [
                 "Operations",
                 "Meeting Attendance",
                 get_member_name(att.attendance_user),
@@ -197,18 +209,86 @@ def download_full_report(request, chama_id):
                 meeting.meeting_date.strftime("%Y-%m-%d"),
                 att.attendance_status,
                 f"Notes: {att.attendance_notes or 'None'}"
-            ])
+            ]
 
     # --- 7. NOTIFICATIONS ---
-    for note in Notification.objects.filter(notification_chama=chama):
-        writer.writerow([
+    for note in _chunked(Notification.objects.filter(notification_chama=chama).select_related('notification_user', 'notification_shared_message')):
+        yield [
             "Communication",
             "Notification",
             get_member_name(note.notification_user),
-            "", 
+            "",
             note.notification_created_at.strftime("%Y-%m-%d"),
             "Read" if note.notification_is_read else "Unread",
             f"Title: {note.notification_title} | Msg: {note.notification_message}"
-        ])
+        ]
+    for note in _chunked(ArchivedNotification.objects.filter(archived_notification_chama=chama).select_related('archived_notification_user')):
+        yield [
+            "Communication",
+            "Notification",
+            get_member_name(note.archived_notification_user),
+            "",
+            note.archived_notification_created_at.strftime("%Y-%m-%d"),
+            "Read",
+            f"Title: {note.archived_notification_title} | Msg: {note.archived_notification_message}"
+        ]
+
+
+@login_required
+def download_full_report(request, chama_id):
+    user = request.user
+    chama = Chama.objects.get(id=chama_id)
+
+    # Permission check
+    membership = Membership.objects.filter(
+        membership_user=user,
+        membership_chama=chama,
+        membership_status='active',
+        membership_role='admin'
+    ).first()
+
+    if not membership:
+        return HttpResponse("You do not have permission to download this report.", status=403)
+
+    return stream_csv(full_report_rows(chama), f"{chama.chama_name}_full_data_export.csv")
+
+
+# ---------------------- Member Summary & Transactions (download_report) ----------------------
+def members_report_rows(chama):
+    yield ['Member Name', 'Email', 'Phone', 'Role', 'Join Date', 'Total Contributed', 'Loan Status']
+
+    contributed = Contribution.objects.filter(
+        contribution_chama=chama, contribution_user=OuterRef('membership_user')
+    ).values('contribution_user').annotate(total=Sum('contribution_amount')).values('total')
+    active_loan = Loan.objects.filter(
+        loan_chama=chama, loan_user=OuterRef('membership_user'), loan_status='active'
+    )
+    members = Membership.objects.filter(membership_chama=chama).select_related('membership_user').annotate(
+        total_contributed=Subquery(contributed),
+        has_active_loan=Exists(active_loan),
+    )
+    for m in _chunked(members):
+        yield [
+            m.membership_user.get_full_name(),
+            m.membership_user.user_email,
+            m.membership_user.user_phone_number,
+            m.membership_role.title(),
+            m.membership_join_date.strftime("%Y-%m-%d"),
+            m.total_contributed or 0,
+            "Has Active Loan" if m.has_active_loan else "No Active Loan"
+        ]
+
+
+def transactions_report_rows(chama):
+    yield ['Transaction ID', 'User', 'Type', 'Amount', 'Date', 'Status']
 
-    return response
\ No newline at end of file
+    txs = Transaction.objects.filter(transaction_chama=chama).select_related('transaction_user')
+    for tx in txs.order_by('-transaction_created_at').iterator(chunk_size=settings.REPORT_CHUNK_SIZE):
+        yield [
+            tx.id,
+            tx.transaction_user.get_full_name() if tx.transaction_user else "",
+            tx.transaction_type,
+            tx.transaction_amount,
+            tx.transaction_created_at.strftime("%Y-%m-%d %H:%M"),
+            tx.transaction_status
+        ]
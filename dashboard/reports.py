@@ -0,0 +1,180 @@
+"""
+Database-backed queue for CSV report generation.
+
+Views call request_report(); the `run_report_worker` management command
+claims queued jobs, streams the CSV into REPORT_STORAGE_ROOT and notifies
+whoever asked for it. Jobs are keyed by chama, report type and
+report_version(), a data version stored in the database, so a report is
+generated once per data version however many officials request it.
+
+REPORT_STORAGE_ROOT is outside MEDIA_ROOT: finished files are only served
+by the download_report view, to officials of the chama. A new report
+deletes the files of older ones of the same type.
+"""
+import csv
+import secrets
+import tempfile
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from common.utils import send_chama_notification
+from dashboard.cache import chama_cache_version
+from dashboard.models import ReportJob
+from dashboard.report_views import (
+    Echo, financial_report_rows, full_report_rows, members_report_rows, transactions_report_rows
+)
+from notification.models import Notification
+
+# report type -> (row generator, roles allowed to request it, file name suffix)
+REPORTS = {
+    "financial": (financial_report_rows, ["treasurer", "admin"], "financial_report"),
+    "full": (full_report_rows, ["admin"], "full_data_export"),
+    "members": (members_report_rows, ["admin", "chairman"], "member_summary"),
+    "transactions": (transactions_report_rows, ["admin", "chairman", "treasurer"], "transactions"),
+}
+# Reports that include notifications
+NOTIFICATION_REPORTS = {"full"}
+
+
+def can_request(membership, report_type):
+    return report_type in REPORTS and membership.membership_role in REPORTS[report_type][1]
+
+
+def report_version(chama, report_type):
+    """
+    The data version a report is built for, read from the database so every
+    process agrees: the chama's dashboard cache version, plus the count and
+    latest change of its notifications for reports that include them
+    (notification writes do not bump the cache version).
+    """
+    version = str(chama_cache_version(chama.id))
+    if report_type in NOTIFICATION_REPORTS:
+        stats = Notification.objects.filter(notification_chama=chama).aggregate(
+            rows=Count("id"), last=Max("notification_updated_at")
+        )
+        last = int(stats["last"].timestamp() * 1000) if stats["last"] else 0
+        version = f"{version}-n{stats['rows']}-{last}"
+    return version
+
+
+def request_report(chama, report_type, user):
+    """
+    Return the job for the chama's current data version, queueing it if
+    needed, and add `user` to the people notified when it is ready.
+    """
+    version = report_version(chama, report_type)
+    try:
+        with transaction.atomic():
+            job, _ = ReportJob.objects.get_or_create(
+                report_job_chama=chama,
+                report_job_type=report_type,
+                report_job_version=version,
+            )
+    except IntegrityError:
+        job = ReportJob.objects.get(
+            report_job_chama=chama, report_job_type=report_type, report_job_version=version
+        )
+
+    if job.report_job_status == "failed":
+        ReportJob.objects.filter(id=job.id, report_job_status="failed").update(
+            report_job_status="queued", report_job_error=""
+        )
+        job.report_job_status = "queued"
+    if job.report_job_status != "ready":
+        job.report_job_requested_by.add(user)
+    return job
+
+
+def claim_report_jobs(batch_size=5):
+    """Atomically move up to batch_size queued jobs to 'running' (SKIP LOCKED)."""
+    with transaction.atomic():
+        ids = list(
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(report_job_status="queued")
+            .order_by("report_job_created_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        ReportJob.objects.filter(id__in=ids).update(
+            report_job_status="running",
+            report_job_attempts=F("report_job_attempts") + 1,
+        )
+    return list(
+        ReportJob.objects.filter(id__in=ids).select_related("report_job_chama").order_by("report_job_created_at")
+    )
+
+
+def run_report_job(job):
+    """Write the CSV for a claimed job, then notify everyone who asked for it."""
+    chama = job.report_job_chama
+    rows_fn, _, suffix = REPORTS[job.report_job_type]
+    writer = csv.writer(Echo())
+    rows = 0
+
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            for row in rows_fn(chama):
+                tmp.write(writer.writerow(row).encode())
+                rows += 1
+            tmp.seek(0)
+            name = f"{chama.id}/{suffix}_v{job.report_job_version}_{secrets.token_urlsafe(16)}.csv"
+            job.report_job_file.save(name, File(tmp), save=False)
+    except Exception as exc:
+        job.report_job_status = "failed"
+        job.report_job_error = str(exc)[:255]
+        job.report_job_finished_at = timezone.now()
+        job.save(update_fields=["report_job_status", "report_job_error", "report_job_finished_at"])
+        print(f"❌ Report job {job.id} failed: {exc}")
+        return job
+
+    job.report_job_status = "ready"
+    job.report_job_rows = max(rows - 1, 0)
+    job.report_job_finished_at = timezone.now()
+    job.save(update_fields=["report_job_status", "report_job_file", "report_job_rows", "report_job_finished_at"])
+
+    expire_older_reports(job)
+
+    unchanged = report_version(chama, job.report_job_type) == job.report_job_version
+    send_chama_notification(
+        chama,
+        job.report_job_requested_by.all(),
+        title=f"{job.get_report_job_type_display()} ready",
+        message=f"Your {job.get_report_job_type_display().lower()} for {chama.chama_name} is ready: {reverse('dashboard:download_report', args=[job.id])}",
+    )
+    if unchanged and job.report_job_type in NOTIFICATION_REPORTS:
+        # The ready notification changes this report's own version; re-key it
+        # so the next request for the same data still reuses this file
+        try:
+            with transaction.atomic():
+                ReportJob.objects.filter(id=job.id).update(
+                    report_job_version=report_version(chama, job.report_job_type)
+                )
+        except IntegrityError:
+            pass
+    print(f"✅ Report job {job.id} ready ({job.report_job_rows} rows)")
+    return job
+
+
+def expire_older_reports(job):
+    """Delete the files of earlier finished reports of the same chama and type."""
+    older = list(ReportJob.objects.filter(
+        report_job_chama_id=job.report_job_chama_id,
+        report_job_type=job.report_job_type,
+        report_job_status__in=["ready", "failed"],
+        report_job_created_at__lt=job.report_job_created_at,
+    ))
+    for old in older:
+        if old.report_job_file:
+            old.report_job_file.delete(save=False)
+    ReportJob.objects.filter(id__in=[old.id for old in older]).update(report_job_status="expired", report_job_file="")
+    return len(older)
+
+
+def report_filename(job):
+    suffix = REPORTS[job.report_job_type][2]
+    return f"{job.report_job_chama.chama_name}_{suffix}_{job.report_job_finished_at:%Y%m%d}.csv"
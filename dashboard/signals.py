@@ -0,0 +1,38 @@
+"""Bump a chama's dashboard cache version when data its dashboards show changes."""
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+
+from chama.models import Chama, JoinRequest, Membership
+from darajaapi.models import Transaction
+from dashboard.cache import bump_chama_cache_version
+from finance.models import Contribution, ContributionCycle, Loan, LoanRepayment, Penalty
+from notification.models import Meeting, MeetingAttendance
+
+# model -> the chama id a row belongs to
+CHAMA_OF = {
+    Chama: lambda row: row.pk,
+    Membership: lambda row: row.membership_chama_id,
+    JoinRequest: lambda row: row.join_request_chama_id,
+    Contribution: lambda row: row.contribution_chama_id,
+    ContributionCycle: lambda row: row.cycle_chama_id,
+    Loan: lambda row: row.loan_chama_id,
+    LoanRepayment: lambda row: row.loan_repayment_loan.loan_chama_id,
+    Penalty: lambda row: row.penalty_chama_id,
+    Transaction: lambda row: row.transaction_chama_id,
+    Meeting: lambda row: row.meeting_chama_id,
+    MeetingAttendance: lambda row: row.attendance_meeting.meeting_chama_id,
+}
+
+
+def _chama_changed(sender, instance, **kwargs):
+    try:
+        chama_id = CHAMA_OF[sender](instance)
+    except ObjectDoesNotExist:
+        # Related row already gone (cascade delete); the parent's own signal bumps.
+        return
+    bump_chama_cache_version(chama_id)
+
+
+for model in CHAMA_OF:
+    post_save.connect(_chama_changed, sender=model, dispatch_uid=f"dashboard_cache_save_{model.__name__}")
+    post_delete.connect(_chama_changed, sender=model, dispatch_uid=f"dashboard_cache_delete_{model.__name__}")
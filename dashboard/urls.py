@@ -2,7 +2,7 @@ from django.urls import path
 from dashboard.dashboard_views import (
     dashboard, switch_role, member_dashboard, admin_dashboard,
     secretary_dashboard, treasurer_dashboard, dashboard_search,
-    assign_role, edit_member, delete_member 
+    assign_role, edit_member, delete_member, chama_activity, request_report, download_report
     # REMOVED: update_profile_picture from imports
 )
 from dashboard.report_views import download_financial_report, download_full_report
@@ -22,9 +22,14 @@ urlpatterns = [
     # Reports
     path("report/financial/<int:chama_id>/", download_financial_report, name="financial_report"),
     path("report/full/<int:chama_id>/", download_full_report, name="full_report"),
+    path("report/request/<int:chama_id>/<str:report_type>/", request_report, name="request_report"),
+    path("report/download/<int:job_id>/", download_report, name="download_report"),
     
     # Search
     path("chama/<int:chama_id>/search/", dashboard_search, name="dashboard_search"),
+
+    # Activity feed (JSON, keyset paginated)
+    path("chama/<int:chama_id>/activity/", chama_activity, name="chama_activity"),
     
     # Actions
     path('admin/<int:chama_id>/assign-role/', assign_role, name='assign_role'),
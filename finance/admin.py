@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Penalty, ContributionCycle, Contribution, Loan, LoanRepayment
+from .models import Penalty, ContributionCycle, Contribution, Loan, LoanInstallment, LoanRepayment, ChamaFinancialSnapshot, ChamaMonthlyRollup
 
 
 @admin.register(Penalty)
@@ -26,15 +26,36 @@ class ContributionAdmin(admin.ModelAdmin):
 
 @admin.register(Loan)
 class LoanAdmin(admin.ModelAdmin):
-    list_display = ("id", "loan_user", "loan_chama", "loan_amount", "loan_interest_rate", "loan_total_payable", "loan_purpose", "loan_status", "loan_deadline", "loan_outstanding_balance", "loan_reference", "loan_created_at")
+    list_display = ("id", "loan_user", "loan_chama", "loan_amount", "loan_interest_rate", "loan_interest_method", "loan_total_payable", "loan_purpose", "loan_status", "loan_deadline", "loan_outstanding_balance", "loan_arrears", "loan_days_past_due", "loan_reference", "loan_created_at")
     search_fields = ("loan_user__username", "loan_chama__chama_name", "loan_purpose", "loan_reference")
     list_filter = ("loan_status", "loan_chama", "loan_deadline")
     date_hierarchy = "loan_deadline"
 
 
+@admin.register(LoanInstallment)
+class LoanInstallmentAdmin(admin.ModelAdmin):
+    list_display = ("loan_installment_loan", "loan_installment_number", "loan_installment_due_date", "loan_installment_principal", "loan_installment_interest", "loan_installment_amount", "loan_installment_paid", "loan_installment_paid_at")
+    search_fields = ("loan_installment_loan__id",)
+    list_filter = ("loan_installment_due_date",)
+    date_hierarchy = "loan_installment_due_date"
+
+
 @admin.register(LoanRepayment)
 class LoanRepaymentAdmin(admin.ModelAdmin):
     list_display = ("loan_repayment_loan", "loan_repayment_user", "loan_repayment_amount", "loan_repayment_time", "loan_repayment_mpesa_receipt", "loan_repayment_reference")
     search_fields = ("loan_repayment_user__username", "loan_repayment_loan__id", "loan_repayment_mpesa_receipt", "loan_repayment_reference")
     list_filter = ("loan_repayment_time", "loan_repayment_user")
     date_hierarchy = "loan_repayment_time"
+
+
+@admin.register(ChamaFinancialSnapshot)
+class ChamaFinancialSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("snapshot_chama", "snapshot_total_collected", "snapshot_contribution_count", "snapshot_penalty_total", "snapshot_unpaid_penalty_amount", "snapshot_active_loan_count", "snapshot_outstanding_loan_balance", "snapshot_updated_at")
+    search_fields = ("snapshot_chama__chama_name",)
+
+
+@admin.register(ChamaMonthlyRollup)
+class ChamaMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("rollup_chama", "rollup_month", "rollup_contributions_amount", "rollup_contributions_count", "rollup_penalties_amount", "rollup_loans_disbursed", "rollup_repayments_amount")
+    list_filter = ("rollup_chama",)
+    date_hierarchy = "rollup_month"
@@ -0,0 +1,357 @@
+"""
+Synthetic data and an end-to-end benchmark of the payment pipeline.
+
+`seed_benchmark_data` fills the database with benchmark chamas, members,
+cycles and settled contributions. `benchmark_payments` then drives
+create_contribution -> STK push -> callback -> update_related_record
+against an in-process Daraja simulator and reports latency, throughput and
+SQL queries per step. Run both against a dedicated database and cache.
+"""
+import json
+import queue
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from chama.models import Chama, Membership
+from darajaapi.accesstoken import refresh_access_token
+from darajaapi.callbacks import process_inbox_entry
+from darajaapi.jobs import run_job
+from darajaapi.models import CallbackInbox, StkPushJob
+from darajaapi.simulator import SimulatorConfig, build_server
+from finance.models import Contribution, ContributionCycle
+
+User = get_user_model()
+
+BENCHMARK_CHAMA_PREFIX = "Benchmark Chama"
+BENCHMARK_EMAIL_DOMAIN = "benchmark.smartchama.test"
+
+
+def _bulk(model, objs, batch_size):
+    return model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def generate_data(chamas=1, members=1000, cycles=12, contributions=12, batch_size=1000, seed=None):
+    """
+    Create benchmark chamas with `members` members each, `cycles` monthly
+    cycles (the newest still open) and up to `contributions` settled
+    contributions per member. Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    user_offset = User.objects.filter(user_email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}").count()
+    chama_offset = Chama.objects.filter(chama_name__startswith=BENCHMARK_CHAMA_PREFIX).count()
+    password = make_password(None)
+    summary = {"chamas": 0, "members": 0, "cycles": 0, "contributions": 0}
+
+    for c in range(chamas):
+        with transaction.atomic():
+            chama = Chama.objects.create(
+                chama_name=f"{BENCHMARK_CHAMA_PREFIX} {chama_offset + c + 1}",
+                chama_description="Synthetic data for payment benchmarks",
+                chama_contribution_amount=Decimal("500"),
+                chama_max_members=members,
+            )
+
+            start = user_offset + c * members
+            users = _bulk(User, [
+                User(
+                    user_email=f"member{n}@{BENCHMARK_EMAIL_DOMAIN}",
+                    user_first_name="Bench",
+                    user_last_name=f"Member{n}",
+                    user_national_id=f"B{n:07d}",
+                    user_phone_number=f"+2547{n % 10 ** 8:08d}",
+                    password=password,
+                )
+                for n in range(start, start + members)
+            ], batch_size)
+            if not users or users[0].pk is None:
+                users = list(User.objects.filter(
+                    user_email__in=[u.user_email for u in users]
+                ).order_by("id"))
+
+            _bulk(Membership, [
+                Membership(
+                    membership_user=u,
+                    membership_chama=chama,
+                    membership_role="admin" if i == 0 else "member",
+                )
+                for i, u in enumerate(users)
+            ], batch_size)
+
+            cycle_objs = _bulk(ContributionCycle, [
+                ContributionCycle(
+                    cycle_chama=chama,
+                    cycle_name=f"Cycle {i + 1}",
+                    cycle_type="fixed_rota",
+                    cycle_amount_required=chama.chama_contribution_amount,
+                    cycle_deadline=(now + timedelta(days=30 * (i - cycles + 2))).date(),
+                    cycle_status="open" if i == cycles - 1 else "closed",
+                )
+                for i in range(cycles)
+            ], batch_size)
+            if cycle_objs and cycle_objs[0].pk is None:
+                cycle_objs = list(ContributionCycle.objects.filter(cycle_chama=chama).order_by("id"))
+
+            batch = []
+            receipt_base = f"{chama.id:04d}"
+            for u in users:
+                for cycle in cycle_objs[:contributions]:
+                    batch.append(Contribution(
+                        contribution_user=u,
+                        contribution_chama=chama,
+                        contribution_cycle=cycle,
+                        contribution_amount=chama.chama_contribution_amount,
+                        contribution_type="contribution",
+                        contribution_status=rng.choices(["success", "failed"], [9, 1])[0],
+                        contribution_mpesa_receipt=f"BM{receipt_base}{len(batch) + summary['contributions']:010d}",
+                        contribution_phone=u.user_phone_number,
+                        contribution_time=now - timedelta(days=rng.randint(0, 30 * cycles)),
+                    ))
+                    if len(batch) >= batch_size:
+                        _bulk(Contribution, batch, batch_size)
+                        summary["contributions"] += len(batch)
+                        batch = []
+            _bulk(Contribution, batch, batch_size)
+            summary["contributions"] += len(batch)
+
+        summary["chamas"] += 1
+        summary["members"] += len(users)
+        summary["cycles"] += len(cycle_objs)
+    return summary
+
+
+def flush_data():
+    """Delete every benchmark chama and user (and, by cascade, their records)."""
+    chamas, _ = Chama.objects.filter(chama_name__startswith=BENCHMARK_CHAMA_PREFIX).delete()
+    users, _ = User.objects.filter(user_email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}").delete()
+    return chamas + users
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(name, latencies, queries, errors, wall):
+    ms = [v * 1000 for v in latencies]
+    return {
+        "step": name,
+        "count": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(latencies) / wall, 2) if wall else None,
+        "latency_ms": {
+            "p50": _round(percentile(ms, 50)),
+            "p95": _round(percentile(ms, 95)),
+            "p99": _round(percentile(ms, 99)),
+            "mean": _round(sum(ms) / len(ms)) if ms else None,
+            "max": _round(max(ms)) if ms else None,
+        },
+        "queries": {
+            "mean": _round(sum(queries) / len(queries)) if queries else None,
+            "max": max(queries) if queries else None,
+            "total": sum(queries),
+        },
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def run_step(name, items, fn, concurrency):
+    """
+    Call fn(item) for every item on `concurrency` threads, timing each call
+    and counting the SQL queries it runs. Failed calls count as errors.
+    """
+    work = queue.SimpleQueue()
+    for item in items:
+        work.put(item)
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                try:
+                    item = work.get_nowait()
+                except queue.Empty:
+                    return
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    try:
+                        fn(item)
+                        failed = False
+                    except Exception as e:
+                        print(f"❌ {name} failed: {str(e)}")
+                        failed = True
+                    elapsed = time.perf_counter() - started
+                with lock:
+                    if failed:
+                        errors.append(item)
+                    else:
+                        latencies.append(elapsed)
+                        queries.append(len(ctx.captured_queries))
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"bench-{name}-{i}") for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(name, latencies, queries, len(errors), time.perf_counter() - started)
+
+
+def benchmark_chama(chama_id=None):
+    qs = Chama.objects.filter(chama_name__startswith=BENCHMARK_CHAMA_PREFIX)
+    if chama_id:
+        qs = Chama.objects.filter(id=chama_id)
+    return qs.order_by("-id").first()
+
+
+def run_pipeline(chama, payments=200, concurrency=8, simulator_config=None):
+    """
+    Push `payments` contributions from distinct members of `chama` through
+    every step of the pipeline and return the per-step results.
+    """
+    config = simulator_config or SimulatorConfig(latency=0.05, jitter=0.0)
+    config.callback_url = None
+    config.drop_callback_rate = 1.0  # callbacks are posted by the "callback" step
+    config.callback_delay = 0.0
+
+    members = list(
+        Membership.objects.filter(membership_chama=chama, membership_status="active")
+        .select_related("membership_user").order_by("id")[:payments]
+    )
+    cycle = ContributionCycle.objects.filter(
+        cycle_chama=chama, cycle_status="open", cycle_deadline__gte=timezone.now().date()
+    ).first()
+
+    # Log every member in up front so sessions are not part of the timings
+    clients = {}
+    for m in members:
+        client = Client()
+        client.force_login(m.membership_user)
+        clients[m.membership_user_id] = client
+    start_id = Contribution.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+    server = build_server("127.0.0.1", 0, config, quiet=True)
+    threading.Thread(target=server.serve_forever, name="daraja-simulator", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    steps = []
+    started = time.perf_counter()
+    try:
+        with override_settings(MPESA_BASE_URL=base_url):
+            refresh_access_token(force=True)
+
+            def create(member):
+                response = clients[member.membership_user_id].post(
+                    reverse("finance:create_contribution", args=[chama.id]),
+                    {
+                        "cycle_id": cycle.id if cycle else "",
+                        "amount": str(chama.chama_contribution_amount),
+                        "phone": member.membership_user.user_phone_number,
+                        "contribution_type": "contribution",
+                    },
+                )
+                if response.status_code != 302:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+            steps.append(run_step("create_contribution", members, create, concurrency))
+
+            created = list(Contribution.objects.filter(
+                contribution_chama=chama, id__gt=start_id
+            ).values_list("id", flat=True))
+            jobs = list(StkPushJob.objects.filter(job_contribution_id__in=created).select_related(
+                "job_user", "job_chama", "job_contribution", "job_loan", "job_penalty"
+            ))
+
+            def push(job):
+                StkPushJob.objects.filter(id=job.id).update(job_status="running")
+                if run_job(job).job_status != "sent":
+                    raise RuntimeError(job.job_message)
+            steps.append(run_step("stk_push", jobs, push, concurrency))
+
+            checkout_ids = list(StkPushJob.objects.filter(
+                id__in=[j.id for j in jobs], job_status="sent"
+            ).values_list("job_checkout_request_id", flat=True))
+            local = threading.local()
+
+            def callback(checkout_id):
+                if not hasattr(local, "client"):
+                    local.client = Client()
+                response = local.client.post(
+                    reverse("darajaapi:stk_callback"),
+                    data=json.dumps(server.simulator.callback_payload(checkout_id)),
+                    content_type="application/json",
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+            steps.append(run_step("callback", checkout_ids, callback, concurrency))
+
+            entries = list(CallbackInbox.objects.filter(
+                inbox_checkout_request_id__in=checkout_ids, inbox_status="pending"
+            ).values_list("id", flat=True))
+
+            def apply(entry_id):
+                with transaction.atomic():
+                    entry = CallbackInbox.objects.select_for_update().get(id=entry_id)
+                    if not process_inbox_entry(entry):
+                        raise RuntimeError(entry.inbox_error)
+            steps.append(run_step("update_related_record", entries, apply, concurrency))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    wall = time.perf_counter() - started
+    settled = Contribution.objects.filter(
+        contribution_chama=chama, id__gt=start_id
+    ).exclude(contribution_status="pending").count()
+    return {
+        "chama_id": chama.id,
+        "payments": len(members),
+        "concurrency": concurrency,
+        "database": connection.vendor,
+        "daraja_latency_ms": round(config.latency * 1000, 2),
+        "steps": steps,
+        "end_to_end": {
+            "settled": settled,
+            "wall_seconds": round(wall, 3),
+            "throughput_per_second": round(settled / wall, 2) if wall else None,
+        },
+        "simulator": server.simulator.stats,
+    }
+
+
+def compare_results(previous, current):
+    """Per-step p95 latency and mean query changes between two result files."""
+    before = {s["step"]: s for s in previous.get("steps", [])}
+    rows = []
+    for step in current["steps"]:
+        old = before.get(step["step"])
+        if not old:
+            continue
+        rows.append({
+            "step": step["step"],
+            "p95_ms": (old["latency_ms"]["p95"], step["latency_ms"]["p95"]),
+            "queries_mean": (old["queries"]["mean"], step["queries"]["mean"]),
+            "throughput_per_second": (old["throughput_per_second"], step["throughput_per_second"]),
+        })
+    return rows
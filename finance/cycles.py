@@ -0,0 +1,119 @@
+"""
+Per-member cycle shares and balances.
+
+with_user_paid() annotates any cycle queryset with what one member has
+paid towards each cycle in a single grouped query; apply_member_balance()
+turns that into the share, balance and paid flag shown on the cycle list
+and on the member dashboard's contribution status card.
+
+compliance_matrix() applies the same rule to every active member and the
+chama's recent cycles at once: one grouped query returns only the
+(member, cycle) pairs that have payments, and the grid is filled in from
+those.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from chama.models import Membership
+from finance.models import Contribution, ContributionCycle
+
+# Compliance matrix cell states, one character per cell
+UNPAID, PARTIAL, PAID = "0", "1", "2"
+STATES = {UNPAID: "unpaid", PARTIAL: "partial", PAID: "paid"}
+MAX_MATRIX_CYCLES = 240
+
+
+def with_user_paid(cycles, user):
+    """Annotate `user_paid`: the user's successful contributions to each cycle."""
+    paid = Q(
+        contributions__contribution_user=user,
+        contributions__contribution_status="success",
+        contributions__contribution_chama=F("cycle_chama"),
+    )
+    return cycles.annotate(
+        user_paid=Coalesce(
+            Sum("contributions__contribution_amount", filter=paid),
+            Value(Decimal("0")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+def apply_member_balance(cycle, paid, active_members):
+    """Attach per_member_share, user_paid, user_balance and is_fully_paid to a cycle."""
+    per_member_share = member_share(cycle.cycle_amount_required, active_members)
+    balance = max(per_member_share - paid, 0)
+
+    cycle.per_member_share = per_member_share
+    cycle.user_paid = paid
+    cycle.user_balance = balance
+    cycle.is_fully_paid = balance < 1  # Treat less than 1 KES as paid to avoid rounding issues
+    return cycle
+
+
+def member_share(amount_required, active_members):
+    total_target = amount_required or 0
+    return total_target / active_members if active_members > 0 else 0
+
+
+def payment_state(share, paid):
+    if share - paid < 1:
+        return PAID
+    return PARTIAL if paid > 0 else UNPAID
+
+
+def compliance_matrix(chama, cycle_limit=12):
+    """
+    Paid/partial/unpaid state of every active member for the chama's
+    `cycle_limit` most recent cycles, as a compact JSON-ready dict: each
+    entry of `rows` is one member's states as a string with one character
+    per cycle, in the order of `cycles`.
+    """
+    members = list(
+        Membership.objects.filter(membership_chama=chama, membership_status="active")
+        .order_by("membership_user__user_first_name", "membership_user_id")
+        .values_list("membership_user_id", "membership_user__user_first_name", "membership_user__user_last_name")
+    )
+    cycles = list(
+        ContributionCycle.objects.filter(cycle_chama=chama)
+        .order_by("-cycle_deadline", "-id")
+        .values_list("id", "cycle_name", "cycle_deadline", "cycle_amount_required")[:cycle_limit]
+    )
+
+    member_index = {user_id: i for i, (user_id, *_) in enumerate(members)}
+    cycle_index = {cycle_id: j for j, (cycle_id, *_) in enumerate(cycles)}
+    shares = [member_share(amount, len(members)) for *_, amount in cycles]
+
+    grid = [[UNPAID] * len(cycles) for _ in members]
+    paid_counts = [0] * len(cycles)
+    cells = (
+        Contribution.objects.filter(
+            contribution_chama=chama,
+            contribution_status="success",
+            contribution_cycle_id__in=list(cycle_index),
+        )
+        .values("contribution_user_id", "contribution_cycle_id")
+        .annotate(paid=Sum("contribution_amount"))
+        .order_by()
+    )
+    for cell in cells:
+        i = member_index.get(cell["contribution_user_id"])
+        if i is None:
+            continue  # Payments by members who have since left
+        j = cycle_index[cell["contribution_cycle_id"]]
+        state = payment_state(shares[j], cell["paid"])
+        grid[i][j] = state
+        paid_counts[j] += state == PAID
+
+    return {
+        "states": STATES,
+        "cycles": [
+            [cycle_id, name, deadline.isoformat(), str(round(Decimal(share), 2))]
+            for (cycle_id, name, deadline, _), share in zip(cycles, shares)
+        ],
+        "members": [[user_id, f"{first} {last}".strip()] for user_id, first, last in members],
+        "rows": ["".join(row) for row in grid],
+        "paid_counts": paid_counts,
+    }
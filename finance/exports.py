@@ -0,0 +1,188 @@
+"""
+Typed, compressed ledger exports for the analytics pipeline.
+
+Contributions, STK transactions, loans and penalties are written as
+Parquet or Arrow IPC files with one typed column per model field. Rows are
+read with values_list() in keyset-paginated chunks ordered by
+(watermark, id), so no model instances are built, memory stays flat and
+each chunk is a range scan of the ledger's (watermark, id) index.
+
+Incremental runs pass the watermark reached by the previous run; only rows
+whose watermark column is newer are exported. Rows are only read up to
+`now - lag`, so a row whose transaction commits up to `lag` seconds after
+its timestamp was set is not skipped.
+
+Requires pyarrow (`pip install pyarrow`), which is optional for the rest
+of the app.
+"""
+from datetime import datetime, timedelta
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from darajaapi.models import Transaction
+from finance.models import Contribution, Loan, Penalty
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# ledger -> (model, chama field, watermark field)
+LEDGERS = {
+    "contributions": (Contribution, "contribution_chama", "contribution_updated_at"),
+    "transactions": (Transaction, "transaction_chama", "transaction_updated_at"),
+    "loans": (Loan, "loan_chama", "loan_updated_at"),
+    # Penalties have no update timestamp; incremental runs pick up new rows only
+    "penalties": (Penalty, "penalty_chama", "penalty_created_at"),
+}
+
+FORMATS = ("parquet", "arrow")
+COMPRESSIONS = ("zstd", "gzip")
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ExportUnavailable("Ledger exports need pyarrow: pip install pyarrow")
+
+
+def arrow_type(field):
+    """The Arrow column type for a model field."""
+    if isinstance(field, models.ForeignKey):
+        field = field.target_field
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def ledger_schema(model):
+    """(column names, Arrow schema) for every concrete field of the model."""
+    fields = model._meta.concrete_fields
+    columns = [field.attname for field in fields]
+    schema = pa.schema([pa.field(field.attname, arrow_type(field)) for field in fields])
+    return columns, schema
+
+
+def iter_chunks(ledger, columns, chama_ids=None, since=None, until=None, chunk_size=10000):
+    """
+    Yield lists of value tuples in (watermark, id) order. `since` is a
+    (timestamp, id) pair; only rows after it are returned.
+    """
+    model, chama_field, watermark_field = LEDGERS[ledger]
+    queryset = model.objects.all()
+    if chama_ids:
+        queryset = queryset.filter(**{f"{chama_field}__in": chama_ids})
+    if until:
+        queryset = queryset.filter(**{f"{watermark_field}__lt": until})
+
+    position = since
+    while True:
+        chunk = queryset
+        if position:
+            watermark, last_id = position
+            chunk = chunk.filter(
+                Q(**{f"{watermark_field}__gt": watermark}) | Q(**{watermark_field: watermark, "id__gt": last_id})
+            )
+        rows = list(
+            chunk.order_by(watermark_field, "id").values_list(watermark_field, *columns)[:chunk_size]
+        )
+        if not rows:
+            return
+        position = (rows[-1][0], rows[-1][1 + columns.index("id")])
+        yield [row[1:] for row in rows], position
+        if len(rows) < chunk_size:
+            return
+
+
+class LedgerWriter:
+    """Append record batches to a Parquet or Arrow IPC file."""
+
+    def __init__(self, path, schema, file_format, compression):
+        self.schema = schema
+        self.sink = None
+        if file_format == "parquet":
+            self.writer = pq.ParquetWriter(path, schema, compression=compression)
+        elif compression == "zstd":
+            self.writer = pa.ipc.new_file(
+                path, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+            )
+        else:
+            # Arrow IPC has no gzip codec; gzip the whole stream instead
+            self.sink = pa.CompressedOutputStream(path, "gzip")
+            self.writer = pa.ipc.new_stream(self.sink, schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+def file_suffix(file_format, compression):
+    if file_format == "parquet":
+        return ".parquet"
+    return ".arrow" if compression == "zstd" else ".arrows.gz"
+
+
+def export_ledger(ledger, directory, file_format="parquet", compression="zstd",
+                  chama_ids=None, since=None, lag_seconds=60, chunk_size=10000):
+    """
+    Export one ledger into `directory`. Returns (path or None, rows, watermark)
+    where watermark is the (timestamp, id) to pass as `since` next time.
+    No file is written when there are no new rows.
+    """
+    require_pyarrow()
+    model = LEDGERS[ledger][0]
+    columns, schema = ledger_schema(model)
+    until = timezone.now() - timedelta(seconds=lag_seconds)
+    stamp = until.strftime("%Y%m%dT%H%M%SZ")
+    path = directory / f"{ledger}-{stamp}{file_suffix(file_format, compression)}"
+
+    writer = None
+    rows_written = 0
+    watermark = since
+    try:
+        for rows, watermark in iter_chunks(ledger, columns, chama_ids, since, until, chunk_size):
+            if writer is None:
+                writer = LedgerWriter(str(path), schema, file_format, compression)
+            writer.write(rows)
+            rows_written += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return (path if writer else None), rows_written, watermark
+
+
+def dump_watermark(watermark):
+    if not watermark:
+        return None
+    return {"timestamp": watermark[0].isoformat(), "id": watermark[1]}
+
+
+def load_watermark(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value["timestamp"]), int(value["id"])
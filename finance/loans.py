@@ -0,0 +1,202 @@
+"""
+Loan interest, installment schedules, repayment allocation and arrears.
+
+A loan's interest rate covers its whole term and is split evenly over its
+installments, so a single-installment loan costs the same under every
+method. Flat interest is charged on the original principal, reducing
+balance uses equal amortized payments, and compound interest compounds
+once per installment period.
+
+The schedule is stored as LoanInstallment rows when the loan is disbursed.
+Each repayment fills the oldest unpaid installments. refresh_loans()
+computes arrears and days past due for any set of loans with one grouped
+query and marks loans past LOAN_DEFAULT_DAYS as defaulted. The
+`refresh_loan_arrears` command runs it daily for every chama.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Min, Sum
+from django.utils import timezone
+
+from dashboard.cache import bump_chama_cache_version
+from finance import rollups
+from finance.models import Loan, LoanInstallment, LoanRepayment
+
+CENTS = Decimal("0.01")
+MAX_LOAN_INSTALLMENTS = 60
+
+
+def money(value):
+    return Decimal(value).quantize(CENTS)
+
+
+def schedule_amounts(principal, rate, method="flat", count=1):
+    """[(principal, interest), ...] for each installment, in cents, summing exactly."""
+    principal = Decimal(principal)
+    count = max(int(count or 1), 1)
+    period_rate = Decimal(rate) / 100 / count
+
+    if method == "reducing" and period_rate:
+        payment = principal * period_rate / (1 - (1 + period_rate) ** -count)
+        rows, balance = [], principal
+        for _ in range(count):
+            interest = balance * period_rate
+            rows.append((payment - interest, interest))
+            balance -= payment - interest
+    elif method == "compound":
+        total = principal * (1 + period_rate) ** count
+        rows = [(principal / count, (total - principal) / count)] * count
+    else:
+        rows = [(principal / count, principal * Decimal(rate) / 100 / count)] * count
+
+    # Round each row to cents; the last installment absorbs the remainders
+    total_principal = money(principal)
+    total_interest = money(sum(interest for _, interest in rows))
+    rounded = [(money(p), money(i)) for p, i in rows[:-1]]
+    rounded.append((
+        total_principal - sum(p for p, _ in rounded),
+        total_interest - sum(i for _, i in rounded),
+    ))
+    return rounded
+
+
+def total_payable(principal, rate, method="flat", count=1):
+    return sum(p + i for p, i in schedule_amounts(principal, rate, method, count))
+
+
+def due_dates(start, deadline, count):
+    """`count` dates evenly spaced after `start`, the last one on `deadline`."""
+    if deadline <= start:
+        return [deadline] * count
+    term = deadline - start
+    return [start + term * k // count for k in range(1, count + 1)]
+
+
+def build_schedule(loan, start=None):
+    """
+    (Re)create the loan's installments from `start` (default: today) to its
+    deadline and apply what has already been repaid.
+    """
+    start = start or timezone.localdate()
+    deadline = loan.loan_deadline
+    if isinstance(deadline, str):
+        deadline = Loan._meta.get_field("loan_deadline").to_python(deadline)
+
+    amounts = schedule_amounts(
+        loan.loan_amount, loan.loan_interest_rate, loan.loan_interest_method, loan.loan_installment_count
+    )
+    dates = due_dates(start, deadline, len(amounts))
+    LoanInstallment.objects.filter(loan_installment_loan=loan).delete()
+    LoanInstallment.objects.bulk_create([
+        LoanInstallment(
+            loan_installment_loan=loan,
+            loan_installment_number=number,
+            loan_installment_due_date=due,
+            loan_installment_principal=principal,
+            loan_installment_interest=interest,
+            loan_installment_amount=principal + interest,
+        )
+        for number, ((principal, interest), due) in enumerate(zip(amounts, dates), start=1)
+    ])
+
+    repaid = LoanRepayment.objects.filter(loan_repayment_loan=loan).aggregate(
+        total=Sum("loan_repayment_amount")
+    )["total"]
+    if repaid:
+        allocate_repayment(loan, repaid)
+
+
+def allocate_repayment(loan, amount, paid_at=None):
+    """
+    Fill the loan's oldest unpaid installments with `amount`. Only the
+    installments that change are written. Returns what is left over.
+    """
+    paid_at = paid_at or timezone.now()
+    remaining = Decimal(amount)
+    changed = []
+    unpaid = LoanInstallment.objects.filter(
+        loan_installment_loan=loan, loan_installment_paid__lt=F("loan_installment_amount")
+    ).order_by("loan_installment_number")
+
+    for installment in unpaid:
+        if remaining <= 0:
+            break
+        applied = min(remaining, installment.loan_installment_amount - installment.loan_installment_paid)
+        installment.loan_installment_paid += applied
+        if installment.loan_installment_paid >= installment.loan_installment_amount:
+            installment.loan_installment_paid_at = paid_at
+        remaining -= applied
+        changed.append(installment)
+
+    LoanInstallment.objects.bulk_update(changed, ["loan_installment_paid", "loan_installment_paid_at"])
+    return remaining
+
+
+def ensure_schedules(loans):
+    """Give loans disbursed before schedules existed a single installment due on their deadline."""
+    missing = list(loans.filter(installments__isnull=True, loan_status__in=["active", "defaulted"]))
+    for loan in missing:
+        start = timezone.localdate(loan.loan_disbursed_at or loan.loan_created_at)
+        build_schedule(loan, start=start)
+    return len(missing)
+
+
+def refresh_loans(loans, today=None):
+    """
+    Store arrears and days past due for every loan in the queryset and
+    default active loans more than LOAN_DEFAULT_DAYS behind. Returns
+    (loans updated, loans defaulted).
+    """
+    today = today or timezone.localdate()
+    overdue = {
+        row["loan_installment_loan"]: row
+        for row in LoanInstallment.objects.filter(
+            loan_installment_loan__in=loans,
+            loan_installment_due_date__lt=today,
+            loan_installment_paid__lt=F("loan_installment_amount"),
+        )
+        .values("loan_installment_loan")
+        .annotate(
+            arrears=Sum(F("loan_installment_amount") - F("loan_installment_paid")),
+            oldest_due=Min("loan_installment_due_date"),
+        )
+        .order_by()
+    }
+
+    changed, to_default, chama_ids = [], [], set()
+    for loan in loans.only("id", "loan_chama", "loan_status", "loan_arrears", "loan_days_past_due"):
+        row = overdue.get(loan.id)
+        arrears = money(row["arrears"]) if row else Decimal("0.00")
+        days = (today - row["oldest_due"]).days if row else 0
+        if (arrears, days) != (loan.loan_arrears, loan.loan_days_past_due):
+            loan.loan_arrears, loan.loan_days_past_due = arrears, days
+            changed.append(loan)
+            chama_ids.add(loan.loan_chama_id)
+        if loan.loan_status == "active" and days >= settings.LOAN_DEFAULT_DAYS:
+            to_default.append(loan.id)
+
+    now = timezone.now()
+    for loan in changed:
+        loan.loan_updated_at = now
+    Loan.objects.bulk_update(changed, ["loan_arrears", "loan_days_past_due", "loan_updated_at"], batch_size=500)
+
+    defaulted = list(Loan.objects.filter(id__in=to_default, loan_status="active"))
+    if defaulted:
+        Loan.objects.filter(id__in=[loan.id for loan in defaulted]).update(
+            loan_status="defaulted", loan_updated_at=now
+        )
+        rollups.loans_defaulted(defaulted)
+        chama_ids.update(loan.loan_chama_id for loan in defaulted)
+
+    for chama_id in chama_ids:
+        bump_chama_cache_version(chama_id)
+    return len(changed), len(defaulted)
+
+
+def repayment_progress(loan):
+    """Percentage of the total payable that has been repaid."""
+    if not loan or not loan.loan_total_payable:
+        return 0
+    repaid = loan.loan_total_payable - loan.loan_outstanding_balance
+    return max(min(repaid / loan.loan_total_payable * 100, 100), 0)
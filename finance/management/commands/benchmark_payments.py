@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from darajaapi.simulator import SimulatorConfig
+from finance.benchmark import benchmark_chama, compare_results, run_pipeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark create_contribution -> STK push -> callback -> update_related_record "
+        "against a local Daraja simulator and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chama", type=int, help="Chama id (default: newest benchmark chama).")
+        parser.add_argument("--payments", type=int, default=200, help="Payments to push, one per member.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--daraja-latency", type=float, default=0.05, help="Simulated Daraja latency in seconds.")
+        parser.add_argument("--cancel-rate", type=float, default=0.1)
+        parser.add_argument("--fail-rate", type=float, default=0.05)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--output", help="Results file (default: benchmark_payments_<timestamp>.json).")
+        parser.add_argument("--compare", help="Earlier results file to compare against.")
+
+    def handle(self, *args, **options):
+        chama = benchmark_chama(options["chama"])
+        if not chama:
+            raise CommandError("No benchmark chama found. Run `manage.py seed_benchmark_data` first.")
+
+        config = SimulatorConfig(
+            latency=options["daraja_latency"],
+            jitter=0.0,
+            cancel_rate=options["cancel_rate"],
+            fail_rate=options["fail_rate"],
+            seed=options["seed"],
+        )
+        results = run_pipeline(chama, options["payments"], options["concurrency"], config)
+        results["run_at"] = timezone.now().isoformat()
+
+        self.stdout.write(f"{'step':<24}{'count':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'/s':>9}{'q/op':>7}")
+        for step in results["steps"]:
+            lat = step["latency_ms"]
+            self.stdout.write(
+                f"{step['step']:<24}{step['count']:>7}{step['errors']:>5}"
+                f"{lat['p50'] or 0:>9.1f}{lat['p95'] or 0:>9.1f}{lat['p99'] or 0:>9.1f}"
+                f"{step['throughput_per_second'] or 0:>9.1f}{step['queries']['mean'] or 0:>7.1f}"
+            )
+        e2e = results["end_to_end"]
+        self.stdout.write(f"End to end: {e2e['settled']} settled in {e2e['wall_seconds']}s "
+                          f"({e2e['throughput_per_second']}/s)")
+
+        if options["compare"]:
+            previous = json.loads(Path(options["compare"]).read_text())
+            for row in compare_results(previous, results):
+                self.stdout.write(
+                    f"{row['step']:<24} p95 {row['p95_ms'][0]} -> {row['p95_ms'][1]} ms, "
+                    f"queries {row['queries_mean'][0]} -> {row['queries_mean'][1]}, "
+                    f"throughput {row['throughput_per_second'][0]} -> {row['throughput_per_second'][1]}/s"
+                )
+
+        output = Path(options["output"] or f"benchmark_payments_{timezone.now():%Y%m%d_%H%M%S}.json")
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.exports import (
+    COMPRESSIONS, FORMATS, LEDGERS, ExportUnavailable, dump_watermark, export_ledger, load_watermark,
+    require_pyarrow,
+)
+
+
+class Command(BaseCommand):
+    help = "Export contributions, transactions, loans and penalties as compressed Parquet or Arrow files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", required=True, help="Directory to write the files into.")
+        parser.add_argument("--ledger", action="append", choices=list(LEDGERS), help="Only this ledger (repeatable).")
+        parser.add_argument("--format", choices=FORMATS, default="parquet")
+        parser.add_argument("--compression", choices=COMPRESSIONS, default="zstd")
+        parser.add_argument("--chama", type=int, action="append", help="Only this chama id (repeatable).")
+        parser.add_argument(
+            "--state",
+            help="JSON file holding each ledger's watermark. Only rows newer than it are exported, "
+                 "and it is updated after a successful run.",
+        )
+        parser.add_argument("--lag", type=int, default=60, help="Skip rows newer than this many seconds.")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows fetched per query.")
+
+    def handle(self, *args, **options):
+        try:
+            require_pyarrow()
+        except ExportUnavailable as exc:
+            raise CommandError(str(exc))
+
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        state_path = Path(options["state"]) if options["state"] else None
+        state = json.loads(state_path.read_text()) if state_path and state_path.exists() else {}
+
+        for ledger in options["ledger"] or list(LEDGERS):
+            path, rows, watermark = export_ledger(
+                ledger,
+                output,
+                file_format=options["format"],
+                compression=options["compression"],
+                chama_ids=options["chama"],
+                since=load_watermark(state.get(ledger)),
+                lag_seconds=options["lag"],
+                chunk_size=options["chunk_size"],
+            )
+            state[ledger] = dump_watermark(watermark)
+            self.stdout.write(f"{ledger}: {rows} row(s)" + (f" -> {path}" if path else ""))
+
+        if state_path:
+            state_path.write_text(json.dumps(state, indent=2))
+        self.stdout.write(self.style.SUCCESS("Export complete."))
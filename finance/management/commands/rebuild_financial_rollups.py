@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chama.models import Chama
+from finance.rollups import rebuild_chama, verify_chama
+
+
+class Command(BaseCommand):
+    help = "Rebuild ChamaFinancialSnapshot and ChamaMonthlyRollup from the ledger, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chama", type=int, action="append", help="Only this chama id (repeatable).")
+        parser.add_argument("--verify", action="store_true", help="Compare stored figures with the ledger; write nothing.")
+
+    def handle(self, *args, **options):
+        chama_ids = options["chama"] or list(Chama.objects.order_by("id").values_list("id", flat=True))
+
+        if not options["verify"]:
+            for chama_id in chama_ids:
+                rebuild_chama(chama_id)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {len(chama_ids)} chama(s)."))
+            return
+
+        failed = 0
+        for chama_id in chama_ids:
+            problems = verify_chama(chama_id)
+            if problems:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Chama {chama_id}:"))
+                for problem in problems:
+                    self.stdout.write(f"  {problem}")
+        if failed:
+            raise CommandError(f"{failed} of {len(chama_ids)} chama(s) have rollups that do not match the ledger.")
+        self.stdout.write(self.style.SUCCESS(f"Rollups match the ledger for {len(chama_ids)} chama(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.loans import ensure_schedules, refresh_loans
+from finance.models import Loan
+
+
+class Command(BaseCommand):
+    help = "Recompute loan arrears and days past due, and mark loans past LOAN_DEFAULT_DAYS as defaulted. Run daily."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chama", type=int, action="append", help="Only this chama id (repeatable).")
+
+    def handle(self, *args, **options):
+        loans = Loan.objects.filter(loan_status__in=["active", "defaulted"])
+        if options["chama"]:
+            loans = loans.filter(loan_chama_id__in=options["chama"])
+
+        with transaction.atomic():
+            backfilled = ensure_schedules(loans)
+            updated, defaulted = refresh_loans(loans)
+
+        if backfilled:
+            self.stdout.write(f"Created schedules for {backfilled} loan(s) disbursed before schedules existed.")
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} loan(s); {defaulted} newly defaulted."))
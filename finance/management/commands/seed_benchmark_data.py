@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from finance.benchmark import flush_data, generate_data
+
+
+class Command(BaseCommand):
+    help = "Create synthetic chamas, members, cycles and contributions for payment benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chamas", type=int, default=1)
+        parser.add_argument("--members", type=int, default=1000, help="Members per chama.")
+        parser.add_argument("--cycles", type=int, default=12, help="Contribution cycles per chama.")
+        parser.add_argument("--contributions", type=int, default=12, help="Settled contributions per member.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--flush", action="store_true", help="Delete existing benchmark data first.")
+
+    def handle(self, *args, **options):
+        if options["flush"]:
+            deleted = flush_data()
+            self.stdout.write(f"Deleted {deleted} benchmark record(s).")
+
+        summary = generate_data(
+            chamas=options["chamas"],
+            members=options["members"],
+            cycles=options["cycles"],
+            contributions=options["contributions"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Created {chamas} chama(s), {members} member(s), {cycles} cycle(s) "
+            "and {contributions} contribution(s).".format(**summary)
+        ))
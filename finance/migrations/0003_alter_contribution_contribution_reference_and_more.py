@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('finance', '0002_penalty_penalty_paid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contribution',
+            name='contribution_reference',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='contribution',
+            constraint=models.UniqueConstraint(condition=models.Q(('contribution_mpesa_receipt__isnull', False), models.Q(('contribution_mpesa_receipt', ''), _negated=True)), fields=('contribution_mpesa_receipt',), name='unique_contribution_mpesa_receipt'),
+        ),
+        migrations.AddConstraint(
+            model_name='loanrepayment',
+            constraint=models.UniqueConstraint(condition=models.Q(('loan_repayment_reference__isnull', False), models.Q(('loan_repayment_reference', ''), _negated=True)), fields=('loan_repayment_reference',), name='unique_loan_repayment_reference'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('finance', '0003_alter_contribution_contribution_reference_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChamaFinancialSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_total_collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('snapshot_contribution_count', models.IntegerField(default=0)),
+                ('snapshot_penalty_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('snapshot_unpaid_penalty_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('snapshot_unpaid_penalty_count', models.IntegerField(default=0)),
+                ('snapshot_active_loan_count', models.IntegerField(default=0)),
+                ('snapshot_active_loan_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('snapshot_outstanding_loan_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('snapshot_updated_at', models.DateTimeField(auto_now=True)),
+                ('snapshot_chama', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='financial_snapshot', to='chama.chama')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChamaMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rollup_month', models.DateField()),
+                ('rollup_contributions_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rollup_contributions_count', models.IntegerField(default=0)),
+                ('rollup_penalties_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rollup_loans_disbursed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rollup_repayments_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rollup_chama', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='chama.chama')),
+            ],
+            options={
+                'ordering': ['rollup_month'],
+                'constraints': [models.UniqueConstraint(fields=('rollup_chama', 'rollup_month'), name='unique_chama_monthly_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_chamafinancialsnapshot_chamamonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='loan_arrears',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='loan_days_past_due',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='loan_disbursed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='loan_installment_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='loan_interest_method',
+            field=models.CharField(choices=[('flat', 'Flat'), ('reducing', 'Reducing Balance'), ('compound', 'Compound')], default='flat', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='LoanInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('loan_installment_number', models.PositiveIntegerField()),
+                ('loan_installment_due_date', models.DateField(db_index=True)),
+                ('loan_installment_principal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('loan_installment_interest', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('loan_installment_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('loan_installment_paid', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('loan_installment_paid_at', models.DateTimeField(blank=True, null=True)),
+                ('loan_installment_loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='finance.loan')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('loan_installment_loan', 'loan_installment_number'), name='unique_installment_per_loan')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_loan_installments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='loan_updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
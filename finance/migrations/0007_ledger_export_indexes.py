@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('finance', '0006_loan_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loan',
+            name='loan_updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['contribution_updated_at', 'id'], name='finance_con_contrib_4698f9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['loan_updated_at', 'id'], name='finance_loa_loan_up_a65d63_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penalty',
+            index=models.Index(fields=['penalty_created_at', 'id'], name='finance_pen_penalty_ad826b_idx'),
+        ),
+    ]
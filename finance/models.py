@@ -24,6 +24,12 @@ LOAN_STATUS_CHOICES = (
     ('completed', "Completed"),
     ('defaulted', "Defaulted"),
 )
+
+LOAN_INTEREST_METHOD_CHOICES = (
+    ('flat', "Flat"),
+    ('reducing', "Reducing Balance"),
+    ('compound', "Compound"),
+)
 class Penalty(models.Model):
     penalty_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     penalty_chama = models.ForeignKey(Chama, on_delete=models.CASCADE)
@@ -32,6 +38,10 @@ class Penalty(models.Model):
     penalty_paid = models.BooleanField(default=False)
     penalty_created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset order of incremental ledger exports (finance.exports)
+        indexes = [models.Index(fields=["penalty_created_at", "id"])]
+
     def __str__(self):
         return f"{self.penalty_user} - {self.penalty_amount}"
 
@@ -74,12 +84,23 @@ class Contribution(models.Model):
     contribution_amount = models.DecimalField(max_digits=10, decimal_places=2)
     contribution_type = models.CharField(max_length=20, choices=CONTRIBUTION_TYPE_CHOICES, default='contribution', db_index=True)
     contribution_mpesa_receipt = models.CharField(max_length=20, blank=True, null=True)
-    contribution_reference = models.CharField(max_length=50, blank=True, null=True)
+    contribution_reference = models.CharField(max_length=50, blank=True, null=True, db_index=True)
     contribution_phone = models.CharField(max_length=15)
     contribution_time = models.DateTimeField()
     contribution_created_at = models.DateTimeField(auto_now_add=True)
     contribution_updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Keyset order of incremental ledger exports (finance.exports)
+        indexes = [models.Index(fields=["contribution_updated_at", "id"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["contribution_mpesa_receipt"],
+                condition=models.Q(contribution_mpesa_receipt__isnull=False) & ~models.Q(contribution_mpesa_receipt=""),
+                name="unique_contribution_mpesa_receipt",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.contribution_user} — {self.contribution_type} — {self.contribution_amount}"
 
@@ -94,11 +115,45 @@ class Loan(models.Model):
     loan_deadline = models.DateField()
     loan_outstanding_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     loan_reference = models.CharField(max_length=50, blank=True, null=True)
+    loan_interest_method = models.CharField(max_length=20, choices=LOAN_INTEREST_METHOD_CHOICES, default='flat')
+    loan_installment_count = models.PositiveIntegerField(default=1)
+    loan_disbursed_at = models.DateTimeField(null=True, blank=True)
+    # Kept current by finance.loans.refresh_loans()
+    loan_arrears = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    loan_days_past_due = models.IntegerField(default=0)
     loan_created_at = models.DateTimeField(auto_now_add=True)
+    # Watermark for incremental exports; set it explicitly in update()/bulk_update()
+    loan_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Keyset order of incremental ledger exports (finance.exports)
+        indexes = [models.Index(fields=["loan_updated_at", "id"])]
 
     def __str__(self):
         return f"Loan {self.id} — {self.loan_user} — {self.loan_status}"
 
+class LoanInstallment(models.Model):
+    """One scheduled payment of a loan; repayments fill installments in order (finance.loans)."""
+    loan_installment_loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='installments')
+    loan_installment_number = models.PositiveIntegerField()
+    loan_installment_due_date = models.DateField(db_index=True)
+    loan_installment_principal = models.DecimalField(max_digits=10, decimal_places=2)
+    loan_installment_interest = models.DecimalField(max_digits=10, decimal_places=2)
+    loan_installment_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    loan_installment_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    loan_installment_paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan_installment_loan", "loan_installment_number"],
+                name="unique_installment_per_loan",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.loan_installment_loan} — #{self.loan_installment_number} — {self.loan_installment_amount}"
+
 class LoanRepayment(models.Model):
     loan_repayment_loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='repayments')
     loan_repayment_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -107,5 +162,51 @@ class LoanRepayment(models.Model):
     loan_repayment_mpesa_receipt = models.CharField(max_length=20, null=True, blank=True)
     loan_repayment_reference = models.CharField(max_length=50, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan_repayment_reference"],
+                condition=models.Q(loan_repayment_reference__isnull=False) & ~models.Q(loan_repayment_reference=""),
+                name="unique_loan_repayment_reference",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.loan_repayment_loan} — {self.loan_repayment_amount}"
+
+
+class ChamaFinancialSnapshot(models.Model):
+    """Running totals for one chama, kept current by finance.rollups."""
+    snapshot_chama = models.OneToOneField(Chama, on_delete=models.CASCADE, related_name="financial_snapshot")
+    snapshot_total_collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    snapshot_contribution_count = models.IntegerField(default=0)
+    snapshot_penalty_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    snapshot_unpaid_penalty_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    snapshot_unpaid_penalty_count = models.IntegerField(default=0)
+    snapshot_active_loan_count = models.IntegerField(default=0)
+    snapshot_active_loan_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    snapshot_outstanding_loan_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    snapshot_updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot — {self.snapshot_chama}"
+
+
+class ChamaMonthlyRollup(models.Model):
+    """One chama's ledger totals for one calendar month."""
+    rollup_chama = models.ForeignKey(Chama, on_delete=models.CASCADE, related_name="monthly_rollups")
+    rollup_month = models.DateField()
+    rollup_contributions_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rollup_contributions_count = models.IntegerField(default=0)
+    rollup_penalties_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rollup_loans_disbursed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rollup_repayments_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["rollup_month"]
+        constraints = [
+            models.UniqueConstraint(fields=["rollup_chama", "rollup_month"], name="unique_chama_monthly_rollup"),
+        ]
+
+    def __str__(self):
+        return f"{self.rollup_chama} — {self.rollup_month:%Y-%m}"
@@ -0,0 +1,308 @@
+"""
+Incremental maintenance of ChamaFinancialSnapshot and ChamaMonthlyRollup.
+
+Every tracked row (Contribution, Penalty, Loan, LoanRepayment) maps to the
+figures it adds to its chama's snapshot and to one or more month buckets.
+When a row changes, the difference between its new and old figures is
+applied with F() updates, so dashboards read a handful of rows instead of
+re-aggregating the whole ledger.
+
+Model saves and deletes are handled by finance.signals. Code that writes
+with QuerySet.update() or bulk_update() (the callback processor and the
+reconciliation sweeper) calls the helpers at the bottom of this module.
+`manage.py rebuild_financial_rollups` rebuilds and verifies everything
+from the raw rows.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from finance.models import (
+    ChamaFinancialSnapshot, ChamaMonthlyRollup, Contribution, Loan, LoanRepayment, Penalty
+)
+
+SNAPSHOT_FIELDS = [
+    "snapshot_total_collected",
+    "snapshot_contribution_count",
+    "snapshot_penalty_total",
+    "snapshot_unpaid_penalty_amount",
+    "snapshot_unpaid_penalty_count",
+    "snapshot_active_loan_count",
+    "snapshot_active_loan_amount",
+    "snapshot_outstanding_loan_balance",
+]
+MONTHLY_FIELDS = [
+    "rollup_contributions_amount",
+    "rollup_contributions_count",
+    "rollup_penalties_amount",
+    "rollup_loans_disbursed",
+    "rollup_repayments_amount",
+]
+
+# Loans that have been paid out at some point
+DISBURSED_LOAN_STATUSES = ("active", "completed", "defaulted")
+
+CENTS = Decimal("0.01")
+
+
+def money(value):
+    """Decimal rounded to cents (penalty amounts are floats)."""
+    return Decimal(str(value or 0)).quantize(CENTS)
+
+
+def month_start(value):
+    """First day of the month of a datetime, in the current time zone."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+# --- Figures per row -------------------------------------------------------
+# Each returns {(chama_id, month_or_None): {field: value}}; None is the snapshot.
+
+def contribution_figures(contribution):
+    if contribution is None or contribution.contribution_status != "success":
+        return {}
+    amount = money(contribution.contribution_amount)
+    chama_id = contribution.contribution_chama_id
+    return {
+        (chama_id, None): {"snapshot_total_collected": amount, "snapshot_contribution_count": 1},
+        (chama_id, month_start(contribution.contribution_time)): {
+            "rollup_contributions_amount": amount, "rollup_contributions_count": 1,
+        },
+    }
+
+
+def penalty_figures(penalty):
+    if penalty is None:
+        return {}
+    amount = money(penalty.penalty_amount)
+    unpaid = not penalty.penalty_paid
+    chama_id = penalty.penalty_chama_id
+    return {
+        (chama_id, None): {
+            "snapshot_penalty_total": amount,
+            "snapshot_unpaid_penalty_amount": amount if unpaid else 0,
+            "snapshot_unpaid_penalty_count": 1 if unpaid else 0,
+        },
+        (chama_id, month_start(penalty.penalty_created_at or timezone.now())): {
+            "rollup_penalties_amount": amount,
+        },
+    }
+
+
+def loan_figures(loan):
+    if loan is None:
+        return {}
+    chama_id = loan.loan_chama_id
+    figures = {}
+    if loan.loan_status == "active":
+        figures[(chama_id, None)] = {
+            "snapshot_active_loan_count": 1,
+            "snapshot_active_loan_amount": money(loan.loan_amount),
+            "snapshot_outstanding_loan_balance": money(loan.loan_outstanding_balance),
+        }
+    if loan.loan_status in DISBURSED_LOAN_STATUSES:
+        figures[(chama_id, month_start(loan.loan_created_at or timezone.now()))] = {
+            "rollup_loans_disbursed": money(loan.loan_amount),
+        }
+    return figures
+
+
+def repayment_figures(repayment):
+    if repayment is None:
+        return {}
+    chama_id = repayment.loan_repayment_loan.loan_chama_id
+    return {
+        (chama_id, month_start(repayment.loan_repayment_time or timezone.now())): {
+            "rollup_repayments_amount": money(repayment.loan_repayment_amount),
+        },
+    }
+
+
+FIGURES = {
+    Contribution: contribution_figures,
+    Penalty: penalty_figures,
+    Loan: loan_figures,
+    LoanRepayment: repayment_figures,
+}
+
+
+def figures_delta(new, old):
+    """new - old, key by key and field by field."""
+    delta = defaultdict(dict)
+    for key in set(new) | set(old):
+        fields = set(new.get(key, {})) | set(old.get(key, {}))
+        for field in fields:
+            change = new.get(key, {}).get(field, 0) - old.get(key, {}).get(field, 0)
+            if change:
+                delta[key][field] = change
+    return dict(delta)
+
+
+def negate(figures):
+    return figures_delta({}, figures)
+
+
+# --- Applying changes ------------------------------------------------------
+
+def apply_delta(delta):
+    """
+    Add a figures delta to the stored rows with F() updates. A chama with no
+    snapshot yet is rebuilt from its ledger instead, which already includes
+    the change being applied.
+    """
+    by_chama = defaultdict(dict)
+    for (chama_id, month), fields in delta.items():
+        if fields:
+            by_chama[chama_id][month] = fields
+
+    for chama_id, entries in by_chama.items():
+        snapshot = ChamaFinancialSnapshot.objects.filter(snapshot_chama_id=chama_id)
+        fields = entries.pop(None, {})
+        if fields:
+            exists = snapshot.update(
+                snapshot_updated_at=timezone.now(),
+                **{name: F(name) + value for name, value in fields.items()},
+            )
+        else:
+            exists = snapshot.exists()
+        if not exists:
+            rebuild_chama(chama_id)
+            continue
+
+        for month, fields in entries.items():
+            rows = ChamaMonthlyRollup.objects.filter(rollup_chama_id=chama_id, rollup_month=month)
+            updates = {name: F(name) + value for name, value in fields.items()}
+            if rows.update(**updates):
+                continue
+            try:
+                with transaction.atomic():
+                    ChamaMonthlyRollup.objects.create(rollup_chama_id=chama_id, rollup_month=month, **fields)
+            except IntegrityError:
+                rows.update(**updates)
+
+
+def contribution_succeeded(contribution_id):
+    """A contribution was moved to 'success' with QuerySet.update()."""
+    contribution = Contribution.objects.filter(id=contribution_id).first()
+    if contribution:
+        apply_delta(contribution_figures(contribution))
+
+
+def penalty_paid(penalty_id):
+    """A penalty was marked paid with QuerySet.update()."""
+    penalty = Penalty.objects.filter(id=penalty_id).first()
+    if penalty:
+        unpaid = Penalty(
+            penalty_chama_id=penalty.penalty_chama_id,
+            penalty_amount=penalty.penalty_amount,
+            penalty_created_at=penalty.penalty_created_at,
+            penalty_paid=False,
+        )
+        apply_delta(figures_delta(penalty_figures(penalty), penalty_figures(unpaid)))
+
+
+def loans_defaulted(loans):
+    """Active loans (as loaded before the change) were moved to 'defaulted' with QuerySet.update()."""
+    delta = defaultdict(lambda: defaultdict(Decimal))
+    for loan in loans:
+        for key, fields in negate(loan_figures(loan)).items():
+            if key[1] is None:  # Still a disbursed loan, so monthly figures are unchanged
+                for name, value in fields.items():
+                    delta[key][name] += value
+    apply_delta({key: dict(fields) for key, fields in delta.items()})
+
+
+# --- Rebuild and verify ----------------------------------------------------
+
+def compute_chama(chama_id):
+    """Snapshot values and {month: fields} computed from the raw ledger."""
+    contributions = Contribution.objects.filter(contribution_chama_id=chama_id, contribution_status="success")
+    penalties = Penalty.objects.filter(penalty_chama_id=chama_id)
+    active_loans = Loan.objects.filter(loan_chama_id=chama_id, loan_status="active")
+    unpaid = Q(penalty_paid=False)
+
+    c = contributions.aggregate(amount=Sum("contribution_amount"), count=Count("id"))
+    p = penalties.aggregate(
+        total=Sum("penalty_amount"),
+        unpaid_amount=Sum("penalty_amount", filter=unpaid),
+        unpaid_count=Count("id", filter=unpaid),
+    )
+    loans = active_loans.aggregate(
+        count=Count("id"), amount=Sum("loan_amount"), outstanding=Sum("loan_outstanding_balance")
+    )
+    snapshot = {
+        "snapshot_total_collected": money(c["amount"]),
+        "snapshot_contribution_count": c["count"],
+        "snapshot_penalty_total": money(p["total"]),
+        "snapshot_unpaid_penalty_amount": money(p["unpaid_amount"]),
+        "snapshot_unpaid_penalty_count": p["unpaid_count"],
+        "snapshot_active_loan_count": loans["count"],
+        "snapshot_active_loan_amount": money(loans["amount"]),
+        "snapshot_outstanding_loan_balance": money(loans["outstanding"]),
+    }
+
+    months = defaultdict(lambda: {name: (0 if name.endswith("_count") else money(0)) for name in MONTHLY_FIELDS})
+
+    def bucket(queryset, date_field, **aggregates):
+        return (
+            queryset.annotate(month=TruncMonth(date_field, output_field=DateField()))
+            .values("month").annotate(**aggregates).order_by("month")
+        )
+
+    for row in bucket(contributions, "contribution_time", amount=Sum("contribution_amount"), count=Count("id")):
+        months[row["month"]]["rollup_contributions_amount"] = money(row["amount"])
+        months[row["month"]]["rollup_contributions_count"] = row["count"]
+    for row in bucket(penalties, "penalty_created_at", amount=Sum("penalty_amount")):
+        months[row["month"]]["rollup_penalties_amount"] = money(row["amount"])
+    disbursed = Loan.objects.filter(loan_chama_id=chama_id, loan_status__in=DISBURSED_LOAN_STATUSES)
+    for row in bucket(disbursed, "loan_created_at", amount=Sum("loan_amount")):
+        months[row["month"]]["rollup_loans_disbursed"] = money(row["amount"])
+    repayments = LoanRepayment.objects.filter(loan_repayment_loan__loan_chama_id=chama_id)
+    for row in bucket(repayments, "loan_repayment_time", amount=Sum("loan_repayment_amount")):
+        months[row["month"]]["rollup_repayments_amount"] = money(row["amount"])
+
+    return snapshot, dict(months)
+
+
+@transaction.atomic
+def rebuild_chama(chama_id):
+    """Replace a chama's snapshot and monthly rows with freshly computed ones."""
+    snapshot, months = compute_chama(chama_id)
+    ChamaFinancialSnapshot.objects.update_or_create(snapshot_chama_id=chama_id, defaults=snapshot)
+    ChamaMonthlyRollup.objects.filter(rollup_chama_id=chama_id).delete()
+    ChamaMonthlyRollup.objects.bulk_create([
+        ChamaMonthlyRollup(rollup_chama_id=chama_id, rollup_month=month, **fields)
+        for month, fields in months.items()
+    ])
+
+
+def verify_chama(chama_id):
+    """Differences between stored and recomputed figures, as readable strings."""
+    expected_snapshot, expected_months = compute_chama(chama_id)
+    problems = []
+
+    stored = ChamaFinancialSnapshot.objects.filter(snapshot_chama_id=chama_id).values(*SNAPSHOT_FIELDS).first()
+    if stored is None:
+        problems.append("snapshot missing")
+    else:
+        for name, value in expected_snapshot.items():
+            if stored[name] != value:
+                problems.append(f"{name}: stored {stored[name]}, expected {value}")
+
+    stored_months = {
+        row["rollup_month"]: row
+        for row in ChamaMonthlyRollup.objects.filter(rollup_chama_id=chama_id).values("rollup_month", *MONTHLY_FIELDS)
+    }
+    for month in sorted(set(expected_months) | set(stored_months)):
+        expected = expected_months.get(month, {})
+        row = stored_months.get(month, {})
+        for name in MONTHLY_FIELDS:
+            if row.get(name, 0) != expected.get(name, 0):
+                problems.append(f"{month:%Y-%m} {name}: stored {row.get(name, 0)}, expected {expected.get(name, 0)}")
+    return problems
@@ -0,0 +1,44 @@
+"""Keep the financial rollups in step with model saves and deletes."""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from chama.models import Chama
+from finance import rollups
+
+
+def _remember_figures(sender, instance, **kwargs):
+    old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_figures = rollups.FIGURES[sender](old)
+
+
+def _apply_change(sender, instance, **kwargs):
+    new = rollups.FIGURES[sender](instance)
+    rollups.apply_delta(rollups.figures_delta(new, getattr(instance, "_rollup_figures", {})))
+    instance._rollup_figures = new
+
+
+def _chama_deleted(origin):
+    return isinstance(origin, Chama) or (isinstance(origin, QuerySet) and origin.model is Chama)
+
+
+def _remember_deleted_figures(sender, instance, origin=None, **kwargs):
+    # Rows collected for a cascade or QuerySet.delete() were just fetched;
+    # an instance deleted directly may be stale, so read the stored row.
+    if origin is instance:
+        _remember_figures(sender, instance)
+    else:
+        instance._rollup_figures = rollups.FIGURES[sender](instance)
+
+
+def _remove_figures(sender, instance, origin=None, **kwargs):
+    # The whole chama is going; its snapshot goes with it.
+    if _chama_deleted(origin):
+        return
+    rollups.apply_delta(rollups.negate(instance._rollup_figures))
+
+
+for model in rollups.FIGURES:
+    pre_save.connect(_remember_figures, sender=model, dispatch_uid=f"rollups_pre_save_{model.__name__}")
+    post_save.connect(_apply_change, sender=model, dispatch_uid=f"rollups_post_save_{model.__name__}")
+    pre_delete.connect(_remember_deleted_figures, sender=model, dispatch_uid=f"rollups_pre_delete_{model.__name__}")
+    post_delete.connect(_remove_figures, sender=model, dispatch_uid=f"rollups_post_delete_{model.__name__}")
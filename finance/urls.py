@@ -1,11 +1,14 @@
 from django.urls import path
 from . import views
+from darajaapi.views import stk_callback
 
 app_name = 'finance'
 
 urlpatterns = [
     path('<int:chama_id>/cycles/', views.list_cycles, name='list_cycles'),
     path('<int:chama_id>/cycles/create/', views.create_cycle, name='create_cycle'),
+    path('<int:chama_id>/cycles/compliance/', views.cycle_compliance, name='cycle_compliance'),
+    path('<int:chama_id>/cycles/compliance/data/', views.cycle_compliance_data, name='cycle_compliance_data'),
     path('cycle/<int:cycle_id>/', views.cycle_detail, name='cycle_detail'),
     path('cycle/<int:cycle_id>/close/', views.close_cycle, name='close_cycle'),
     path('cycle/<int:cycle_id>/edit/', views.edit_cycle, name='edit_cycle'),
@@ -15,6 +18,7 @@ urlpatterns = [
     path('<int:chama_id>/contributions/all/', views.chama_all_contributions, name='chama_all_contributions'),
     path('<int:chama_id>/contributions/create/', views.create_contribution, name='create_contribution'),
     path('check-contribution/<int:contribution_id>/', views.check_contribution_status, name='check_contribution_status'),
+    path('check-contribution/<int:contribution_id>/stream/', views.contribution_status_stream, name='contribution_status_stream'),
     path('member/<int:user_id>/dues/', views.member_dues, name='member_dues'),
     path('<int:chama_id>/outstanding-dues/', views.chama_outstanding_dues, name='chama_outstanding_dues'),
     path('member/<int:user_id>/remind/', views.remind_member_debt, name='remind_member_debt'),
@@ -32,5 +36,5 @@ urlpatterns = [
     path('penalty/<int:penalty_id>/remind/', views.send_penalty_reminder, name='send_penalty_reminder'),
     path('transaction/query/', views.query_transaction_page, name='query_transaction_page'),
     path('stk/query/<str:checkout_id>/', views.query_transaction_api, name='query_transaction_api'),
-    path('stk/callback/', views.stk_callback, name='stk_callback'),
+    path('stk/callback/', stk_callback, name='stk_callback'),
 ]
\ No newline at end of file
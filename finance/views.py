@@ -1,30 +1,35 @@
-import base64
-import datetime
+import asyncio
 import json
-import requests
 import uuid
+from datetime import timedelta
 from decimal import Decimal
 
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
-from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
 
 # --- Local Imports ---
-from darajaapi.accesstoken import access_token
-from darajaapi.stk_push import initiate_stk_push
+from darajaapi.client import stk_query
+from darajaapi.reconcile import apply_query_results, reconcile_checkout_ids
+from darajaapi.jobs import enqueue_stk_push
+from darajaapi.events import apublished_contribution_status
 from darajaapi.models import Transaction 
 from chama.models import Chama, Membership
 from .models import (
     Contribution, ContributionCycle, Penalty, Loan,
-    LoanRepayment, CONTRIBUTION_TYPE_CHOICES, CYCLE_TYPE_CHOICES
+    LoanRepayment, CONTRIBUTION_TYPE_CHOICES, CYCLE_TYPE_CHOICES, LOAN_INTEREST_METHOD_CHOICES
 )
 from common.utils import paginate_queryset, send_chama_notification
+from dashboard.cache import cached_chama_data
+from finance.cycles import MAX_MATRIX_CYCLES, apply_member_balance, compliance_matrix, with_user_paid
+from finance.loans import MAX_LOAN_INSTALLMENTS, build_schedule, total_payable
 
 User = get_user_model() # Get the actual User model class
 
@@ -41,39 +46,21 @@ def list_cycles(request, chama_id):
         membership_status='active'
     ).count()
 
-    # 2. Fetch Cycles
-    cycles_qs = ContributionCycle.objects.filter(cycle_chama=chama).order_by('-cycle_deadline')
-    
-    cycles_data = []
-    
-    for cycle in cycles_qs:
-        total_target = cycle.cycle_amount_required or 0
-        if active_members_count > 0:
-            per_member_share = total_target / active_members_count
-        else:
-            per_member_share = 0
-            
-        paid_amount = Contribution.objects.filter(
-            contribution_chama=chama,
-            contribution_user=request.user,
-            contribution_cycle=cycle,
-            contribution_status='success'
-        ).aggregate(Sum('contribution_amount'))['contribution_amount__sum'] or 0
-
-        balance = per_member_share - paid_amount
-        if balance < 0: balance = 0
-
-        # C. Attach data to cycle object
-        cycle.per_member_share = per_member_share
-        cycle.user_paid = paid_amount
-        cycle.user_balance = balance
-        cycle.is_fully_paid = (balance < 1) # Treat less than 1 KES as paid to avoid rounding issues
-        
-        cycles_data.append(cycle)
+    # 2. Fetch one page of cycles with the user's payments in a single grouped query
+    cycles_qs = with_user_paid(
+        ContributionCycle.objects.filter(cycle_chama=chama)
+        .select_related('cycle_beneficiary')
+        .order_by('-cycle_deadline', '-id'),
+        request.user,
+    )
+    cycles_page = paginate_queryset(cycles_qs, request.GET.get("page"))
+
+    for cycle in cycles_page:
+        apply_member_balance(cycle, cycle.user_paid, active_members_count)
 
     return render(request, "finance/list_cycles.html", {
         "chama": chama,
-        "cycles": cycles_data,
+        "cycles": cycles_page,
         "membership": membership,
     })
 
@@ -159,7 +146,7 @@ def close_cycle(request, cycle_id):
         cycle.cycle_status = "closed"
         cycle.save()
 
-        members = Membership.objects.filter(membership_chama=cycle.cycle_chama, membership_status="active")
+        members = Membership.objects.filter(membership_chama=cycle.cycle_chama, membership_status="active").select_related("membership_user")
         recipients = [m.membership_user for m in members]
         send_chama_notification(
             chama=cycle.cycle_chama, recipients=recipients, title=f"Cycle Closed: {cycle.cycle_name}",
@@ -185,59 +172,11 @@ def check_contribution_status(request, contribution_id):
         
         # 2. Only query Daraja if it's still marked as 'pending' locally
         if contrib.contribution_status == 'pending' and contrib.contribution_reference:
-            
-            # --- PREPARE DARAJA QUERY ---
-            Timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            query_url = "https://sandbox.safaricom.co.ke/mpesa/stkpushquery/v1/query"
-            BusinessShortCode = settings.MPESA_SHORTCODE
-            passkey = settings.MPESA_PASSKEY
-            Password = base64.b64encode(f"{BusinessShortCode}{passkey}{Timestamp}".encode()).decode()
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token()}"
-            }
-            payload = {
-                "BusinessShortCode": BusinessShortCode,
-                "Password": Password,
-                "Timestamp": Timestamp,
-                "CheckoutRequestID": contrib.contribution_reference
-            }
-            
-            try:
-                # 3. SEND QUERY
-                response = requests.post(query_url, json=payload, headers=headers)
-                data = response.json()
-                
-                # 4. PARSE RESULT
-                result_code = str(data.get('ResultCode'))
-                
-                if result_code == '0':
-                    # SUCCESS
-                    contrib.contribution_status = 'success'
-                    # Extract Receipt if available
-                    if 'CallbackMetadata' in data:
-                        items = data['CallbackMetadata'].get('Item', [])
-                        for item in items:
-                            if item.get('Name') == 'MpesaReceiptNumber':
-                                contrib.contribution_mpesa_receipt = item.get('Value')
-                    contrib.save()
-                    
-                elif result_code == '1032':
-                    # CANCELLED
-                    contrib.contribution_status = 'cancelled'
-                    contrib.save()
-                    
-                elif result_code and result_code not in ['0', '1032', '1037']:
-                    # FAILED (1037 is "Timeout" meaning still pending, so we ignore it)
-                    contrib.contribution_status = 'failed'
-                    contrib.save()
-                    
-            except Exception as e:
-                # If internet fails, just ignore and return current local status
-                print(f"Error querying Daraja: {str(e)}")
-
-        # 5. Return the (possibly updated) status
+            # 3. Query and write back through the same logic as the callback
+            reconcile_checkout_ids([contrib.contribution_reference], concurrency=1)
+            contrib.refresh_from_db()
+
+        # 4. Return the (possibly updated) status
         return JsonResponse({'status': contrib.contribution_status})
         
     except Contribution.DoesNotExist:
@@ -245,6 +184,70 @@ def check_contribution_status(request, contribution_id):
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)})
 
+def _sse(event, status):
+    return f"event: {event}\ndata: {json.dumps({'status': status})}\n\n"
+
+
+def _no_buffering(response):
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+async def contribution_status_stream(request, contribution_id):
+    """
+    Server-sent events stream of one contribution's status.
+
+    Sends the current status, then waits for the callback processor to
+    publish the final one. A status read every PAYMENT_STATUS_DB_CHECK_INTERVAL
+    seconds covers processes that do not share the cache. Ends with a
+    'timeout' event after PAYMENT_STATUS_STREAM_TIMEOUT seconds.
+
+    Under WSGI a stream would hold a sync worker and reach the browser only
+    once it ends, so there each request gets the current status and a
+    `retry` of PAYMENT_STATUS_POLL_INTERVAL seconds, and EventSource polls
+    by reconnecting until the payment settles or times out.
+    """
+    user = await request.auser()
+    contribution_qs = Contribution.objects.filter(id=contribution_id, contribution_user=user)
+    status_qs = contribution_qs.values_list('contribution_status', flat=True)
+    row = await contribution_qs.values_list('contribution_status', 'contribution_created_at').afirst()
+    if row is None:
+        return JsonResponse({'status': 'unknown'}, status=404)
+    status, created_at = row
+
+    if not isinstance(request, ASGIRequest):
+        timeout = timedelta(seconds=settings.PAYMENT_STATUS_STREAM_TIMEOUT)
+        if status != 'pending':
+            body = _sse('status', status)
+        elif timezone.now() - created_at >= timeout:
+            body = _sse('timeout', status)
+        else:
+            body = f"retry: {settings.PAYMENT_STATUS_POLL_INTERVAL * 1000}\n" + _sse('status', status)
+        return _no_buffering(HttpResponse(body, content_type='text/event-stream'))
+
+    async def events():
+        current = status
+        yield _sse('status', current)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.PAYMENT_STATUS_STREAM_TIMEOUT
+        next_db_check = loop.time() + settings.PAYMENT_STATUS_DB_CHECK_INTERVAL
+        while current == 'pending' and loop.time() < deadline:
+            await asyncio.sleep(1)
+            published = await apublished_contribution_status(contribution_id)
+            if published:
+                current = published
+            elif loop.time() >= next_db_check:
+                current = await status_qs.afirst() or current
+                next_db_check = loop.time() + settings.PAYMENT_STATUS_DB_CHECK_INTERVAL
+                yield ": keep-alive\n\n"
+
+        yield _sse('status' if current != 'pending' else 'timeout', current)
+
+    return _no_buffering(StreamingHttpResponse(events(), content_type='text/event-stream'))
+
 @login_required
 def send_contribution_reminder(request, cycle_id):
     cycle = get_object_or_404(ContributionCycle, id=cycle_id)
@@ -286,6 +289,41 @@ def send_contribution_reminder(request, cycle_id):
     messages.success(request, f"Reminders sent to {len(recipients)} members.")
     return redirect("finance:cycle_detail", cycle_id=cycle.id)
 
+@login_required
+def cycle_compliance(request, chama_id):
+    chama = get_object_or_404(Chama, id=chama_id)
+    membership = get_object_or_404(Membership, membership_user=request.user, membership_chama=chama)
+    if membership.membership_role not in ["treasurer", "admin", "secretary"]:
+        return HttpResponseForbidden("Unauthorized")
+
+    return render(request, "finance/cycle_compliance.html", {
+        "chama": chama,
+        "membership": membership,
+    })
+
+@login_required
+def cycle_compliance_data(request, chama_id):
+    """Members x cycles payment grid as compact JSON (see finance.cycles.compliance_matrix)."""
+    membership = get_object_or_404(
+        Membership, membership_user=request.user, membership_chama_id=chama_id, membership_status="active"
+    )
+    if membership.membership_role not in ["treasurer", "admin", "secretary"]:
+        return JsonResponse({"error": "Not allowed."}, status=403)
+
+    try:
+        cycle_limit = min(max(int(request.GET.get("cycles", 12)), 1), MAX_MATRIX_CYCLES)
+    except ValueError:
+        return JsonResponse({"error": "Invalid cycles."}, status=400)
+
+    # Cached as the encoded body; any payment, cycle or membership change bumps the chama version
+    body = cached_chama_data(
+        "compliance",
+        chama_id,
+        lambda: json.dumps(compliance_matrix(membership.membership_chama, cycle_limit), separators=(",", ":")),
+        variant=cycle_limit,
+    )
+    return HttpResponse(body, content_type="application/json")
+
 @login_required
 def edit_cycle(request, cycle_id):
     cycle = get_object_or_404(ContributionCycle, id=cycle_id)
@@ -402,23 +440,8 @@ def create_contribution(request, chama_id):
             phone = request.POST.get('phone')
             ctype = request.POST.get('contribution_type', 'contribution')
 
-            # Call initiate_stk_push with correct arguments
-            result = initiate_stk_push(
-                request.user,
-                chama,
-                phone, 
-                amount,
-                ctype, 
-            )
-
-            if not result.get("success"):
-                # FIX: Convert error message to string to avoid Decimal serialization issues
-                error_message = str(result.get("errorMessage", "Payment initiation failed."))
-                messages.error(request, error_message)
-                return redirect("finance:create_contribution", chama_id=chama_id)
-
             # Record Pending Contribution
-            Contribution.objects.create(
+            contribution = Contribution.objects.create(
                 contribution_user=request.user,
                 contribution_chama=chama,
                 contribution_cycle=cycle,
@@ -426,11 +449,13 @@ def create_contribution(request, chama_id):
                 contribution_type=ctype,
                 contribution_phone=phone,
                 contribution_status="pending",
-                contribution_reference=result.get("CheckoutRequestID"),
                 contribution_time=timezone.now()
             )
+
+            # Queue the STK push; the worker fills in contribution_reference
+            enqueue_stk_push(request.user, chama, phone, amount, ctype, contribution=contribution)
             
-            messages.success(request, "STK push initiated. Check your phone.")
+            messages.success(request, "Payment request queued. Check your phone shortly.")
             return redirect("finance:list_contributions", chama_id=chama_id)
             
         except Exception as e:
@@ -471,7 +496,7 @@ def member_dues(request, user_id):
         loans = Loan.objects.filter(
             loan_chama=chama, 
             loan_user=target_member, 
-            loan_status='active'
+            loan_status__in=['active', 'defaulted']
         )
 
         # 2. Unpaid Penalties for this user
@@ -533,11 +558,11 @@ def chama_outstanding_dues(request, chama_id):
         messages.error(request, f"Access Denied: {current_role.title()}s cannot view the master dues list.")
         return redirect('finance:list_contributions', chama_id=chama.id)
 
-    # 4. Fetch All Active Loans (Sorted by due date)
+    # 4. Fetch All Active and Defaulted Loans (Most days past due first, then by due date)
     all_loans = Loan.objects.filter(
         loan_chama=chama, 
-        loan_status='active'
-    ).select_related('loan_user').order_by('loan_deadline')
+        loan_status__in=['active', 'defaulted']
+    ).select_related('loan_user').order_by('-loan_days_past_due', 'loan_deadline')
 
     # 5. Fetch All Unpaid Penalties (Sorted by newest first)
     all_penalties = Penalty.objects.filter(
@@ -625,13 +650,19 @@ def request_loan(request, chama_id):
         try:
             amount = Decimal(request.POST["amount"])
             rate = Decimal("10.00")
-            total = amount + (amount * rate / 100)
+            method = request.POST.get("interest_method", "flat")
+            if method not in dict(LOAN_INTEREST_METHOD_CHOICES):
+                method = "flat"
+            installments = min(max(int(request.POST.get("installments") or 1), 1), MAX_LOAN_INSTALLMENTS)
+            total = total_payable(amount, rate, method, installments)
             
             loan = Loan.objects.create(
                 loan_user=request.user,
                 loan_chama=chama,
                 loan_amount=amount,
                 loan_interest_rate=rate,
+                loan_interest_method=method,
+                loan_installment_count=installments,
                 loan_total_payable=total,
                 loan_outstanding_balance=total,
                 loan_purpose=request.POST.get("purpose"),
@@ -660,12 +691,14 @@ def loan_detail(request, loan_id):
 
     repayments = LoanRepayment.objects.filter(loan_repayment_loan=loan).order_by("-loan_repayment_time")
     total_repaid = repayments.aggregate(Sum("loan_repayment_amount"))["loan_repayment_amount__sum"] or 0
+    installments = loan.installments.order_by("loan_installment_number")
 
     return render(request, "finance/loan_detail.html", {
         "loan": loan,
         "membership": membership,
         "total_repaid": total_repaid,
         "repayments": repayments,
+        "installments": installments,
     })
 
 @login_required
@@ -699,9 +732,12 @@ def disburse_loan(request, loan_id):
 
     if request.method == "POST":
         reference = request.POST.get("reference", f"LOAN-{loan.id}")
-        loan.loan_status = "active"
-        loan.loan_reference = reference
-        loan.save()
+        with transaction.atomic():
+            loan.loan_status = "active"
+            loan.loan_reference = reference
+            loan.loan_disbursed_at = timezone.now()
+            loan.save()
+            build_schedule(loan)
 
         send_chama_notification(
             chama=loan.loan_chama,
@@ -742,20 +778,9 @@ def repay_loan(request, loan_id):
         amount = Decimal(request.POST.get("amount"))
         phone = request.POST.get("phone")
         
-        # FIXED: Use 'phone' argument
-        result = initiate_stk_push(
-            user=request.user,
-            chama=loan.loan_chama,
-            phone=phone,
-            amount=amount,
-            transaction_type="loan_repayment",
-            internal_ref=f"LOANREPAY-{loan.id}"
-        )
-        
-        if result.get("success"):
-            messages.success(request, "Repayment initiated via M-Pesa.")
-        else:
-            messages.error(request, "Failed to initiate payment.")
+        # Queue the STK push, linked to this loan so the callback credits it
+        enqueue_stk_push(request.user, loan.loan_chama, phone, amount, "loan_repayment", loan=loan)
+        messages.success(request, "Repayment requested via M-Pesa. Check your phone shortly.")
             
     return redirect("finance:loan_detail", loan_id=loan.id)
 
@@ -896,122 +921,15 @@ def send_penalty_reminder(request, penalty_id):
 @login_required
 def query_transaction_page(request):
     return render(request, "finance/query_transaction.html")
-# In finance/views.py
-
 @login_required
 def query_transaction_api(request, checkout_id):
-    # 1. Setup Request
-    Timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    query_url = "https://sandbox.safaricom.co.ke/mpesa/stkpushquery/v1/query"
-    BusinessShortCode = settings.MPESA_SHORTCODE
-    passkey = settings.MPESA_PASSKEY
-    Password = base64.b64encode(f"{BusinessShortCode}{passkey}{Timestamp}".encode()).decode()
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token()}"
-    }
-    payload = {
-        "BusinessShortCode": BusinessShortCode,
-        "Password": Password,
-        "Timestamp": Timestamp,
-        "CheckoutRequestID": checkout_id
-    }
-    
     try:
-        # 2. Query Daraja
-        response = requests.post(query_url, json=payload, headers=headers)
-        data = response.json()
+        # 1. Query Daraja (pooled client)
+        data = stk_query(checkout_id)
         
-        # 3. CRITICAL: Parse Result & Update DB
-        result_code = str(data.get('ResultCode'))
-        result_desc = data.get('ResultDesc') or data.get('ResponseDescription', '')
+        # 2. Write the result back through the same logic as the callback
+        apply_query_results({checkout_id: data})
 
-        tx = Transaction.objects.filter(transaction_checkout_request_id=checkout_id).first()
-        
-        if tx:
-            # --- Handle Different Statuses ---
-            if result_code == '0':
-                tx.transaction_status = 'success'
-                if 'CallbackMetadata' in data:
-                    items = data['CallbackMetadata'].get('Item', [])
-                    for item in items:
-                        if item.get('Name') == 'MpesaReceiptNumber':
-                            tx.transaction_mpesa_receipt = item.get('Value')
-                        if item.get('Name') == 'PhoneNumber':
-                            tx.transaction_phone_number = item.get('Value')
-                            
-            elif result_code == '1032':
-                 # THIS IS THE MISSING PART FOR CANCELLATION
-                 tx.transaction_status = 'cancelled'
-                 tx.failure_reason = "Cancelled by user"
-                 
-            elif result_code not in ['0', '1032']:
-                 # Any other code (e.g. 1037 Timeout, 1 Insufficient Funds) is a failure
-                 tx.transaction_status = 'failed'
-                 tx.failure_reason = result_desc
-            
-            tx.save()
-            
-            # 4. Force Update the Contribution/Loan Record
-            update_related_record(tx)
-
-        # 5. Prepare Response for Frontend
-        payer_name = "Unknown Member"
-        local_amount = "-"
-        local_phone = "-"
-        local_receipt = "-"
-        local_date = "-"
-
-        if tx:
-            if tx.transaction_user:
-                full_name = f"{tx.transaction_user.user_first_name} {tx.transaction_user.user_last_name}".strip()
-                payer_name = full_name if full_name else tx.transaction_user.user_email
-            
-            local_amount = str(tx.transaction_amount)
-            local_phone = tx.transaction_phone_number
-            local_receipt = tx.transaction_mpesa_receipt or "Pending"
-            local_date = tx.transaction_created_at.strftime("%d/%m/%Y %H:%M")
-
-        data['LocalPayerName'] = payer_name
-        data['LocalAmount'] = local_amount
-        data['LocalPhone'] = local_phone
-        data['LocalReceipt'] = local_receipt
-        data['LocalDate'] = local_date
-        
-        # Inject our interpreted status so the badge shows correctly immediately
-        data['LocalStatus'] = tx.transaction_status if tx else "unknown"
-
-        return JsonResponse(data)
-        
-    except Exception as e:
-        return JsonResponse({"ResultCode": "1", "ResultDesc": str(e)})
-
-@login_required
-def query_transaction_api(request, checkout_id):
-    # 1. Setup Request
-    Timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    query_url = "https://sandbox.safaricom.co.ke/mpesa/stkpushquery/v1/query"
-    BusinessShortCode = settings.MPESA_SHORTCODE
-    passkey = settings.MPESA_PASSKEY
-    Password = base64.b64encode(f"{BusinessShortCode}{passkey}{Timestamp}".encode()).decode()
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token()}"
-    }
-    payload = {
-        "BusinessShortCode": BusinessShortCode,
-        "Password": Password,
-        "Timestamp": Timestamp,
-        "CheckoutRequestID": checkout_id
-    }
-    
-    try:
-        # 2. Query Daraja
-        response = requests.post(query_url, json=payload, headers=headers)
-        data = response.json()
-        
         # 3. Inject Local Data (Corrected for Custom User Model)
         tx = Transaction.objects.filter(transaction_checkout_request_id=checkout_id).first()
         
@@ -1059,108 +977,3 @@ def query_transaction_api(request, checkout_id):
         
     except Exception as e:
         return JsonResponse({"ResultCode": "1", "ResultDesc": str(e)})
-    
-@csrf_exempt
-def stk_callback(request):
-    if request.method != "POST":
-        return HttpResponse("Invalid request")
-
-    try:
-        data = json.loads(request.body.decode("utf-8"))
-        stk_data = data.get("Body", {}).get("stkCallback", {})
-        
-        ResultCode = stk_data.get("ResultCode")
-        CheckoutRequestID = stk_data.get("CheckoutRequestID")
-        
-        tx = Transaction.objects.filter(transaction_checkout_request_id=CheckoutRequestID).first()
-        if tx:
-            tx.transaction_status = "success" if ResultCode == 0 else "failed"
-            if ResultCode == 0:
-                metadata = stk_data.get("CallbackMetadata", {}).get("Item", [])
-                for item in metadata:
-                    if item.get("Name") == "Amount": 
-                        tx.transaction_amount = item.get("Value")
-                    if item.get("Name") == "MpesaReceiptNumber": 
-                        tx.transaction_mpesa_receipt = item.get("Value")
-                    if item.get("Name") == "PhoneNumber": 
-                        tx.transaction_phone_number = item.get("Value")
-            tx.save()
-            
-            # Update related records if payment was successful
-            if ResultCode == 0:
-                update_related_record(tx)
-            
-    except Exception as e:
-        print(f"Callback error: {str(e)}")
-        return JsonResponse({"ResultCode": 1, "ResultDesc": str(e)})
-
-    return JsonResponse({"ResultCode": 0, "ResultDesc": "Callback received"})
-
-def update_related_record(transaction):
-    """Update the related Contribution, Penalty, or Loan record based on transaction status"""
-    from finance.models import Contribution, Penalty, LoanRepayment, Loan
-    from decimal import Decimal
-    
-    # Get the status from the transaction (success, cancelled, or failed)
-    new_status = transaction.transaction_status
-
-    try:
-        if transaction.transaction_type == "contribution":
-            # Find the pending contribution
-            contrib = Contribution.objects.filter(
-                contribution_user=transaction.transaction_user,
-                contribution_chama=transaction.transaction_chama,
-                contribution_reference=transaction.transaction_checkout_request_id
-            ).first()
-            
-            # Fallback search if reference missing
-            if not contrib:
-                contrib = Contribution.objects.filter(
-                    contribution_user=transaction.transaction_user,
-                    contribution_chama=transaction.transaction_chama,
-                    contribution_status="pending",
-                    contribution_amount=Decimal(str(transaction.transaction_amount))
-                ).order_by('-contribution_created_at').first()
-            
-            if contrib:
-                contrib.contribution_status = new_status 
-                if new_status == "success":
-                    contrib.contribution_mpesa_receipt = transaction.transaction_mpesa_receipt
-                contrib.save()
-                print(f"✅ Updated contribution {contrib.id} to {new_status}")
-        
-        elif transaction.transaction_type == "penalty":
-            if new_status == "success":
-                penalty = Penalty.objects.filter(
-                    penalty_user=transaction.transaction_user,
-                    penalty_chama=transaction.transaction_chama,
-                    penalty_paid=False,
-                    penalty_amount=float(transaction.transaction_amount)
-                ).first()
-                if penalty:
-                    penalty.penalty_paid = True
-                    penalty.save()
-
-        elif transaction.transaction_type == "loan_repayment":
-            if new_status == "success":
-                loan = Loan.objects.filter(
-                    loan_user=transaction.transaction_user,
-                    loan_chama=transaction.transaction_chama,
-                    loan_status="active"
-                ).first()
-                
-                if loan:
-                    repayment = LoanRepayment.objects.create(
-                        loan_repayment_loan=loan,
-                        loan_repayment_user=transaction.transaction_user,
-                        loan_repayment_amount=Decimal(str(transaction.transaction_amount)),
-                        loan_repayment_mpesa_receipt=transaction.transaction_mpesa_receipt,
-                        loan_repayment_reference=transaction.transaction_checkout_request_id
-                    )
-                    loan.loan_outstanding_balance -= Decimal(str(transaction.transaction_amount))
-                    if loan.loan_outstanding_balance <= 0:
-                        loan.loan_status = "completed"
-                    loan.save()
-
-    except Exception as e:
-        print(f"❌ Error updating related record: {str(e)}")
\ No newline at end of file
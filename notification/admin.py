@@ -4,6 +4,9 @@ from notification.models import (
     Notification,
     NotificationReply,
     NotificationDeliveryLog,
+    NotificationCounter,
+    ArchivedNotification,
+    NotificationMessage,
     Meeting,
     MeetingAttendance,
 )
@@ -37,7 +40,13 @@ class NotificationAdmin(admin.ModelAdmin):
         "notification_created_at",
     )
     list_filter = ("notification_type", "notification_priority", "notification_is_read")
-    search_fields = ("notification_title", "notification_message", "notification_chama__chama_name")
+    list_select_related = ("notification_shared_message", "notification_chama", "notification_sender")
+    search_fields = (
+        "notification_title",
+        "notification_message",
+        "notification_shared_message__notification_message_title",
+        "notification_chama__chama_name",
+    )
     date_hierarchy = "notification_created_at"
     ordering = ("-notification_created_at",)
 
@@ -66,7 +75,11 @@ class NotificationDeliveryLogAdmin(admin.ModelAdmin):
         "updated_at",
     )
     list_filter = ("notification_status", "delivery_method")
-    search_fields = ("notification__notification_title", "member__username")
+    search_fields = (
+        "notification__notification_title",
+        "notification__notification_shared_message__notification_message_title",
+        "member__user_email",
+    )
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
 
@@ -100,3 +113,32 @@ class MeetingAttendanceAdmin(admin.ModelAdmin):
     search_fields = ("attendance_meeting__meeting_title", "attendance_user__username")
     date_hierarchy = "attendance_timestamp"
     ordering = ("-attendance_timestamp",)
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ("counter_user", "counter_chama", "counter_unread", "counter_updated_at")
+    search_fields = ("counter_user__user_email", "counter_chama__chama_name")
+    readonly_fields = ("counter_unread", "counter_updated_at")
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "archived_notification_user",
+        "archived_notification_chama",
+        "archived_notification_type",
+        "archived_notification_created_at",
+        "archived_notification_archived_at",
+    )
+    list_filter = ("archived_notification_type",)
+    search_fields = ("archived_notification_user__user_email", "archived_notification_title")
+    date_hierarchy = "archived_notification_created_at"
+
+
+@admin.register(NotificationMessage)
+class NotificationMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "notification_message_title", "notification_message_created_at")
+    search_fields = ("notification_message_title", "notification_message_body")
+    date_hierarchy = "notification_message_created_at"
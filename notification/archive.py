@@ -0,0 +1,146 @@
+"""
+Archival of old read notifications.
+
+Every broadcast writes one Notification row per member and nothing is
+pruned, so the table and its indexes keep growing. archive_notifications()
+moves read notifications older than NOTIFICATION_ARCHIVE_DAYS into
+ArchivedNotification, which keeps only the content and the original id.
+Each batch is claimed with SKIP LOCKED, copied and deleted in its own short
+transaction, so the archiver never holds long locks and can run alongside
+the app (`archive_notifications` command, nightly).
+
+Notifications with replies or with an email/SMS delivery still queued are
+left in place. The in-app and delivery logs of archived notifications are
+deleted with them, and so is a shared NotificationMessage once its last
+recipient row is archived.
+
+NotificationHistory reads both tables as one newest-first list, so the
+notification list keeps showing archived history.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from notification.models import (
+    ArchivedNotification, Notification, NotificationDeliveryLog, NotificationMessage, NotificationReply
+)
+
+# Notification field -> ArchivedNotification field
+ARCHIVE_FIELDS = {
+    "id": "id",
+    "notification_user_id": "archived_notification_user_id",
+    "notification_chama_id": "archived_notification_chama_id",
+    "notification_sender_id": "archived_notification_sender_id",
+    "notification_title": "archived_notification_title",
+    "notification_message": "archived_notification_message",
+    "notification_type": "archived_notification_type",
+    "notification_priority": "archived_notification_priority",
+    "notification_created_at": "archived_notification_created_at",
+    "notification_updated_at": "archived_notification_read_at",
+}
+
+# Notification content field -> NotificationMessage field it falls back to
+SHARED_CONTENT = {
+    "notification_title": "notification_message_title",
+    "notification_message": "notification_message_body",
+}
+
+
+def archivable(days=None, chama_ids=None):
+    """Read notifications created more than `days` ago that nothing else still needs."""
+    days = settings.NOTIFICATION_ARCHIVE_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    queryset = Notification.objects.filter(
+        notification_is_read=True, notification_created_at__lt=cutoff
+    ).exclude(
+        Exists(NotificationReply.objects.filter(notification_reply_notification=OuterRef("pk")))
+    ).exclude(
+        Exists(NotificationDeliveryLog.objects.filter(
+            notification=OuterRef("pk"), notification_status__in=["pending", "sending"]
+        ))
+    )
+    if chama_ids:
+        queryset = queryset.filter(notification_chama_id__in=chama_ids)
+    return queryset
+
+
+def archive_batch(queryset, batch_size=1000):
+    """Move up to batch_size rows of `queryset` to the archive in one transaction. Returns the number moved."""
+    # Broadcast rows keep their text on the shared NotificationMessage
+    columns = [
+        Coalesce(name, f"notification_shared_message__{SHARED_CONTENT[name]}") if name in SHARED_CONTENT else name
+        for name in ARCHIVE_FIELDS
+    ]
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update(skip_locked=True, of=("self",))
+            .order_by("id")
+            .values_list("notification_shared_message_id", *columns)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedNotification.objects.bulk_create([
+            ArchivedNotification(**dict(zip(ARCHIVE_FIELDS.values(), row[1:])))
+            for row in rows
+        ])
+        Notification.objects.filter(id__in=[row[1] for row in rows]).delete()
+        # Shared messages whose last recipient row was just archived
+        NotificationMessage.objects.filter(
+            id__in={row[0] for row in rows if row[0]}, notifications__isnull=True
+        ).delete()
+    return len(rows)
+
+
+def archive_notifications(days=None, chama_ids=None, batch_size=1000, max_batches=None):
+    """Archive batches until nothing is left (or max_batches ran). Returns the number archived."""
+    queryset = archivable(days, chama_ids)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(queryset, batch_size)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return total
+
+
+class NotificationHistory:
+    """
+    Live and archived notifications as one sequence, newest first, that
+    Paginator can count and slice. Each page costs one UNION query for the
+    ids and one query per table for the rows.
+    """
+
+    def __init__(self, notifications, archived):
+        self.notifications = notifications
+        self.archived = archived
+
+    def _ids(self):
+        live = self.notifications.order_by().values_list(
+            "id", "notification_created_at", Value(False, output_field=BooleanField())
+        )
+        old = self.archived.order_by().values_list(
+            "id", "archived_notification_created_at", Value(True, output_field=BooleanField())
+        )
+        return live.union(old, all=True).order_by("-notification_created_at", "-id")
+
+    def count(self):
+        return self._ids().count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        page = list(self._ids()[index])
+        live = self.notifications.in_bulk([i for i, _, is_archived in page if not is_archived])
+        old = self.archived.select_related(
+            "archived_notification_chama", "archived_notification_sender"
+        ).in_bulk([i for i, _, is_archived in page if is_archived])
+        return [old[i].as_notification() if is_archived else live[i] for i, _, is_archived in page]
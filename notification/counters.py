@@ -0,0 +1,131 @@
+"""
+Unread-notification counters per (user, chama).
+
+The notification bell reads one NotificationCounter row instead of
+counting Notification rows. Counters change with F() updates:
+- single saves and deletes go through notification.signals, including a
+  save() that flips notification_is_read (e.g. in the admin);
+- bulk inserts call notifications_created();
+- the app changes read state with mark_read() and mark_all_read().
+
+A missing counter is rebuilt from the notifications the first time it is
+read or incremented, so counters never need a backfill.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from notification.models import Notification, NotificationCounter
+
+
+def _unread(user_id, chama_id):
+    return Notification.objects.filter(
+        notification_user_id=user_id, notification_chama_id=chama_id, notification_is_read=False
+    )
+
+
+def rebuild_counter(user_id, chama_id):
+    """Recount from the notifications and store it. Returns the counter."""
+    count = _unread(user_id, chama_id).count()
+    try:
+        with transaction.atomic():
+            counter, _ = NotificationCounter.objects.update_or_create(
+                counter_user_id=user_id, counter_chama_id=chama_id, defaults={"counter_unread": count}
+            )
+    except IntegrityError:
+        counter = NotificationCounter.objects.get(counter_user_id=user_id, counter_chama_id=chama_id)
+    return counter
+
+
+def adjust_unread(chama_id, changes):
+    """
+    Apply {user_id: change} to one chama's counters, one UPDATE per distinct
+    change. Missing counters are created from the notifications when the
+    change is an increase; decreases of a missing counter are dropped.
+    """
+    by_change = defaultdict(list)
+    for user_id, change in changes.items():
+        if change:
+            by_change[change].append(user_id)
+
+    now = timezone.now()
+    counters = NotificationCounter.objects.filter(counter_chama_id=chama_id)
+    for change, user_ids in by_change.items():
+        counters.filter(counter_user_id__in=user_ids).update(
+            counter_unread=F("counter_unread") + change, counter_updated_at=now
+        )
+
+    increased = [user_id for user_id, change in changes.items() if change > 0]
+    if not increased:
+        return
+    missing = set(increased) - set(
+        counters.filter(counter_user_id__in=increased).values_list("counter_user_id", flat=True)
+    )
+    if missing:
+        counts = dict(
+            Notification.objects.filter(
+                notification_chama_id=chama_id, notification_user_id__in=missing, notification_is_read=False
+            )
+            .values("notification_user_id")
+            .annotate(unread=Count("id"))
+            .values_list("notification_user_id", "unread")
+        )
+        NotificationCounter.objects.bulk_create(
+            [
+                NotificationCounter(counter_user_id=user_id, counter_chama_id=chama_id, counter_unread=counts.get(user_id, 0))
+                for user_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def notifications_created(notifications):
+    """Count notifications inserted with bulk_create()."""
+    by_chama = defaultdict(Counter)
+    for notif in notifications:
+        if not notif.notification_is_read:
+            by_chama[notif.notification_chama_id][notif.notification_user_id] += 1
+    for chama_id, changes in by_chama.items():
+        adjust_unread(chama_id, changes)
+
+
+def unread_count(user, chama):
+    counter = NotificationCounter.objects.filter(counter_user=user, counter_chama=chama).first()
+    if counter is None:
+        counter = rebuild_counter(user.id, chama.id)
+    return max(counter.counter_unread, 0)
+
+
+def mark_read(notification):
+    """Mark one notification read; only the request that flips it decrements the counter."""
+    with transaction.atomic():
+        updated = Notification.objects.filter(id=notification.id, notification_is_read=False).update(
+            notification_is_read=True, notification_updated_at=timezone.now()
+        )
+        if updated:
+            adjust_unread(notification.notification_chama_id, {notification.notification_user_id: -1})
+    notification.notification_is_read = True
+    return bool(updated)
+
+
+def mark_all_read(user, chama_id):
+    """
+    Mark all of a user's notifications in a chama read and zero the counter
+    in one transaction. The counter row is locked first, so a notification
+    created meanwhile is counted after the reset rather than lost.
+    """
+    with transaction.atomic():
+        counter = NotificationCounter.objects.select_for_update().filter(
+            counter_user=user, counter_chama_id=chama_id
+        ).first()
+        updated = _unread(user.id, chama_id).update(
+            notification_is_read=True, notification_updated_at=timezone.now()
+        )
+        if counter:
+            counter.counter_unread = 0
+            counter.save(update_fields=["counter_unread", "counter_updated_at"])
+        else:
+            rebuild_counter(user.id, chama_id)
+    return updated
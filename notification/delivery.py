@@ -0,0 +1,245 @@
+"""
+Database-backed queue for email and SMS delivery.
+
+Views create the in-app notifications and call queue_deliveries(), which
+adds one pending NotificationDeliveryLog per recipient for their preferred
+external channel: email if they allow it, otherwise SMS. The
+`run_delivery_worker` management command claims pending rows per channel
+with SKIP LOCKED and sends them. Each batch of emails goes through one
+connection from get_connection(). SMS goes through the backend named by
+NOTIFICATION_SMS_BACKEND.
+
+A failed send is retried with exponential backoff up to
+NOTIFICATION_MAX_ATTEMPTS. When a delivery fails for good and the user
+has `fallback` on, it is queued again on their other allowed channel.
+Claimed rows are leased, so rows left behind by a crashed worker are
+picked up again once the lease runs out.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from notification.models import NotificationDeliveryLog, UserNotificationSettings
+
+CHANNELS = ("email", "sms")
+LEASE = timedelta(minutes=5)
+
+
+# --- SMS backends ------------------------------------------------------------
+
+class BaseSmsBackend:
+    """Same shape as Django's email backends: open(), close(), send_messages()."""
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        """Send (phone number, text) pairs; raise on failure. Returns the number sent."""
+        raise NotImplementedError
+
+
+class ConsoleSmsBackend(BaseSmsBackend):
+    """Print messages instead of sending them (local development)."""
+
+    def send_messages(self, messages):
+        for phone, text in messages:
+            print(f"📱 SMS to {phone}: {text}")
+        return len(messages)
+
+
+class LocmemSmsBackend(BaseSmsBackend):
+    """Keep sent messages in LocmemSmsBackend.outbox (tests and demos)."""
+
+    outbox = []
+
+    def send_messages(self, messages):
+        self.outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_backend():
+    return import_string(settings.NOTIFICATION_SMS_BACKEND)()
+
+
+# --- Queueing ------------------------------------------------------------------
+
+def _preferences(user_ids):
+    """{user_id: (allow_email, allow_sms, fallback)}; users without settings get the model defaults."""
+    rows = UserNotificationSettings.objects.filter(
+        user_notification_settings_user_id__in=user_ids
+    ).values_list(
+        "user_notification_settings_user_id",
+        "user_notification_settings_allow_email",
+        "user_notification_settings_allow_sms",
+        "user_notification_settings_fallback",
+    )
+    return {user_id: prefs for user_id, *prefs in rows}
+
+
+def _address(user, channel):
+    return user.user_email if channel == "email" else user.user_phone_number
+
+
+def _allowed_channels(user, prefs):
+    allow_email, allow_sms, _ = prefs
+    allowed = {"email": allow_email, "sms": allow_sms}
+    return [channel for channel in CHANNELS if allowed[channel] and _address(user, channel)]
+
+
+def queue_deliveries(notifications):
+    """
+    Queue an email or SMS for each notification (whose notification_user
+    is loaded). Returns the number queued.
+    """
+    default = (True, True, True)
+    prefs = _preferences({n.notification_user_id for n in notifications})
+    logs = []
+    for notif in notifications:
+        channels = _allowed_channels(notif.notification_user, prefs.get(notif.notification_user_id, default))
+        if channels:
+            logs.append(NotificationDeliveryLog(
+                notification=notif,
+                member_id=notif.notification_user_id,
+                delivery_method=channels[0],
+                notification_status="pending",
+            ))
+    NotificationDeliveryLog.objects.bulk_create(logs, batch_size=settings.NOTIFICATION_BATCH_SIZE)
+    return len(logs)
+
+
+def requeue(log):
+    """Send a delivery again from scratch (the resend button)."""
+    NotificationDeliveryLog.objects.filter(id=log.id).update(
+        notification_status="pending",
+        delivery_attempts=0,
+        delivery_next_attempt_at=None,
+        delivery_error="",
+        updated_at=timezone.now(),
+    )
+
+
+# --- Worker --------------------------------------------------------------------
+
+def claim_deliveries(channel, batch_size=50):
+    """
+    Atomically lease up to batch_size due deliveries on one channel. Rows
+    still 'sending' after their lease expired are claimed again.
+    """
+    now = timezone.now()
+    due = Q(delivery_next_attempt_at__isnull=True) | Q(delivery_next_attempt_at__lte=now)
+    with transaction.atomic():
+        ids = list(
+            NotificationDeliveryLog.objects.select_for_update(skip_locked=True)
+            .filter(due, delivery_method=channel, notification_status__in=["pending", "sending"])
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        NotificationDeliveryLog.objects.filter(id__in=ids).update(
+            notification_status="sending",
+            delivery_attempts=F("delivery_attempts") + 1,
+            delivery_next_attempt_at=now + LEASE,
+            updated_at=now,
+        )
+    return list(
+        NotificationDeliveryLog.objects.filter(id__in=ids)
+        .select_related("notification__notification_chama", "notification__notification_shared_message", "member")
+        .order_by("id")
+    )
+
+
+def _email(log, connection):
+    notif = log.notification
+    return EmailMessage(
+        subject=f"[{notif.notification_chama.chama_name}] {notif.notification_title or ''}".strip(),
+        body=notif.notification_message,
+        from_email=settings.EMAIL_HOST_USER or settings.DEFAULT_FROM_EMAIL,
+        to=[log.member.user_email],
+        connection=connection,
+    )
+
+
+def _sms(log):
+    notif = log.notification
+    text = f"{notif.notification_chama.chama_name}: {notif.notification_title or ''}\n{notif.notification_message}"
+    return log.member.user_phone_number, text.strip()
+
+
+def deliver(channel, logs):
+    """Send a claimed batch over one connection and record each outcome. Returns (sent, failed)."""
+    if channel == "email":
+        connection = get_connection(backend=settings.NOTIFICATION_EMAIL_BACKEND, fail_silently=False)
+        messages = [(log, _email(log, connection)) for log in logs]
+    else:
+        connection = get_sms_backend()
+        messages = [(log, _sms(log)) for log in logs]
+
+    sent, failed = [], []
+    try:
+        connection.open()
+        for log, message in messages:
+            try:
+                # One message per call so each outcome is known; the connection stays open
+                connection.send_messages([message])
+                sent.append(log)
+            except Exception as exc:
+                failed.append((log, exc))
+    except Exception as exc:
+        # Could not connect at all; the whole batch is retried
+        failed = [(log, exc) for log in logs if log not in sent]
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    now = timezone.now()
+    NotificationDeliveryLog.objects.filter(id__in=[log.id for log in sent]).update(
+        notification_status="sent", delivery_next_attempt_at=None, delivery_error="", updated_at=now
+    )
+    for log, exc in failed:
+        _record_failure(log, exc, now)
+    return len(sent), len(failed)
+
+
+def _record_failure(log, exc, now):
+    log.delivery_error = str(exc)[:255]
+    if log.delivery_attempts < settings.NOTIFICATION_MAX_ATTEMPTS:
+        backoff = settings.NOTIFICATION_RETRY_BACKOFF * 2 ** (log.delivery_attempts - 1)
+        log.notification_status = "pending"
+        log.delivery_next_attempt_at = now + timedelta(seconds=backoff)
+    else:
+        log.notification_status = "failed"
+        log.delivery_next_attempt_at = None
+        _fall_back(log)
+    log.save(update_fields=["notification_status", "delivery_next_attempt_at", "delivery_error", "updated_at"])
+    print(f"❌ {log.delivery_method} delivery {log.id} failed (attempt {log.delivery_attempts}): {exc}")
+
+
+def _fall_back(log):
+    """Queue the user's other allowed channel if they opted into fallback and it was not tried yet."""
+    prefs = _preferences([log.member_id]).get(log.member_id, (True, True, True))
+    if not prefs[2]:
+        return
+    tried = set(
+        NotificationDeliveryLog.objects.filter(notification=log.notification)
+        .values_list("delivery_method", flat=True)
+    )
+    for channel in _allowed_channels(log.member, prefs):
+        if channel not in tried:
+            NotificationDeliveryLog.objects.create(
+                notification=log.notification,
+                member=log.member,
+                delivery_method=channel,
+                notification_status="pending",
+            )
+            return
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notification.archive import archive_notifications
+
+
+class Command(BaseCommand):
+    help = "Move read notifications older than NOTIFICATION_ARCHIVE_DAYS to the archive table, in short batches. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.NOTIFICATION_ARCHIVE_DAYS, help="Archive read notifications older than this.")
+        parser.add_argument("--chama", type=int, action="append", help="Only this chama id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Notifications moved per transaction.")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        archived = archive_notifications(
+            days=options["days"],
+            chama_ids=options["chama"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} notification(s) older than {options['days']} day(s)."))
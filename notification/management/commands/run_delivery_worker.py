@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notification.delivery import CHANNELS, claim_deliveries, deliver
+
+
+class Command(BaseCommand):
+    help = "Send queued email and SMS notifications (no external broker needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Deliveries claimed per poll, per worker.")
+        parser.add_argument("--email-concurrency", type=int, default=2, help="Email workers (one SMTP connection each).")
+        parser.add_argument("--sms-concurrency", type=int, default=4, help="SMS workers.")
+        parser.add_argument("--channel", choices=CHANNELS, action="append", help="Only this channel (repeatable).")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when a channel's queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queues once and exit.")
+
+    def handle(self, *args, **options):
+        self.totals = {"sent": 0, "failed": 0}
+        self.lock = threading.Lock()
+        workers = [
+            channel
+            for channel in options["channel"] or CHANNELS
+            for _ in range(max(options[f"{channel}_concurrency"], 0))
+        ]
+
+        with ThreadPoolExecutor(max_workers=max(len(workers), 1)) as pool:
+            for future in [pool.submit(self.work, channel, options) for channel in workers]:
+                future.result()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {self.totals['sent']} notification(s); {self.totals['failed']} failed attempt(s)."
+        ))
+
+    def work(self, channel, options):
+        try:
+            while True:
+                logs = claim_deliveries(channel, options["batch_size"])
+                if logs:
+                    sent, failed = deliver(channel, logs)
+                    with self.lock:
+                        self.totals["sent"] += sent
+                        self.totals["failed"] += failed
+                    self.stdout.write(f"{channel}: {sent} sent, {failed} failed")
+                    continue
+
+                if options["once"]:
+                    break
+                close_old_connections()
+                time.sleep(options["sleep"])
+        finally:
+            close_old_connections()
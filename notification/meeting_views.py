@@ -5,7 +5,8 @@ from django.contrib import messages
 from django.db import transaction
 from django.db.models import Q
 
-from .models import Meeting, MeetingAttendance, Notification
+from .counters import notifications_created
+from .models import Meeting, MeetingAttendance, Notification, NotificationMessage
 from chama.models import Membership, Chama
 from .forms import MeetingForm
 
@@ -38,17 +39,18 @@ def get_active_chama_id(request):
 def create_notification_for_group(chama_id, message, type, related_meeting=None):
     """Creates a notification for all members of a chama."""
     if not chama_id: return
-    members = Membership.objects.filter(membership_chama_id=chama_id)
+    members = Membership.objects.filter(membership_chama_id=chama_id).select_related("membership_user")
+    shared = NotificationMessage.objects.create(notification_message_body=message)
     notifications = []
     for member in members:
         notifications.append(Notification(
             notification_user=member.membership_user,
             notification_chama_id=chama_id,
-            notification_message=message,
+            notification_shared_message=shared,
             notification_type=type,
             notification_related_meeting=related_meeting
         ))
-    Notification.objects.bulk_create(notifications)
+    notifications_created(Notification.objects.bulk_create(notifications))
 
 # -----------------------------------------------------
 # 1. Meetings List Page (User)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationdeliverylog',
+            name='delivery_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificationdeliverylog',
+            name='delivery_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationdeliverylog',
+            name='delivery_error',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='notificationdeliverylog',
+            name='notification_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='notificationdeliverylog',
+            index=models.Index(fields=['notification_status', 'delivery_method', 'delivery_next_attempt_at'], name='delivery_queue_idx'),
+        ),
+    ]
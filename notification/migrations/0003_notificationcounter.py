@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('notification', '0002_delivery_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counter_unread', models.IntegerField(default=0)),
+                ('counter_updated_at', models.DateTimeField(auto_now=True)),
+                ('counter_chama', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_counters', to='chama.chama')),
+                ('counter_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('counter_user', 'counter_chama'), name='unique_counter_per_user_chama')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['notification_user', 'notification_chama', 'notification_is_read', '-notification_created_at'], name='notif_user_chama_unread_idx'),
+        ),
+    ]
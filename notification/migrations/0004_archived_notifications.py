@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chama', '0001_initial'),
+        ('notification', '0003_notificationcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_notification_title', models.CharField(blank=True, max_length=100, null=True)),
+                ('archived_notification_message', models.TextField()),
+                ('archived_notification_type', models.CharField(choices=[('reminder', 'Reminder'), ('loan', 'Loan'), ('payment', 'Payment'), ('meeting', 'Meeting'), ('announcement', 'Announcement'), ('member_joined', 'Member Joined'), ('transaction', 'Transaction'), ('penalty', 'Penalty')], max_length=30)),
+                ('archived_notification_priority', models.CharField(choices=[('low', 'Low'), ('normal', 'Normal'), ('high', 'High')], default='normal', max_length=10)),
+                ('archived_notification_created_at', models.DateTimeField()),
+                ('archived_notification_read_at', models.DateTimeField()),
+                ('archived_notification_archived_at', models.DateTimeField(auto_now_add=True)),
+                ('archived_notification_chama', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to='chama.chama')),
+                ('archived_notification_sender', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('archived_notification_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['archived_notification_user', 'archived_notification_chama', '-archived_notification_created_at'], name='archived_notif_user_chama_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('notification_is_read', True)), fields=['notification_created_at'], name='notif_read_created_idx'),
+        ),
+    ]
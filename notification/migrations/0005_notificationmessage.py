@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:20
+
+import django.db.models.deletion
+import notification.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0004_archived_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_message_title', models.CharField(blank=True, max_length=100, null=True)),
+                ('notification_message_body', models.TextField()),
+                ('notification_message_created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_message',
+            field=notification.models.SharedTextField(null=True, shared_field='notification_message_body'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_title',
+            field=notification.models.SharedCharField(blank=True, max_length=100, null=True, shared_field='notification_message_title'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='notification_shared_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='notification.notificationmessage'),
+        ),
+    ]
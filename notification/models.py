@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models.query_utils import DeferredAttribute
 from chama.models import Chama
 from finance.models import Loan, Contribution, Penalty
 
@@ -17,6 +18,65 @@ class UserNotificationSettings(models.Model):
         return f"Notification Settings for {self.user_notification_settings_user}"
 
 
+class NotificationMessage(models.Model):
+    """Title and text of a broadcast, stored once and shared by every recipient's Notification row."""
+    notification_message_title = models.CharField(max_length=100, blank=True, null=True)
+    notification_message_body = models.TextField()
+    notification_message_created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.notification_message_title or self.notification_message_body[:50]
+
+
+class SharedContentDescriptor(DeferredAttribute):
+    """
+    Reads the row's own value, or the shared NotificationMessage's when the
+    row has none (NULL) and points at one.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        data = instance.__dict__
+        name = self.field.attname
+        if name not in data:
+            # Deferred: load the row's own value, not the resolved one
+            data[name] = type(instance)._base_manager.filter(pk=instance.pk).values_list(name, flat=True).get()
+        value = data[name]
+        if value is None and instance.notification_shared_message_id:
+            return getattr(instance.notification_shared_message, self.field.shared_field)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class SharedContentMixin:
+    """Field mixin for Notification content that can live on a NotificationMessage instead."""
+    descriptor_class = SharedContentDescriptor
+
+    def __init__(self, *args, shared_field, **kwargs):
+        self.shared_field = shared_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["shared_field"] = self.shared_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        # Save the row's own value; shared content stays on the NotificationMessage
+        return model_instance.__dict__.get(self.attname)
+
+
+class SharedCharField(SharedContentMixin, models.CharField):
+    pass
+
+
+class SharedTextField(SharedContentMixin, models.TextField):
+    pass
+
+
 class Notification(models.Model):
     NOTIFICATION_TYPE = [
         ('reminder', 'Reminder'),
@@ -37,8 +97,16 @@ class Notification(models.Model):
 
     notification_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     notification_chama = models.ForeignKey(Chama, on_delete=models.CASCADE)
-    notification_title = models.CharField(max_length=100, blank=True, null=True)
-    notification_message = models.TextField()
+    # Broadcasts leave these NULL and read them from notification_shared_message
+    notification_title = SharedCharField(max_length=100, blank=True, null=True, shared_field="notification_message_title")
+    notification_message = SharedTextField(null=True, shared_field="notification_message_body")
+    notification_shared_message = models.ForeignKey(
+        NotificationMessage,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notifications"
+    )
     notification_type = models.CharField(max_length=30, choices=NOTIFICATION_TYPE)
     notification_priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='normal')
     notification_sender = models.ForeignKey(
@@ -77,10 +145,87 @@ class Notification(models.Model):
         related_name="penalty_notifications"
     )
 
+    class Meta:
+        indexes = [
+            # Unread count and newest-unread list for the notification bell
+            models.Index(
+                fields=["notification_user", "notification_chama", "notification_is_read", "-notification_created_at"],
+                name="notif_user_chama_unread_idx",
+            ),
+            # Read notifications by age, scanned by the archiver
+            models.Index(
+                fields=["notification_created_at"],
+                name="notif_read_created_idx",
+                condition=models.Q(notification_is_read=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.notification_type} - {self.notification_chama}"
 
 
+class ArchivedNotification(models.Model):
+    """A read notification moved out of the Notification table by notification.archive; keeps its id."""
+    id = models.BigIntegerField(primary_key=True)
+    archived_notification_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_notifications")
+    archived_notification_chama = models.ForeignKey(Chama, on_delete=models.CASCADE, related_name="archived_notifications")
+    archived_notification_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    archived_notification_title = models.CharField(max_length=100, blank=True, null=True)
+    archived_notification_message = models.TextField()
+    archived_notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPE)
+    archived_notification_priority = models.CharField(max_length=10, choices=Notification.PRIORITY_LEVELS, default='normal')
+    archived_notification_created_at = models.DateTimeField()
+    archived_notification_read_at = models.DateTimeField()
+    archived_notification_archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["archived_notification_user", "archived_notification_chama", "-archived_notification_created_at"],
+                name="archived_notif_user_chama_idx",
+            ),
+        ]
+
+    def as_notification(self):
+        """An unsaved, read Notification with this row's content, for views and templates built on Notification."""
+        notification = Notification(
+            id=self.id,
+            notification_user_id=self.archived_notification_user_id,
+            notification_chama=self.archived_notification_chama,
+            notification_sender=self.archived_notification_sender,
+            notification_title=self.archived_notification_title,
+            notification_message=self.archived_notification_message,
+            notification_type=self.archived_notification_type,
+            notification_priority=self.archived_notification_priority,
+            notification_is_read=True,
+            notification_created_at=self.archived_notification_created_at,
+            notification_updated_at=self.archived_notification_read_at,
+        )
+        notification.is_archived = True
+        return notification
+
+    def __str__(self):
+        return f"{self.archived_notification_type} - {self.archived_notification_chama} (archived)"
+
+
+class NotificationCounter(models.Model):
+    """Unread notifications of one user in one chama, kept current by notification.counters."""
+    counter_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notification_counters")
+    counter_chama = models.ForeignKey(Chama, on_delete=models.CASCADE, related_name="notification_counters")
+    counter_unread = models.IntegerField(default=0)
+    counter_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["counter_user", "counter_chama"], name="unique_counter_per_user_chama"),
+        ]
+
+    def __str__(self):
+        return f"{self.counter_user} — {self.counter_chama} — {self.counter_unread} unread"
+
+
 class NotificationReply(models.Model):
     notification_reply_notification = models.ForeignKey(Notification, on_delete=models.CASCADE)
     notification_reply_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -102,6 +247,7 @@ class NotificationDeliveryLog(models.Model):
         max_length=20,
         choices=[
             ('pending', 'Pending'),
+            ('sending', 'Sending'),
             ('sent', 'Sent'),
             ('failed', 'Failed'),
         ],
@@ -117,9 +263,21 @@ class NotificationDeliveryLog(models.Model):
         null=True,
         blank=True
     )
+    # Email/SMS queue state, managed by notification.delivery
+    delivery_attempts = models.PositiveIntegerField(default=0)
+    delivery_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    delivery_error = models.CharField(max_length=255, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["notification_status", "delivery_method", "delivery_next_attempt_at"],
+                name="delivery_queue_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.member} - {self.notification_status}"
 
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from notification.counters import adjust_unread
+from notification.models import Notification
+
+
+def _unread_key(notification):
+    """(chama_id, user_id) the notification counts towards, or None once it is read."""
+    if notification.notification_is_read:
+        return None
+    return notification.notification_chama_id, notification.notification_user_id
+
+
+@receiver(pre_save, sender=Notification)
+def _remember_unread_key(sender, instance, **kwargs):
+    """Load the stored read state before a save() that may change it (e.g. from the admin)."""
+    instance._unread_key_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    stored = Notification.objects.filter(pk=instance.pk).values(
+        "notification_is_read", "notification_chama_id", "notification_user_id"
+    ).first()
+    if stored and not stored["notification_is_read"]:
+        instance._unread_key_before = stored["notification_chama_id"], stored["notification_user_id"]
+
+
+@receiver(post_save, sender=Notification)
+def _count_new_notification(sender, instance, created, **kwargs):
+    if created:
+        if not instance.notification_is_read:
+            adjust_unread(instance.notification_chama_id, {instance.notification_user_id: 1})
+        return
+
+    before, after = getattr(instance, "_unread_key_before", None), _unread_key(instance)
+    if before == after:
+        return
+    if before:
+        adjust_unread(before[0], {before[1]: -1})
+    if after:
+        adjust_unread(after[0], {after[1]: 1})
+
+
+@receiver(post_delete, sender=Notification)
+def _uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.notification_is_read:
+        adjust_unread(instance.notification_chama_id, {instance.notification_user_id: -1})
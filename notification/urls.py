@@ -23,6 +23,7 @@ urlpatterns = [
     path("edit/<int:pk>/", views.NotificationUpdateView.as_view(), name="edit_notification"),
     path("delete/<int:pk>/", views.NotificationDeleteView.as_view(), name="delete_notification"),
     path("mark/<int:id>/", views.mark_as_read, name="mark_as_read"),
+    path("chama/<int:chama_id>/mark-all-read/", views.mark_all_read, name="mark_all_read"),
     path("reply/save/<int:reply_id>/", views.save_reply_edit, name="save_reply_edit"),
     path("reply/delete/<int:reply_id>/", views.delete_reply, name="delete_reply"),
 
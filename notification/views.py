@@ -5,11 +5,14 @@ from django.views.generic import DetailView, UpdateView, DeleteView, ListView
 from django.contrib import messages
 from django.http import JsonResponse, Http404
 from django.db.models import Q
-from django.core.mail import send_mail
-from django.conf import settings as django_settings 
 from django.urls import reverse_lazy
-from .models import Notification, NotificationReply, NotificationDeliveryLog, UserNotificationSettings
+from django.utils.http import url_has_allowed_host_and_scheme
+from .models import ArchivedNotification, Notification, NotificationReply, NotificationDeliveryLog, UserNotificationSettings
 from chama.models import Chama, Membership
+from common.utils import send_chama_notification
+from notification.archive import NotificationHistory
+from notification.counters import mark_all_read as mark_all_notifications_read, mark_read
+from notification.delivery import CHANNELS, queue_deliveries, requeue
 from notification.forms import NotificationForm
 
 # Handle the mixin import gracefully
@@ -30,28 +33,37 @@ class NotificationListView(PaginatedListMixin, ListView):
     def get_queryset(self):
         qs = Notification.objects.filter(
             notification_user=self.request.user
-        ).select_related("notification_sender", "notification_chama").order_by("-notification_created_at")
+        ).select_related("notification_sender", "notification_chama", "notification_shared_message").order_by("-notification_created_at")
+        archived = ArchivedNotification.objects.filter(archived_notification_user=self.request.user)
 
         # --- FILTERING LOGIC ---
         url_chama_id = self.kwargs.get("chama_id")
         get_chama_id = self.request.GET.get("chama")
         session_chama_id = self.request.session.get('active_chama_id')
 
+        chama_id = None
         if url_chama_id:
-            qs = qs.filter(notification_chama_id=url_chama_id)
+            chama_id = url_chama_id
         elif get_chama_id is not None:
-            if get_chama_id:
-                qs = qs.filter(notification_chama_id=get_chama_id)
+            chama_id = get_chama_id or None
         elif session_chama_id:
-            qs = qs.filter(notification_chama_id=session_chama_id)
+            chama_id = session_chama_id
+        if chama_id:
+            qs = qs.filter(notification_chama_id=chama_id)
+            archived = archived.filter(archived_notification_chama_id=chama_id)
 
         # --- TYPE FILTERING ---
         filter_type = self.request.GET.get("type", "all")
         if filter_type == "announcements":
             qs = qs.filter(notification_type="announcement")
+            archived = archived.filter(archived_notification_type="announcement")
         elif filter_type == "targeted":
             qs = qs.exclude(notification_type="announcement")
-            
+            archived = archived.exclude(archived_notification_type="announcement")
+
+        # Older read notifications live in the archive; page through both
+        if archived.exists():
+            return NotificationHistory(qs, archived)
         return qs
 
     def get_context_data(self, **kwargs):
@@ -85,14 +97,22 @@ class NotificationDetailView(DetailView):
         # Security: User must be the recipient (notification_user) or the sender
         return Notification.objects.filter(
             Q(notification_user=self.request.user) | Q(notification_sender=self.request.user)
-        )
+        ).select_related("notification_shared_message")
 
     def get_object(self, queryset=None):
-        obj = super().get_object(queryset)
+        try:
+            obj = super().get_object(queryset)
+        except Http404:
+            archived = ArchivedNotification.objects.filter(
+                Q(archived_notification_user=self.request.user) | Q(archived_notification_sender=self.request.user),
+                id=self.kwargs["pk"],
+            ).select_related("archived_notification_chama", "archived_notification_sender").first()
+            if archived is None:
+                raise
+            return archived.as_notification()
         # Mark as read if the viewer is the recipient
-        if obj.notification_user == self.request.user and not obj.notification_is_read:
-            obj.notification_is_read = True
-            obj.save()
+        if obj.notification_user_id == self.request.user.id and not obj.notification_is_read:
+            mark_read(obj)
         return obj
 
     def get_context_data(self, **kwargs):
@@ -101,7 +121,10 @@ class NotificationDetailView(DetailView):
             notification_reply_notification=self.object
         ).select_related("notification_reply_user").order_by('notification_reply_created_at')
         
-        ctx["allow_replies"] = self.object.notification_type not in ['announcement', 'reminder']
+        ctx["allow_replies"] = (
+            self.object.notification_type not in ['announcement', 'reminder']
+            and not getattr(self.object, "is_archived", False)
+        )
         return ctx
 
 # -----------------------------------------------------
@@ -159,7 +182,7 @@ def notification_reply(request, id):
     return redirect("notification:notification_detail", pk=id)
 
 # -----------------------------------------------------
-# 4. CREATE NOTIFICATION (FIXED: NOW SENDS EMAILS)
+# 4. CREATE NOTIFICATION (EMAIL/SMS QUEUED FOR THE DELIVERY WORKER)
 # -----------------------------------------------------
 @login_required
 def create_notification(request, chama_id):
@@ -183,58 +206,20 @@ def create_notification(request, chama_id):
             else:
                 memberships = Membership.objects.filter(id__in=target_ids, membership_chama=chama)
 
-            count = 0
-            email_count = 0
-            
-            for membership in memberships:
-                recipient = membership.membership_user
-                user_settings, _ = UserNotificationSettings.objects.get_or_create(user_notification_settings_user=recipient)
-
-                # 1. ALWAYS Create In-App Notification (Database Record)
-                notif = Notification.objects.create(
-                    notification_user=recipient,
-                    notification_chama=chama,
-                    notification_title=data['notification_title'],
-                    notification_message=data['notification_message'],
-                    notification_type=data['notification_type'],
-                    notification_priority=data['notification_priority'],
-                    notification_sender=request.user
-                )
-                
-                # Log In-App delivery
-                NotificationDeliveryLog.objects.create(
-                    notification=notif, member=recipient,
-                    delivery_method='inapp', notification_status='sent'
-                )
-                count += 1
-
-                # 2. CHECK & SEND EMAIL
-                if user_settings.user_notification_settings_allow_email and recipient.email:
-                    try:
-                        send_mail(
-                            subject=f"[{chama.chama_name}] {data['notification_title']}",
-                            message=data['notification_message'],
-                            from_email=django_settings.EMAIL_HOST_USER, # defined in settings.py
-                            recipient_list=[recipient.email],
-                            fail_silently=False,
-                        )
-                        
-                        # Log Email delivery success
-                        NotificationDeliveryLog.objects.create(
-                            notification=notif, member=recipient,
-                            delivery_method='email', notification_status='sent'
-                        )
-                        email_count += 1
-                        
-                    except Exception as e:
-                        # Log Email delivery failure
-                        print(f"Email Error: {e}")
-                        NotificationDeliveryLog.objects.create(
-                            notification=notif, member=recipient,
-                            delivery_method='email', notification_status='failed'
-                        )
-
-            messages.success(request, f"Notification sent to {count} members ({email_count} via email).")
+            # 1. In-app notifications are written in bulk; 2. email/SMS is queued for run_delivery_worker
+            sent = send_chama_notification(
+                chama,
+                [m.membership_user for m in memberships.select_related('membership_user')],
+                title=data['notification_title'],
+                message=data['notification_message'],
+                sender=request.user,
+                n_type=data['notification_type'],
+                priority=data['notification_priority'],
+            )
+            count = len(sent)
+            queued_count = queue_deliveries(sent)
+
+            messages.success(request, f"Notification sent to {count} members ({queued_count} queued for email/SMS).")
             return redirect("notification:chama_notifications", chama_id=chama.id)
     else:
         form = NotificationForm()
@@ -273,7 +258,7 @@ class NotificationLogsView(PaginatedListMixin, ListView):
         status = self.request.GET.get("status", "all")
         qs = NotificationDeliveryLog.objects.filter(
             notification__notification_sender=self.request.user
-        ).select_related("notification", "member").order_by("-created_at")
+        ).select_related("notification__notification_shared_message", "member").order_by("-created_at")
 
         if status != "all":
             qs = qs.filter(notification_status=status)
@@ -291,8 +276,10 @@ class NotificationLogsView(PaginatedListMixin, ListView):
 @require_POST
 def resend_notification(request, id):
     log = get_object_or_404(NotificationDeliveryLog, id=id, notification__notification_sender=request.user)
-    log.notification_status = 'pending'
-    log.save()
+    if log.delivery_method not in CHANNELS:
+        messages.info(request, "In-app notifications are delivered immediately.")
+        return redirect("notification:notification_logs")
+    requeue(log)
     messages.success(request, "Notification queued for resend.")
     return redirect("notification:notification_logs")
 
@@ -329,16 +316,30 @@ class NotificationDeleteView(DeleteView):
 @login_required
 def mark_as_read(request, id):
     notification = get_object_or_404(Notification, id=id, notification_user=request.user)
-    if not notification.notification_is_read:
-        notification.notification_is_read = True
-        notification.save()
-    
+    mark_read(notification)
+
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         return JsonResponse({'status': 'ok', 'id': id})
         
     messages.success(request, "Marked as read.")
     return redirect("notification:notification_list")
 
+
+@login_required
+@require_POST
+def mark_all_read(request, chama_id):
+    """Mark every unread notification the user has in this chama as read."""
+    updated = mark_all_notifications_read(request.user, chama_id)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'status': 'ok', 'updated': updated})
+
+    messages.success(request, f"Marked {updated} notification(s) as read.")
+    next_url = request.POST.get("next")
+    if next_url and url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        return redirect(next_url)
+    return redirect("notification:notification_list")
+
 # -----------------------------------------------------
 # 10. EDIT REPLY (AJAX - "Small Tab")
 # -----------------------------------------------------